@@ -0,0 +1,3 @@
+from .runner import BenchConfig, BenchmarkRunner, compare, save_results
+
+__all__ = ['BenchConfig', 'BenchmarkRunner', 'compare', 'save_results']
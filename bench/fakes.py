@@ -0,0 +1,191 @@
+import hashlib
+import re
+import threading
+import time
+import wave
+from pathlib import Path
+from queue import Queue
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from libs.rag.embeddings import HashingEmbeddings
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model with simulated latency.
+
+    Answers with the first sentences of the prompt's context, so answers
+    depend on retrieval without calling any API.
+    """
+
+    latency: float = 0.5
+    token_latency: float = 0.01
+    answer_words: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        words = self._answer(messages)
+        time.sleep(self.latency + self.token_latency * len(words))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for index, word in enumerate(self._answer(messages)):
+            time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=f" {word}" if index else word))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def _answer(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = str(messages[-1].content)
+        # The condense step only needs the follow-up question back
+        if "Follow Up Input:" in prompt:
+            question = prompt.split("Follow Up Input:")[-1].split("Standalone question:")[0]
+            return question.split()
+        return prompt.split()[:self.answer_words]
+
+class LatencyEmbeddings(Embeddings):
+    """Feature-hashing embeddings with a simulated per-request and per-text latency"""
+
+    def __init__(self, dim: int = 512, latency: float = 0.05, text_latency: float = 0.0005):
+        self.inner = HashingEmbeddings(dim=dim)
+        self.model = f"bench-{self.inner.model}"
+        self.latency = latency
+        self.text_latency = text_latency
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency + self.text_latency * len(texts))
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.inner.embed_query(text)
+
+class FakeSpeechClient:
+    """Stand-in for ``OpenAI().audio.speech`` returning silent PCM"""
+
+    def __init__(self, latency: float = 0.3, char_latency: float = 0.002,
+                 sample_rate: int = 24000, chars_per_second: float = 15.0):
+        self.latency = latency
+        self.char_latency = char_latency
+        self.sample_rate = sample_rate
+        self.chars_per_second = chars_per_second
+        self.requests = 0
+        self.audio = SimpleNamespace(speech=self)
+
+    def create(self, model: str, voice: str, input: str, response_format: str = "mp3") -> Any:
+        self.requests += 1
+        time.sleep(self.latency + self.char_latency * len(input))
+        # Roughly as much audio as speaking the text would take
+        samples = int(len(input) / self.chars_per_second * self.sample_rate)
+        content = bytes(samples * 2)
+
+        def stream_to_file(path: str) -> None:
+            Path(path).write_bytes(content)
+
+        return SimpleNamespace(content=content, stream_to_file=stream_to_file)
+
+class FakePlayer:
+    """Records playback instead of opening an output device"""
+
+    def __init__(self, sample_rate: int = 24000, realtime: bool = False):
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+        self.played = 0
+
+    def play(self, pcm: bytes) -> None:
+        self.played += 1
+        if self.realtime:
+            time.sleep(len(pcm) / 2 / self.sample_rate)
+
+class FakeWhisper:
+    """Whisper stand-in that returns each fixture's known transcript.
+
+    Transcription takes ``real_time_factor`` times the audio duration.
+    """
+
+    def __init__(self, real_time_factor: float = 0.1, sample_rate: int = 16000):
+        self.real_time_factor = real_time_factor
+        self.sample_rate = sample_rate
+        self.transcripts: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(audio: np.ndarray) -> str:
+        return hashlib.sha1(np.ascontiguousarray(audio, dtype=np.float32).tobytes()).hexdigest()
+
+    def register(self, audio: np.ndarray, text: str) -> None:
+        with self._lock:
+            self.transcripts[self.fingerprint(audio)] = text
+
+    def transcribe(self, audio: np.ndarray, **kwargs: Any) -> Dict[str, str]:
+        time.sleep(len(audio) / self.sample_rate * self.real_time_factor)
+        with self._lock:
+            return {"text": self.transcripts.get(self.fingerprint(audio), "")}
+
+class FakeMicrophone:
+    """Replays WAV fixtures into the audio queue like ``AudioRecorder.record``.
+
+    Each fixture is treated as one utterance. With ``realtime`` the
+    microphone waits for the clip's duration before queueing it, so the
+    queue sees utterances at the pace a speaker would produce them.
+    """
+
+    def __init__(self, fixtures: List[Path], whisper: FakeWhisper,
+                 sample_rate: int = 16000, realtime: bool = True, gap: float = 0.5):
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+        self.gap = gap
+        self.clips = []
+        for path in fixtures:
+            audio = read_wav(path, sample_rate)
+            transcript = path.with_suffix(".txt")
+            text = transcript.read_text(encoding="utf-8").strip() if transcript.exists() else path.stem
+            whisper.register(audio, text)
+            self.clips.append(audio)
+        self.finished = threading.Event()
+
+    def record(self, audio_queue: Queue) -> None:
+        """Queue every fixture once, then stop"""
+        for audio in self.clips:
+            if self.realtime:
+                time.sleep(len(audio) / self.sample_rate + self.gap)
+            audio_queue.put_nowait(audio)
+        self.finished.set()
+
+def read_wav(path: Path, sample_rate: int = 16000) -> np.ndarray:
+    """Read a 16-bit WAV as mono float32 at ``sample_rate``"""
+    with wave.open(str(path), 'rb') as wav_file:
+        channels = wav_file.getnchannels()
+        rate = wav_file.getframerate()
+        audio = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+    audio = audio.reshape(-1, channels).mean(axis=1).astype(np.float32) / 32768.0
+    if rate != sample_rate:
+        positions = np.arange(int(len(audio) * sample_rate / rate)) * rate / sample_rate
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+def write_wav(path: Path, audio: np.ndarray, sample_rate: int = 16000) -> None:
+    """Write float32 audio as a 16-bit mono WAV"""
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes((np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes())
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
@@ -0,0 +1,87 @@
+import functools
+import random
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Tuple
+import numpy as np
+from .fakes import slugify, write_wav
+
+TOPICS = [
+    "admissions", "tuition", "housing", "library", "registration", "scholarships",
+    "graduation", "exams", "parking", "transcripts", "advising", "internships"
+]
+WORDS = (
+    "student office semester course deadline form campus policy department credit "
+    "application fee schedule building hours request appointment online portal "
+    "faculty program degree record support service email payment refund week"
+).split()
+
+def generate_corpus(directory: Path, pages: int = 24, paragraphs: int = 12,
+                    seed: int = 0) -> List[Tuple[str, str]]:
+    """Write deterministic HTML pages and return ``(question, topic)`` pairs.
+
+    Each page covers one topic with filler paragraphs and one fact, so
+    questions about a topic have a known relevant page.
+    """
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    questions = []
+    for index in range(pages):
+        topic = TOPICS[index % len(TOPICS)]
+        fact = f"The {topic} office code is {topic[:3].upper()}-{index:03d}."
+        body = []
+        for paragraph in range(paragraphs):
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+                for _ in range(rng.randint(4, 8))
+            ]
+            if paragraph == paragraphs // 2:
+                sentences.append(fact)
+            body.append(f"<p>{topic.capitalize()}: {' '.join(sentences)}</p>")
+        html = f"<html><head><title>{topic} {index}</title></head><body>{''.join(body)}</body></html>"
+        (directory / f"page_{index:03d}.html").write_text(html, encoding="utf-8")
+        questions.append((f"What is the {topic} office code for page {index}?", topic))
+    return questions
+
+class CorpusServer:
+    """Serves a directory over HTTP on localhost for web ingestion"""
+
+    def __init__(self, directory: Path):
+        handler = functools.partial(QuietHandler, directory=str(directory))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self) -> "CorpusServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def synthesize_utterances(directory: Path, texts: List[str], sample_rate: int = 16000,
+                          seconds_per_word: float = 0.35, seed: int = 0) -> List[Path]:
+    """Write speech-like WAV fixtures with ``.txt`` transcripts beside them"""
+    rng = np.random.default_rng(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index, text in enumerate(texts):
+        samples = int(len(text.split()) * seconds_per_word * sample_rate)
+        t = np.arange(samples) / sample_rate
+        # Voiced-sounding tone with a syllable-rate envelope plus a little noise
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+        audio = 0.2 * envelope * np.sin(2 * np.pi * 180 * t) + 0.01 * rng.standard_normal(samples)
+        path = directory / f"{index:03d}_{slugify(text)[:40]}.wav"
+        write_wav(path, audio.astype(np.float32), sample_rate)
+        path.with_suffix(".txt").write_text(text, encoding="utf-8")
+        paths.append(path)
+    return paths
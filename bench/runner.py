@@ -0,0 +1,268 @@
+import json
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+from libs.rag import RAGService
+from libs.telemetry import default_tracer
+from .fakes import FakeChatModel, FakeMicrophone, FakePlayer, FakeSpeechClient, FakeWhisper, LatencyEmbeddings
+from .fixtures import CorpusServer, generate_corpus, synthesize_utterances
+
+@dataclass
+class BenchConfig:
+    """Benchmark workload and simulated latencies"""
+
+    work_dir: Path
+    pages: int = 24
+    pdf_dir: Optional[Path] = None
+    wav_dir: Optional[Path] = None
+    questions: int = 50
+    concurrency: int = 4
+    vector_backend: str = "chroma"
+    retriever_mode: str = "hybrid"
+    llm_latency: float = 0.5
+    token_latency: float = 0.01
+    embed_latency: float = 0.05
+    tts_latency: float = 0.3
+    whisper_rtf: float = 0.1
+    wake_word: str = "hey computer"
+    realtime_mic: bool = True
+    voice: bool = True
+    seed: int = 0
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Count and latency percentiles of a list of durations"""
+    array = np.asarray(values or [0.0])
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean": float(array.mean()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "max": float(array.max())
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class BenchmarkRunner:
+    """Drives the RAG and voice pipelines against local fakes"""
+
+    def __init__(self, config: BenchConfig):
+        self.config = config
+        self.embeddings = LatencyEmbeddings(latency=config.embed_latency)
+        self.rag_service = RAGService(
+            source_dir=config.work_dir / "sources",
+            temp_dir=config.work_dir / "temp",
+            chroma_dir=config.work_dir / "index",
+            embedding_backend="hashing",
+            vector_backend=config.vector_backend,
+            retriever_mode=config.retriever_mode,
+            llm=FakeChatModel(latency=config.llm_latency, token_latency=config.token_latency),
+            embeddings=self.embeddings
+        )
+        self.questions: List[str] = []
+
+    def run(self) -> Dict[str, Any]:
+        """Run every phase and return the results"""
+        if not self.rag_service.initialize():
+            raise RuntimeError("Failed to initialize RAG service")
+        try:
+            return self._run()
+        finally:
+            self.rag_service.shutdown()
+            
+    def _run(self) -> Dict[str, Any]:
+        results = {
+            "config": {key: str(value) if isinstance(value, Path) else value
+                       for key, value in asdict(self.config).items()},
+            "environment": self._environment(),
+            "ingestion": self.bench_ingestion(),
+            "retrieval": self.bench_retrieval(),
+            "answer": self.bench_answers(),
+            "voice": self.bench_voice() if self.config.voice else {}
+        }
+        results["stages"] = default_tracer.snapshot()
+        results["peak_rss_mb"] = peak_rss_mb()
+        return results
+
+    def bench_ingestion(self) -> Dict[str, Any]:
+        """Ingest the generated web corpus and any PDFs through ``add_document``"""
+        corpus = self.config.work_dir / "corpus"
+        pairs = generate_corpus(corpus, pages=self.config.pages, seed=self.config.seed)
+        self.questions = [question for question, _ in pairs]
+
+        sources = []
+        with CorpusServer(corpus) as server:
+            sources.extend((f"{server.base_url}/{path.name}", "web") for path in sorted(corpus.glob("*.html")))
+            if self.config.pdf_dir:
+                sources.extend((str(path), "pdf") for path in sorted(self.config.pdf_dir.glob("*.pdf")))
+
+            chunks_before = len(self.rag_service.vectorstore.keyword_index)
+            durations, failed = [], 0
+            start = time.perf_counter()
+            for source, source_type in sources:
+                began = time.perf_counter()
+                if not self.rag_service.add_document(source, source_type):
+                    failed += 1
+                durations.append(time.perf_counter() - began)
+            elapsed = time.perf_counter() - start
+
+        chunks = len(self.rag_service.vectorstore.keyword_index) - chunks_before
+        return {
+            "sources": len(sources),
+            "failed": failed,
+            "chunks": chunks,
+            "seconds": elapsed,
+            "chunks_per_second": chunks / elapsed if elapsed else 0.0,
+            "per_source": percentiles(durations)
+        }
+
+    def bench_retrieval(self) -> Dict[str, Any]:
+        """Time the chain's retriever alone"""
+        retriever = self.rag_service.chain.chain.retriever
+        durations = []
+        for question in self._workload():
+            start = time.perf_counter()
+            retriever.invoke(question)
+            durations.append(time.perf_counter() - start)
+        return percentiles(durations)
+
+    def bench_answers(self) -> Dict[str, Any]:
+        """Time ``get_answer`` for cold questions, concurrently, then cache hits"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.rag_service.answer_cache.clear()
+        workload = self._workload()
+
+        def answer(item):
+            index, question = item
+            start = time.perf_counter()
+            self.rag_service.get_answer(question, session_id=f"bench-{index}")
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.config.concurrency) as executor:
+            cold = list(executor.map(answer, enumerate(workload)))
+        elapsed = time.perf_counter() - start
+        # Asking again from fresh sessions should hit the answer cache
+        cached = [answer((f"repeat-{index}", question)) for index, question in enumerate(workload)]
+        return {
+            "cold": percentiles(cold),
+            "cached": percentiles(cached),
+            "throughput_qps": len(workload) / elapsed if elapsed else 0.0
+        }
+
+    def bench_voice(self, timeout: float = 600.0) -> Dict[str, Any]:
+        """Replay WAV fixtures through the recorder, transcriber and responder queues"""
+        from libs.voice import BoundedQueue, Responder, Transcriber
+
+        wav_dir = self.config.wav_dir
+        if wav_dir is None:
+            wav_dir = self.config.work_dir / "wavs"
+            texts = [f"{self.config.wake_word} {question}" for question in self._workload()[:10]]
+            synthesize_utterances(wav_dir, texts, seed=self.config.seed)
+        fixtures = sorted(wav_dir.glob("*.wav"))
+        if not fixtures:
+            return {"utterances": 0}
+
+        whisper = FakeWhisper(real_time_factor=self.config.whisper_rtf)
+        microphone = FakeMicrophone(fixtures, whisper, realtime=self.config.realtime_mic)
+        transcriber = Transcriber(
+            model=whisper,
+            wake_word=self.config.wake_word,
+            english=True,
+            rag_service=self.rag_service
+        )
+        responder = Responder(
+            api_key="bench",
+            temp_dir=self.config.work_dir / "temp",
+            pipelined=True
+        )
+        responder.client = FakeSpeechClient(latency=self.config.tts_latency)
+        responder.player = FakePlayer()
+
+        done = threading.Semaphore(0)
+        responder.on_respond = lambda _: None
+        speak = responder.speak_pipelined
+
+        def speak_and_count(text, trace=None):
+            try:
+                speak(text, trace)
+            finally:
+                done.release()
+
+        responder.speak_pipelined = speak_and_count
+        audio_queue, result_queue = BoundedQueue(maxsize=64), BoundedQueue(maxsize=64)
+        for target, args in [
+            (microphone.record, (audio_queue,)),
+            (transcriber.transcribe, (audio_queue, result_queue)),
+            (responder.process_responses, (result_queue,))
+        ]:
+            threading.Thread(target=target, args=args, daemon=True).start()
+
+        deadline = time.monotonic() + timeout
+        answered = 0
+        for _ in fixtures:
+            if not done.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                break
+            answered += 1
+        stages = default_tracer.snapshot()
+        return {
+            "utterances": len(fixtures),
+            "answered": answered,
+            "end_to_end": stages.get("voice.playback_start", {}),
+            "transcribed": stages.get("voice.transcribed", {}),
+            "answered_latency": stages.get("voice.answered", {}),
+            "tts_first_byte": stages.get("voice.tts_first_byte", {})
+        }
+
+    def _workload(self) -> List[str]:
+        """The first ``questions`` questions, cycling through the corpus"""
+        return [self.questions[i % len(self.questions)] for i in range(self.config.questions)]
+
+    @staticmethod
+    def _environment() -> Dict[str, Any]:
+        try:
+            revision = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except Exception:
+            revision = None
+        return {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "git_revision": revision,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+
+COMPARED_METRICS = ("p50", "p95", "chunks_per_second", "throughput_qps", "peak_rss_mb")
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], prefix: str = "") -> List[str]:
+    """Describe how headline results changed relative to a baseline run"""
+    lines = []
+    for key, value in current.items():
+        name = f"{prefix}{key}"
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            if key not in ("config", "environment", "stages"):
+                lines.extend(compare(old or {}, value, f"{name}."))
+        elif key in COMPARED_METRICS and isinstance(old, (int, float)) and old:
+            lines.append(f"{name}: {old:.4g} -> {value:.4g} ({(value - old) / old:+.1%})")
+    return lines
+
+def save_results(results: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,77 @@
+import json
+import tempfile
+from pathlib import Path
+import click
+from bench import BenchConfig, BenchmarkRunner, compare, save_results
+
+@click.command()
+@click.option("--output", type=click.Path(dir_okay=False), default="bench_results.json",
+              show_default=True, help="Where to write the JSON results.")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False),
+              help="Earlier results file to compare against.")
+@click.option("--work-dir", type=click.Path(file_okay=False),
+              help="Directory for the index and fixtures (default: a temporary directory).")
+@click.option("--pages", default=24, show_default=True, help="Generated web pages to ingest.")
+@click.option("--pdf-dir", type=click.Path(exists=True, file_okay=False),
+              help="Also ingest every PDF in this directory.")
+@click.option("--wav-dir", type=click.Path(exists=True, file_okay=False),
+              help="Recorded utterances (*.wav with matching *.txt transcripts).")
+@click.option("--questions", default=50, show_default=True, help="Questions per phase.")
+@click.option("--concurrency", default=4, show_default=True, help="Concurrent answer requests.")
+@click.option("--vector-backend", type=click.Choice(["chroma", "dense"]), default="chroma", show_default=True)
+@click.option("--retriever-mode", type=click.Choice(["hybrid", "vector"]), default="hybrid", show_default=True)
+@click.option("--llm-latency", default=0.5, show_default=True, help="Simulated LLM latency (s).")
+@click.option("--token-latency", default=0.01, show_default=True, help="Simulated per-token latency (s).")
+@click.option("--embed-latency", default=0.05, show_default=True, help="Simulated embedding request latency (s).")
+@click.option("--tts-latency", default=0.3, show_default=True, help="Simulated TTS request latency (s).")
+@click.option("--whisper-rtf", default=0.1, show_default=True, help="Simulated Whisper real-time factor.")
+@click.option("--fast-mic", is_flag=True, help="Queue utterances immediately instead of in real time.")
+@click.option("--skip-voice", is_flag=True, help="Skip the voice pipeline phase.")
+def main(output, baseline, work_dir, pages, pdf_dir, wav_dir, questions, concurrency,
+         vector_backend, retriever_mode, llm_latency, token_latency, embed_latency,
+         tts_latency, whisper_rtf, fast_mic, skip_voice):
+    """Benchmark ingestion, retrieval, answering and voice with local fakes.
+    
+    No OpenAI calls, microphone or speakers are used; latencies of the
+    external services are simulated so runs are repeatable.
+    """
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        config = BenchConfig(
+            work_dir=Path(work_dir or tmp),
+            pages=pages,
+            pdf_dir=Path(pdf_dir) if pdf_dir else None,
+            wav_dir=Path(wav_dir) if wav_dir else None,
+            questions=questions,
+            concurrency=concurrency,
+            vector_backend=vector_backend,
+            retriever_mode=retriever_mode,
+            llm_latency=llm_latency,
+            token_latency=token_latency,
+            embed_latency=embed_latency,
+            tts_latency=tts_latency,
+            whisper_rtf=whisper_rtf,
+            realtime_mic=not fast_mic,
+            voice=not skip_voice
+        )
+        results = BenchmarkRunner(config).run()
+        
+    save_results(results, Path(output))
+    ingestion, answer = results["ingestion"], results["answer"]
+    click.echo(f"Ingestion: {ingestion['chunks']} chunks at {ingestion['chunks_per_second']:.1f} chunks/s")
+    click.echo(f"Retrieval p50/p95: {results['retrieval']['p50'] * 1000:.1f}/"
+               f"{results['retrieval']['p95'] * 1000:.1f} ms")
+    click.echo(f"Answer p50/p95: {answer['cold']['p50']:.2f}/{answer['cold']['p95']:.2f} s "
+               f"({answer['throughput_qps']:.1f} q/s)")
+    if results["voice"].get("end_to_end"):
+        voice = results["voice"]["end_to_end"]
+        click.echo(f"Voice end-to-end p50/p95: {voice['p50']:.2f}/{voice['p95']:.2f} s")
+    click.echo(f"Peak RSS: {results['peak_rss_mb']:.0f} MB")
+    click.echo(f"Results written to {output}")
+    
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            for line in compare(json.load(f), results):
+                click.echo(line)
+
+if __name__ == "__main__":
+    main()
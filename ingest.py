@@ -0,0 +1,49 @@
+import click
+from libs.rag import SnapshotPublisher
+from src.config import Settings
+
+@click.command()
+@click.argument("sources", nargs=-1)
+@click.option("--type", "source_type", default="pdf", show_default=True,
+              type=click.Choice(["pdf", "audio", "youtube", "web", "sitemap"]),
+              help="Type of every SOURCE.")
+@click.option("--refresh-web", is_flag=True, help="Also re-check every registered web page.")
+@click.option("--publish/--no-publish", default=True, show_default=True,
+              help="Publish an index snapshot for `run.py --workers` afterwards.")
+def main(sources, source_type, refresh_web, publish):
+    """Ingest sources and publish the index for serving workers.
+    
+    Workers started with `run.py --workers N` serve the published snapshot
+    read-only and switch to a newly published one without restarting. With
+    no SOURCES, the current index is published as-is.
+    """
+    settings = Settings.load_from_env()
+    
+    from src.app import create_rag_service
+    
+    rag_service = create_rag_service(settings)
+    click.get_current_context().call_on_close(rag_service.shutdown)
+    if not rag_service.initialize():
+        raise click.ClickException("Failed to initialize RAG service")
+        
+    failed = []
+    for source in sources:
+        report = lambda stage, source=source: click.echo(f"{source}: {stage}")
+        if not rag_service.add_document(source, source_type, on_progress=report):
+            failed.append(source)
+            
+    if refresh_web:
+        counts = rag_service.refresh_web_sources()
+        click.echo(", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "No web sources")
+        
+    if publish:
+        publisher = SnapshotPublisher(
+            settings.chroma_dir, settings.snapshot_dir,
+            keep=settings.snapshot_keep, lease_ttl=settings.snapshot_lease_ttl
+        )
+        click.echo(f"Published snapshot {publisher.publish().name}")
+    if failed:
+        raise click.ClickException(f"Failed to ingest: {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
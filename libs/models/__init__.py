@@ -0,0 +1,3 @@
+from .whisper import LazyWhisperModel, decode_lock, load_whisper
+
+__all__ = ['LazyWhisperModel', 'decode_lock', 'load_whisper']
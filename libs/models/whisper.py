@@ -0,0 +1,49 @@
+import threading
+from typing import Any, Dict
+import numpy as np
+
+_models: Dict[str, Any] = {}
+_decode_locks: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+def load_whisper(name: str) -> Any:
+    """Load a Whisper model once per process and share it between callers"""
+    with _lock:
+        if name not in _models:
+            import whisper
+            _models[name] = whisper.load_model(name)
+        return _models[name]
+
+def decode_lock(name: str) -> Any:
+    """Lock serializing decodes on a shared model.
+    
+    Whisper's decoder installs KV-cache hooks on the model's modules for the
+    duration of a decode, so concurrent decodes on one model corrupt each
+    other's caches.
+    """
+    with _lock:
+        return _decode_locks.setdefault(name, threading.RLock())
+
+class LazyWhisperModel:
+    """Whisper model handle that loads the model on first use"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = decode_lock(name)
+        
+    @property
+    def loaded(self) -> bool:
+        return self.name in _models
+        
+    def get(self) -> Any:
+        """Get the underlying model, loading it if needed"""
+        return load_whisper(self.name)
+        
+    def transcribe(self, audio: np.ndarray, **kwargs: Any) -> Dict[str, Any]:
+        model = self.get()
+        with self.lock:
+            return model.transcribe(audio, **kwargs)
+        
+    def warm_up(self) -> None:
+        """Load the model and run one dummy inference to prime kernels"""
+        self.transcribe(np.zeros(16000, dtype=np.float32), fp16=False)
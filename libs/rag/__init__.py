@@ -2,5 +2,8 @@ from .service import RAGService
 from .chain import RAGChain
 from .loader import RAGLoader
 from .vectorstore import RAGVectorStore
+from .cache import AnswerCache
+from .snapshot import SnapshotPublisher, SnapshotWatcher, current_snapshot
 
-__all__ = ['RAGService', 'RAGChain', 'RAGLoader', 'RAGVectorStore'] 
\ No newline at end of file
+__all__ = ['RAGService', 'RAGChain', 'RAGLoader', 'RAGVectorStore', 'AnswerCache',
+           'SnapshotPublisher', 'SnapshotWatcher', 'current_snapshot'] 
\ No newline at end of file
@@ -0,0 +1,132 @@
+import json
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+from langchain.docstore.document import Document
+
+# Keep codes such as "CS-101" or "F-1/I-20" together as well as their parts
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+_PART_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens, emitting compound codes and their parts"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = _PART_PATTERN.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+class BM25Index:
+    """Incrementally maintained on-disk inverted index with BM25 scoring"""
+
+    def __init__(self, path: Path, k1: float = 1.5, b: float = 0.75, read_only: bool = False):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            self._load_stats()
+            return
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id TEXT PRIMARY KEY,
+                length INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+        """)
+        self._conn.commit()
+        self._load_stats()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add(self, ids: List[str], documents: List[Document]) -> None:
+        """Index documents that are not indexed yet"""
+        with self._lock:
+            for doc_id, document in zip(ids, documents):
+                counts = Counter(tokenize(document.page_content))
+                inserted = self._conn.execute(
+                    "INSERT OR IGNORE INTO docs (id, length, content, metadata) VALUES (?, ?, ?, ?)",
+                    (doc_id, sum(counts.values()), document.page_content,
+                     json.dumps(document.metadata))
+                ).rowcount
+                if not inserted:
+                    continue
+                self._conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, doc_id, tf) for term, tf in counts.items()]
+                )
+            self._conn.commit()
+            self._load_stats()
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove documents from the index"""
+        with self._lock:
+            for doc_id in ids:
+                self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+                self._conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+            self._conn.commit()
+            self._load_stats()
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[str, float]]:
+        """Return the ``k`` best (id, score) pairs for a query"""
+        terms = set(tokenize(query))
+        if not terms or not self._count:
+            return []
+
+        scores: Counter = Counter()
+        with self._lock:
+            for term in terms:
+                rows = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p "
+                    "JOIN docs d ON d.id = p.doc_id WHERE p.term = ?",
+                    (term,)
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (self._count - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, length in rows:
+                    norm = self.k1 * (1 - self.b + self.b * length / self._avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return scores.most_common(k)
+
+    def get_documents(self, ids: List[str]) -> Dict[str, Document]:
+        """Fetch indexed documents by id"""
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, content, metadata FROM docs WHERE id IN ({','.join('?' * len(ids))})",
+                ids
+            ).fetchall()
+        return {
+            doc_id: Document(page_content=content, metadata=json.loads(metadata))
+            for doc_id, content, metadata in rows
+        }
+
+    def _load_stats(self) -> None:
+        count, avg_length = self._conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        self._count = count
+        self._avg_length = avg_length or 1.0
@@ -0,0 +1,268 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+from langchain.docstore.document import Document
+
+class AnswerCache:
+    """Semantic cache of answers keyed on the question embedding.
+
+    Embeddings live in one preallocated matrix whose rows never move on a
+    hit; LRU order is tracked separately, and an evicted entry's row is
+    reused by the next one. Changes are written to a SQLite file by a
+    background thread every ``flush_interval`` seconds, so answering never
+    waits on disk. Without a path the cache is in-memory only.
+    """
+
+    def __init__(self, path: Optional[Path], threshold: float = 0.95,
+                 max_entries: int = 256, ttl: float = 86400.0,
+                 flush_interval: float = 1.0):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        # Keys in LRU order, most recently used last, with each key's entry
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Row i of the matrix holds the embedding of _keys[i]; _rows maps back
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Keys to write (or delete, when no longer cached) on the next flush
+        self._dirty = set()
+        self._conn = None
+        self._db_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._load()
+
+    def lookup(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Return the cached answer for the most similar question, if any"""
+        with self._lock:
+            self._expire()
+            if not self._keys:
+                self.misses += 1
+                return None
+
+            query = self._normalize(embedding)
+            if query.shape[0] != self._matrix.shape[1]:
+                self.misses += 1
+                return None
+            scores = self._matrix[:len(self._keys)] @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            key = self._keys[best]
+            self._entries.move_to_end(key)
+            entry = self._entries[key]
+            entry["used"] = time.time()
+            self._mark_dirty(key)
+            self.hits += 1
+
+        return {
+            "question": entry["question"],
+            "answer": entry["answer"],
+            "source_documents": [
+                Document(page_content=doc["page_content"], metadata=doc["metadata"])
+                for doc in entry["source_documents"]
+            ]
+        }
+
+    def store(self, question: str, embedding: List[float], result: Dict[str, Any]) -> None:
+        """Store an answer for a question"""
+        now = time.time()
+        entry = {
+            "question": question,
+            "answer": result.get("answer", ""),
+            "source_documents": [
+                {"page_content": doc.page_content, "metadata": doc.metadata}
+                for doc in result.get("source_documents", [])
+            ],
+            "created": now,
+            "used": now
+        }
+        vector = self._normalize(embedding)
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            key = question.strip().lower()
+            if self._matrix is not None and self._matrix.shape[1] != vector.shape[0]:
+                # A different embedding model; nothing cached so far can match
+                self._reset()
+            self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._insert(key, entry, vector)
+            self._mark_dirty(key)
+
+    def clear(self) -> None:
+        """Invalidate every cached answer"""
+        with self._lock:
+            self._dirty.update(self._entries)
+            self._reset()
+            self._schedule_flush()
+
+    def answers(self) -> List[str]:
+        """All cached answers, most recently used last"""
+        with self._lock:
+            return [entry["answer"] for entry in self._entries.values()]
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache hit and miss counts"""
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def flush(self) -> None:
+        """Write pending changes to disk now"""
+        if self.path is None:
+            return
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            rows = [self._row(key) for key in dirty if key in self._entries]
+            deleted = [(key,) for key in dirty if key not in self._entries]
+        if not rows and not deleted:
+            return
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                conn.executemany("DELETE FROM answers WHERE key = ?", deleted)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO answers "
+                    "(key, question, embedding, answer, source_documents, created, used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                conn.commit()
+        except Exception as e:
+            print(f"Answer cache save error: {e}")
+
+    def close(self) -> None:
+        """Stop the background writer after a final flush"""
+        if self._flusher is not None:
+            self._flusher = None
+            self._flush_event.set()
+        self.flush()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _insert(self, key: str, entry: Dict[str, Any], vector: np.ndarray) -> None:
+        """Add an entry as most recently used, in the first free matrix row"""
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+        self._entries[key] = entry
+        self._rows[key] = len(self._keys)
+        self._matrix[len(self._keys)] = vector
+        self._keys.append(key)
+
+    def _remove(self, key: str) -> None:
+        """Drop an entry, moving the last matrix row into its place"""
+        if self._entries.pop(key, None) is None:
+            return
+        self._dirty.add(key)
+        row = self._rows.pop(key)
+        last = self._keys.pop()
+        if row < len(self._keys):
+            self._matrix[row] = self._matrix[len(self._keys)]
+            self._keys[row] = last
+            self._rows[last] = row
+
+    def _reset(self) -> None:
+        self._entries.clear()
+        self._keys = []
+        self._rows = {}
+        self._matrix = None
+
+    def _expire(self) -> None:
+        """Drop entries older than the TTL"""
+        cutoff = time.time() - self.ttl
+        expired = [key for key, entry in self._entries.items() if entry["created"] < cutoff]
+        for key in expired:
+            self._remove(key)
+        if expired:
+            self._schedule_flush()
+
+    def _mark_dirty(self, key: str) -> None:
+        self._dirty.add(key)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """Wake the background writer, starting it on first use"""
+        if self.path is None:
+            return
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._run, name="answer-cache-writer", daemon=True)
+            self._flusher.start()
+        self._flush_event.set()
+
+    def _run(self) -> None:
+        while self._flusher is not None:
+            self._flush_event.wait()
+            self._flush_event.clear()
+            self.flush()
+            # Batch the changes of the next interval into one transaction
+            time.sleep(self.flush_interval)
+
+    def _row(self, key: str) -> tuple:
+        entry = self._entries[key]
+        vector = self._matrix[self._rows[key]]
+        return (
+            key, entry["question"], vector.tobytes(), entry["answer"],
+            json.dumps(entry["source_documents"]), entry["created"], entry["used"]
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, question TEXT NOT NULL, embedding BLOB NOT NULL, "
+                "answer TEXT NOT NULL, source_documents TEXT NOT NULL, "
+                "created REAL NOT NULL, used REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _load(self) -> None:
+        """Load persisted entries, least recently used first"""
+        try:
+            if self.path and self.path.exists():
+                with self._db_lock:
+                    rows = self._connect().execute(
+                        "SELECT key, question, embedding, answer, source_documents, created, used "
+                        "FROM answers ORDER BY used"
+                    ).fetchall()
+                # Rows beyond the current size limit are deleted on the next flush
+                stale = max(len(rows) - self.max_entries, 0)
+                self._dirty.update(row[0] for row in rows[:stale])
+                for key, question, blob, answer, documents, created, used in rows[stale:]:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    if self._matrix is not None and self._matrix.shape[1] != vector.shape[0]:
+                        self._dirty.add(key)
+                        continue
+                    entry = {
+                        "question": question,
+                        "answer": answer,
+                        "source_documents": json.loads(documents),
+                        "created": created,
+                        "used": used
+                    }
+                    self._insert(key, entry, vector)
+        except Exception as e:
+            print(f"Answer cache load error: {e}")
+            self._reset()
@@ -1,39 +1,163 @@
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from contextlib import closing
+import os
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
 from langchain.chains import ConversationalRetrievalChain
 from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
+from libs.telemetry import default_tracer, span
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records retrieval, condense and generation latencies of chain runs"""
+    
+    def __init__(self):
+        self._starts: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+        
+    def _start(self, run_id: UUID, stage: str) -> None:
+        with self._lock:
+            self._starts[run_id] = (stage, time.perf_counter())
+            
+    def _end(self, run_id: UUID) -> None:
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+        if started:
+            default_tracer.observe(started[0], time.perf_counter() - started[1])
+            
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._start(run_id, "rag.retrieve")
+        
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id)
+        
+    def on_chain_start(self, serialized, inputs, *, run_id, tags=None, **kwargs):
+        # Sub-chains are tagged with their stage; other chain runs are ignored
+        for stage in ("condense", "generate"):
+            if stage in (tags or []):
+                self._start(run_id, f"rag.{stage}")
+                
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+        
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+        
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
 
 class RAGChain:
     """Manages the RAG chain for question answering"""
     
-    def __init__(self, model_name: str = "gpt-3.5-turbo"):
-        self.llm = ChatOpenAI(model=model_name)
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True
-        )
-        self.chain = None
-        
-    def create_conversational_chain(self, retriever) -> ConversationalRetrievalChain:
-        """Create a conversational chain with the given retriever"""
-        template = """
+    def __init__(self, model_name: str = "gpt-3.5-turbo", llm: Optional[BaseChatModel] = None,
+                 base_url: Optional[str] = None):
+        self.llm = llm or self._create_llm(model_name, base_url)
+        self.qa_prompt = PromptTemplate(
+            template="""
         Answer the question based on the following context:
         {context}
         
         Question: {question}
+        """,
+            input_variables=["context", "question"]
+        )
+        self.chain: Optional[ConversationalRetrievalChain] = None
+        self.tracing = TracingCallbackHandler()
+        
+    @staticmethod
+    def _create_llm(model_name: str, base_url: Optional[str]) -> BaseChatModel:
+        """OpenAI chat model, or one on an OpenAI-compatible server such as a local llama.cpp or Ollama"""
+        from langchain_openai import ChatOpenAI
+        
+        if base_url:
+            # Local servers accept any key, but the client insists on one
+            return ChatOpenAI(model=model_name, base_url=base_url,
+                              api_key=os.getenv("OPENAI_API_KEY") or "local")
+        return ChatOpenAI(model=model_name)
+        
+    def create_conversational_chain(self, retriever) -> ConversationalRetrievalChain:
+        """Create the conversational chain once and reuse it afterwards.
+        
+        The chain holds no memory of its own; history is passed in per call
+        so that sessions do not share it.
         """
+        if self.chain is None:
+            self.chain = ConversationalRetrievalChain.from_llm(
+                llm=self.llm,
+                retriever=retriever,
+                combine_docs_chain_kwargs={"prompt": self.qa_prompt}
+            )
+            # Tag the sub-chains so tracing can tell the two LLM calls apart
+            self.chain.question_generator.tags = ["condense"]
+            self.chain.combine_docs_chain.tags = ["generate"]
+            
+        return self.chain
         
-        qa_prompt = PromptTemplate(
-            template=template,
-            input_variables=["context", "question"]
+    def ask(self, question: str, memory: ConversationBufferMemory) -> Dict[str, Any]:
+        """Answer a question using and updating the given session memory"""
+        if self.chain is None:
+            raise RuntimeError("Conversational chain has not been created")
+            
+        # An empty history makes the chain skip the question-condensing call
+        chat_history = memory.load_memory_variables({})["chat_history"]
+        result = self.chain(
+            {"question": question, "chat_history": chat_history},
+            callbacks=[self.tracing]
         )
+        memory.save_context({"question": question}, {"answer": result["answer"]})
+        return result
+        
+    def stream(self, question: str, memory: ConversationBufferMemory,
+               result: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Answer a question, yielding answer tokens as the LLM produces them.
         
-        self.chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=retriever,
-            memory=self.memory,
-            combine_docs_chain_kwargs={"prompt": qa_prompt}
+        Mirrors ``ask`` step by step so only the final generation streams.
+        ``result`` is filled with the answer and source documents once the
+        stream completes. Closing the generator early closes the LLM request.
+        """
+        if self.chain is None:
+            raise RuntimeError("Conversational chain has not been created")
+            
+        chat_history = memory.load_memory_variables({})["chat_history"]
+        standalone = question
+        if chat_history:
+            with span("rag.condense"):
+                standalone = self.chain.question_generator.run(
+                    question=question,
+                    chat_history=self._format_history(chat_history)
+                )
+                
+        with span("rag.retrieve"):
+            docs = self.chain.retriever.invoke(standalone)
+        prompt = self.qa_prompt.format(
+            context="\n\n".join(doc.page_content for doc in docs),
+            question=standalone
         )
         
-        return self.chain 
\ No newline at end of file
+        tokens = []
+        start = time.perf_counter()
+        with closing(self.llm.stream(prompt)) as chunks:
+            for chunk in chunks:
+                if not tokens:
+                    default_tracer.observe("rag.first_token", time.perf_counter() - start)
+                tokens.append(chunk.content)
+                yield chunk.content
+        default_tracer.observe("rag.generate", time.perf_counter() - start)
+                
+        answer = "".join(tokens)
+        memory.save_context({"question": question}, {"answer": answer})
+        if result is not None:
+            result.update({"question": question, "answer": answer, "source_documents": docs})
+            
+    @staticmethod
+    def _format_history(messages: List[BaseMessage]) -> str:
+        """Format history the way the conversational chain does"""
+        roles = {"human": "Human", "ai": "Assistant"}
+        return "\n".join(
+            f"{roles.get(message.type, message.type)}: {message.content}"
+            for message in messages
+        )
@@ -0,0 +1,120 @@
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+def normalize_question(question: str) -> str:
+    """Normalize a question so trivially different wordings share a key"""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+class ConcurrencyLimiter:
+    """Caps concurrent calls per resource and records queueing metrics"""
+
+    def __init__(self, limits: Dict[str, int], window: int = 1000):
+        self.limits = limits
+        self._semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in limits.items()}
+        self._waiting = {name: 0 for name in limits}
+        self._active = {name: 0 for name in limits}
+        self._wait_times = {name: deque(maxlen=window) for name in limits}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, name: str) -> Iterator[None]:
+        """Hold one of the concurrent slots for ``name``"""
+        with self._lock:
+            self._waiting[name] += 1
+        start = time.monotonic()
+        self._semaphores[name].acquire()
+        with self._lock:
+            self._waiting[name] -= 1
+            self._active[name] += 1
+            self._wait_times[name].append(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active[name] -= 1
+            self._semaphores[name].release()
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Queue depth, active calls and wait-time percentiles per resource"""
+        result = {}
+        with self._lock:
+            for name, limit in self.limits.items():
+                waits = np.asarray(self._wait_times[name] or [0.0])
+                result[name] = {
+                    "limit": limit,
+                    "queue_depth": self._waiting[name],
+                    "active": self._active[name],
+                    "wait_p50": float(np.percentile(waits, 50)),
+                    "wait_p95": float(np.percentile(waits, 95)),
+                    "wait_max": float(waits.max())
+                }
+        return result
+
+class LimitedEmbeddings(Embeddings):
+    """Embeddings whose query calls hold one of the limiter's ``embedding`` slots.
+
+    Wraps the backend below the embedding cache, so cached queries never
+    wait for a slot. Document batches of ingestion are not capped.
+    """
+
+    def __init__(self, embeddings: Embeddings, limiter: ConcurrencyLimiter, slot: str = "embedding"):
+        self.embeddings = embeddings
+        self.limiter = limiter
+        self.slot = slot
+        self.model = getattr(embeddings, "model", "")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self.limiter.slot(self.slot):
+            return self.embeddings.embed_query(text)
+
+class RequestCoalescer:
+    """Shares one in-flight computation between identical concurrent requests"""
+
+    def __init__(self):
+        self.coalesced = 0
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: str) -> Tuple[Future, bool]:
+        """Get the future for ``key`` and whether the caller must compute it"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def complete(self, key: str, future: Future, fn: Callable[..., Any], *args: Any) -> Any:
+        """Compute the result for a key this caller leads"""
+        try:
+            result = fn(*args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def run(self, key: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Compute ``fn(*args)`` or wait for an identical in-flight call"""
+        future, leader = self.join(key)
+        if leader:
+            return self.complete(key, future, fn, *args)
+        return future.result()
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
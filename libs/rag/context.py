@@ -0,0 +1,134 @@
+from typing import Any, List, Optional
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from libs.telemetry import span
+from .tokens import token_encoder
+
+class ContextAssembler:
+    """Selects retrieved chunks for the prompt within a token budget.
+
+    Candidates arrive in retrieval order. They are diversified with maximal
+    marginal relevance (MMR), text already covered by a selected chunk (such
+    as the splitter's overlap) is cut from either end, near-duplicates are
+    dropped, and chunks are packed until ``max_tokens`` is reached. The last
+    chunk that fits only partly is truncated, so the context never exceeds
+    the budget.
+
+    Relevance for MMR is taken from the retrieval rank and similarity between
+    chunks from their cached embeddings, so no extra embedding calls are made;
+    if any candidate's embedding is not cached, retrieval order is kept.
+    """
+
+    def __init__(self, embeddings: Optional[Embeddings] = None, max_tokens: int = 1500,
+                 max_chunks: int = 8, mmr_lambda: float = 0.7,
+                 min_overlap: int = 40, duplicate_ratio: float = 0.8,
+                 min_chunk_tokens: int = 32, encoding: str = "cl100k_base"):
+        self.embeddings = embeddings
+        self.max_tokens = max_tokens
+        self.max_chunks = max_chunks
+        self.mmr_lambda = mmr_lambda
+        self.min_overlap = min_overlap
+        self.duplicate_ratio = duplicate_ratio
+        self.min_chunk_tokens = min_chunk_tokens
+        self.encoding = token_encoder(encoding)
+
+    def assemble(self, documents: List[Document]) -> List[Document]:
+        """Choose, trim and pack documents into the token budget"""
+        selected: List[Document] = []
+        used = 0
+        for document in self._mmr_order(documents):
+            if len(selected) >= self.max_chunks or used >= self.max_tokens:
+                break
+            text = self._remove_overlap(document.page_content, selected)
+            if text is None:
+                continue
+
+            tokens = self.encoding.encode(text)
+            remaining = self.max_tokens - used
+            if len(tokens) > remaining:
+                if remaining < self.min_chunk_tokens:
+                    break
+                text = self.encoding.decode(tokens[:remaining])
+                tokens = tokens[:remaining]
+            selected.append(Document(page_content=text, metadata=dict(document.metadata)))
+            used += len(tokens)
+        return selected
+
+    def _mmr_order(self, documents: List[Document]) -> List[Document]:
+        """Reorder candidates by maximal marginal relevance"""
+        if len(documents) < 3 or self.embeddings is None:
+            return list(documents)
+
+        texts = [doc.page_content for doc in documents]
+        if hasattr(self.embeddings, "cached_documents"):
+            vectors = self.embeddings.cached_documents(texts)
+            if vectors is None:
+                return list(documents)
+        else:
+            vectors = self.embeddings.embed_documents(texts)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        similarity = vectors @ vectors.T
+        # Retrieval order is the relevance signal: 1.0 for the top hit down to ~0
+        relevance = 1.0 - np.arange(len(documents)) / len(documents)
+
+        order = [0]
+        remaining = list(range(1, len(documents)))
+        while remaining:
+            redundancy = similarity[np.ix_(remaining, order)].max(axis=1)
+            scores = self.mmr_lambda * relevance[remaining] - (1 - self.mmr_lambda) * redundancy
+            best = remaining[int(np.argmax(scores))]
+            order.append(best)
+            remaining.remove(best)
+        return [documents[index] for index in order]
+
+    def _remove_overlap(self, text: str, selected: List[Document]) -> Optional[str]:
+        """Cut text shared with selected chunks at either end; None for near-duplicates"""
+        shingles = self._shingles(text)
+        for document in selected:
+            other = document.page_content
+            if shingles and len(shingles & self._shingles(other)) >= self.duplicate_ratio * len(shingles):
+                return None
+            head = self._overlap(other, text)
+            if head:
+                text = text[head:].lstrip()
+            tail = self._overlap(text, other)
+            if tail:
+                text = text[:len(text) - tail].rstrip()
+            if not text:
+                return None
+        return text
+
+    def _overlap(self, first: str, second: str) -> int:
+        """Length of the longest suffix of ``first`` that starts ``second``"""
+        if len(second) < self.min_overlap:
+            return 0
+        probe = second[:self.min_overlap]
+        position = first.find(probe)
+        while position != -1:
+            if second.startswith(first[position:]):
+                return len(first) - position
+            position = first.find(probe, position + 1)
+        return 0
+
+    @staticmethod
+    def _shingles(text: str, size: int = 5) -> set:
+        words = text.lower().split()
+        return {" ".join(words[i:i + size]) for i in range(max(0, len(words) - size + 1))}
+
+class ContextAssemblingRetriever(BaseRetriever):
+    """Retrieves candidates with a base retriever and assembles the prompt context"""
+
+    retriever: Any
+    assembler: Any  # ContextAssembler
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        candidates = self.retriever.invoke(query)
+        with span("rag.assemble_context"):
+            return self.assembler.assemble(candidates)
@@ -0,0 +1,292 @@
+import json
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+class DenseVectorStore(VectorStore):
+    """In-process exact vector index over a memory-mapped matrix.
+
+    Normalized vectors are appended to a raw float16/float32 file that is
+    opened read-only with ``np.memmap``, so startup does not load the matrix
+    and several processes share the same page cache. Ids, text and metadata
+    live in a small sqlite table keyed by row number. An optional IVF
+    partitioning restricts search to the nearest ``n_probe`` clusters; it
+    is rebuilt once the index has grown by ``ivf_growth`` since the last
+    build, so new rows do not pile into stale clusters.
+    """
+
+    # Rows scored per block, bounding the float32 copy of a float16 matrix
+    BLOCK_ROWS = 16384
+    # Rows per cluster sampled to train the IVF centroids
+    TRAIN_ROWS_PER_LIST = 256
+
+    def __init__(self, directory: Path, embedding_function: Embeddings,
+                 dtype: str = "float32", n_probe: int = 8, ivf_growth: float = 0.5,
+                 read_only: bool = False):
+        self.directory = directory
+        self.embedding_function = embedding_function
+        self.dtype = np.dtype(dtype)
+        self.n_probe = n_probe
+        self.ivf_growth = ivf_growth
+        self.read_only = read_only
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = directory / f"vectors.{self.dtype.name}"
+        self._ivf_path = directory / "ivf.npz"
+        self._lock = threading.RLock()
+
+        uri = f"file:{directory / 'meta.sqlite'}{'?mode=ro' if read_only else ''}"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        if not read_only:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS rows (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT UNIQUE NOT NULL,
+                    content TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    deleted INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """)
+            self._conn.commit()
+        self.refresh()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def refresh(self) -> None:
+        """Re-map the matrix, picking up rows written by other processes"""
+        with self._lock:
+            count, = self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()
+            dim = self._conn.execute("SELECT value FROM info WHERE key = 'dim'").fetchone()
+            self._dim = int(dim[0]) if dim else None
+            self._count = count
+            self._matrix = (
+                np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(count, self._dim))
+                if count else None
+            )
+            self._deleted = np.zeros(count, dtype=bool)
+            for row, in self._conn.execute("SELECT row FROM rows WHERE deleted = 1"):
+                self._deleted[row] = True
+
+            self._centroids = self._assignments = None
+            if self._ivf_path.exists():
+                ivf = np.load(self._ivf_path)
+                self._centroids = ivf["centroids"]
+                self._assignments = ivf["assignments"]
+                # Partitions saved before these were recorded count as built now
+                self._ivf_rows = int(ivf["rows"]) if "rows" in ivf else len(self._assignments)
+                self._ivf_lists = int(ivf["n_lists"]) if "n_lists" in ivf else len(self._centroids)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        """Embed and append texts; ids that already exist are skipped"""
+        if self.read_only:
+            raise RuntimeError("Dense vector store is read-only")
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+
+        with self._lock:
+            existing = set(self.get(ids=ids)["ids"])
+            # Ids are content addresses, so a re-added tombstone keeps its vector
+            revived = self._conn.executemany(
+                "UPDATE rows SET deleted = 0 WHERE id = ? AND deleted = 1",
+                [(id_,) for id_ in ids if id_ not in existing]
+            ).rowcount
+            if revived > 0:
+                self._conn.commit()
+                existing = set(self.get(ids=ids)["ids"])
+            new = [
+                (id_, text, metadata)
+                for id_, text, metadata in zip(ids, texts, metadatas)
+                if id_ not in existing
+            ]
+            if not new:
+                if revived > 0:
+                    self.refresh()
+                return ids
+
+            vectors = self._normalize(np.asarray(
+                self.embedding_function.embed_documents([text for _, text, _ in new]),
+                dtype=np.float32
+            ))
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._conn.execute("INSERT INTO info (key, value) VALUES ('dim', ?)", (str(self._dim),))
+
+            # Write at the committed end so a crash before commit leaves no stray rows
+            mode = "r+b" if self._vectors_path.exists() else "wb"
+            with open(self._vectors_path, mode) as f:
+                f.seek(self._count * self._dim * self.dtype.itemsize)
+                f.write(vectors.astype(self.dtype).tobytes())
+                f.truncate()
+            self._conn.executemany(
+                "INSERT INTO rows (row, id, content, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (self._count + offset, id_, text, json.dumps(metadata))
+                    for offset, (id_, text, metadata) in enumerate(new)
+                ]
+            )
+            self._conn.commit()
+
+            if self._centroids is not None:
+                self._assignments = np.concatenate(
+                    [self._assignments, np.argmax(vectors @ self._centroids.T, axis=1)]
+                )
+                self._save_partitions(self._centroids, self._assignments, self._ivf_rows, self._ivf_lists)
+            self.refresh()
+            if self.partitions_outgrown():
+                self.build_partitions(self._ivf_lists)
+        return ids
+
+    def get(self, ids: Optional[List[str]] = None,
+            include: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        """Chroma-compatible lookup of stored entries"""
+        query = "SELECT id, content, metadata FROM rows WHERE deleted = 0"
+        rows: List[Tuple[str, str, str]] = []
+        with self._lock:
+            if ids is None:
+                rows = self._conn.execute(query).fetchall()
+            else:
+                for start in range(0, len(ids), 500):
+                    batch = ids[start:start + 500]
+                    rows.extend(self._conn.execute(
+                        f"{query} AND id IN ({','.join('?' * len(batch))})", batch
+                    ).fetchall())
+        return {
+            "ids": [row[0] for row in rows],
+            "documents": [row[1] for row in rows],
+            "metadatas": [json.loads(row[2]) for row in rows]
+        }
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Tombstone entries; their rows are skipped by search"""
+        if self.read_only:
+            raise RuntimeError("Dense vector store is read-only")
+        with self._lock:
+            self._conn.executemany("UPDATE rows SET deleted = 1 WHERE id = ?", [(id_,) for id_ in ids or []])
+            self._conn.commit()
+            self.refresh()
+        return True
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        """Exact top-k by cosine similarity with one matrix product"""
+        with self._lock:
+            matrix, deleted = self._matrix, self._deleted
+            centroids, assignments = self._centroids, self._assignments
+        if matrix is None:
+            return []
+
+        vector = self._normalize(np.asarray(
+            self.embedding_function.embed_query(query), dtype=np.float32
+        )[None, :])[0]
+
+        if centroids is not None and len(assignments) == len(matrix):
+            probes = np.argsort(centroids @ vector)[::-1][:self.n_probe]
+            rows = np.flatnonzero(np.isin(assignments, probes) & ~deleted)
+            scores = self._scores(matrix, vector, rows)
+        else:
+            rows = np.arange(len(matrix))
+            scores = self._scores(matrix, vector)
+            scores[deleted] = -np.inf
+
+        k = min(k, len(rows))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return list(zip(self._documents(rows[top].tolist()), scores[top].tolist()))
+
+    def partitions_outgrown(self) -> bool:
+        """Whether rows added since the IVF partitions were built call for a rebuild"""
+        with self._lock:
+            return (self._centroids is not None and self.ivf_growth > 0
+                    and self._count >= self._ivf_rows * (1 + self.ivf_growth))
+
+    def build_partitions(self, n_lists: int, iterations: int = 10, seed: int = 0) -> None:
+        """Cluster the stored vectors with k-means for IVF search.
+
+        Centroids are trained on a sample of the rows; every row is then
+        assigned one block at a time.
+        """
+        with self._lock:
+            matrix = self._matrix
+            if matrix is None or self.read_only:
+                return
+            rng = np.random.default_rng(seed)
+            sample = min(len(matrix), n_lists * self.TRAIN_ROWS_PER_LIST)
+            data = np.asarray(
+                matrix[np.sort(rng.choice(len(matrix), size=sample, replace=False))],
+                dtype=np.float32
+            )
+            centroids = data[rng.choice(len(data), size=min(n_lists, len(data)), replace=False)]
+            for _ in range(iterations):
+                assignments = np.argmax(data @ centroids.T, axis=1)
+                for cluster in range(len(centroids)):
+                    members = data[assignments == cluster]
+                    if len(members):
+                        centroids[cluster] = members.mean(axis=0)
+                centroids = self._normalize(centroids)
+            assignments = np.concatenate([
+                np.argmax(self._block(matrix, start) @ centroids.T, axis=1)
+                for start in range(0, len(matrix), self.BLOCK_ROWS)
+            ])
+            self._save_partitions(centroids, assignments, len(matrix), n_lists)
+            self.refresh()
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings,
+                   metadatas: Optional[List[dict]] = None, **kwargs: Any) -> "DenseVectorStore":
+        store = cls(kwargs.pop("directory"), embedding, **kwargs)
+        store.add_texts(texts, metadatas)
+        return store
+
+    def _documents(self, rows: List[int]) -> List[Document]:
+        with self._lock:
+            found = {
+                row: Document(page_content=content, metadata=json.loads(metadata))
+                for row, content, metadata in self._conn.execute(
+                    f"SELECT row, content, metadata FROM rows WHERE row IN ({','.join('?' * len(rows))})",
+                    rows
+                )
+            }
+        return [found[row] for row in rows]
+
+    def _save_partitions(self, centroids: np.ndarray, assignments: np.ndarray,
+                         rows: int, n_lists: int) -> None:
+        np.savez(self._ivf_path, centroids=centroids, assignments=assignments, rows=rows, n_lists=n_lists)
+
+    def _scores(self, matrix: np.ndarray, vector: np.ndarray,
+                rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Scores of all rows, or of ``rows``, without copying the matrix to float32 at once"""
+        count = len(matrix) if rows is None else len(rows)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, self.BLOCK_ROWS):
+            end = min(start + self.BLOCK_ROWS, count)
+            block = matrix[start:end] if rows is None else matrix[rows[start:end]]
+            scores[start:end] = block.astype(np.float32, copy=False) @ vector
+        return scores
+
+    def _block(self, matrix: np.ndarray, start: int) -> np.ndarray:
+        return np.asarray(matrix[start:start + self.BLOCK_ROWS], dtype=np.float32)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
@@ -0,0 +1,125 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from .concurrency import normalize_question
+
+def chunk_id(text: str, model: str) -> str:
+    """Content address of a chunk for a given embedding model"""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper backed by a persistent sqlite cache of float32 vectors.
+
+    Query embeddings are kept in a bounded in-memory LRU keyed on the
+    normalized question, so repeated questions skip the embedding call.
+    """
+
+    def __init__(self, embeddings: Embeddings, path: Path, model: str,
+                 query_cache_size: int = 256, read_only: bool = False):
+        self.embeddings = embeddings
+        self.path = path
+        self.model = model
+        self.query_cache_size = query_cache_size
+        self.read_only = read_only
+        self.hits = 0
+        self.misses = 0
+        self.query_hits = 0
+        self.query_misses = 0
+        self._queries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if read_only:
+            # Snapshot readers never write; new vectors are used but not cached
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, only calling the backend for unseen texts"""
+        keys = [chunk_id(text, self.model) for text in texts]
+        cached = self._get_many(keys)
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new = dict(zip(missing.keys(), (np.asarray(v, dtype=np.float32) for v in vectors)))
+            self._put_many(new)
+            cached.update(new)
+
+        return [cached[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query; queries are cached in memory only"""
+        key = normalize_question(text)
+        with self._lock:
+            vector = self._queries.get(key)
+            if vector is not None:
+                self._queries.move_to_end(key)
+                self.query_hits += 1
+                return list(vector)
+            self.query_misses += 1
+
+        vector = self.embeddings.embed_query(text)
+        if self.query_cache_size:
+            with self._lock:
+                self._queries[key] = list(vector)
+                while len(self._queries) > self.query_cache_size:
+                    self._queries.popitem(last=False)
+        return vector
+
+    def cached_documents(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """Embeddings of documents if all are cached, else None; never calls the backend"""
+        keys = [chunk_id(text, self.model) for text in texts]
+        cached = self._get_many(keys)
+        if len(cached) < len(set(keys)):
+            return None
+        return [cached[key].tolist() for key in keys]
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache hit and miss counts"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "query_hits": self.query_hits,
+            "query_misses": self.query_misses
+        }
+
+    def _get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        result = {}
+        with self._lock:
+            # Stay under sqlite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    result[key] = np.frombuffer(blob, dtype=np.float32)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        if self.read_only:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in vectors.items()]
+            )
+            self._conn.commit()
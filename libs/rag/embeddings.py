@@ -0,0 +1,107 @@
+import hashlib
+import re
+import zlib
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+class HashingEmbeddings(Embeddings):
+    """Local CPU embeddings from signed feature hashing of unigrams and bigrams.
+
+    Term counts are dampened with log(1 + tf) and rows are L2-normalized, so
+    the dot product behaves like a TF-IDF cosine without a fitted vocabulary.
+    Tokenizing and hashing are pure Python, so batches run one after another
+    rather than on threads that would only contend for the GIL.
+    """
+
+    def __init__(self, dim: int = 512, batch_size: int = 64):
+        self.dim = dim
+        self.batch_size = batch_size
+        self.model = f"hashing-{dim}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        matrices = [
+            self._embed_batch(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        if not matrices:
+            return []
+        return np.vstack(matrices).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        rows, hashes = [], []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            hashes.append(np.fromiter(
+                (zlib.crc32(feature.encode("utf-8")) for feature in features),
+                dtype=np.uint32, count=len(features)
+            ))
+            rows.append(np.full(len(features), row, dtype=np.int64))
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if hashes:
+            hashed = np.concatenate(hashes)
+            columns = (hashed % self.dim).astype(np.int64)
+            signs = np.where(hashed >> 31, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix, (np.concatenate(rows), columns), signs)
+
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """Local CPU embeddings from a small sentence-transformers model"""
+
+    def __init__(self, model: str = "all-MiniLM-L6-v2", batch_size: int = 64, threads: int = 4):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        torch.set_num_threads(threads)
+        self.model = model
+        self.batch_size = batch_size
+        self.encoder = SentenceTransformer(model, device="cpu")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.encoder.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+
+def create_embeddings(backend: str = "openai", model: Optional[str] = None, dim: int = 512,
+                      batch_size: int = 64, threads: int = 4) -> Embeddings:
+    """Create the embedding backend selected in settings"""
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=model) if model else OpenAIEmbeddings()
+    if backend == "hashing":
+        return HashingEmbeddings(dim=dim, batch_size=batch_size)
+    if backend == "sentence-transformers":
+        return SentenceTransformerEmbeddings(
+            model=model or "all-MiniLM-L6-v2", batch_size=batch_size, threads=threads
+        )
+    raise ValueError(f"Unsupported embedding backend: {backend}")
+
+def collection_name(backend: str, model: str) -> str:
+    """Chroma collection for a backend; vectors of different models must not mix"""
+    if backend == "openai" and model == "text-embedding-ada-002":
+        # Default collection used before backends were selectable
+        return "langchain"
+    return f"langchain_{backend}_{hashlib.sha1(model.encode('utf-8')).hexdigest()[:8]}"
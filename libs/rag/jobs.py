@@ -0,0 +1,117 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from libs.telemetry import default_tracer
+
+class JobCancelled(Exception):
+    """Raised inside an ingestion job when it has been cancelled"""
+
+@dataclass
+class IngestionJob:
+    """Status of a single document ingestion"""
+
+    id: int
+    source: str
+    source_type: str
+    status: str = "queued"
+    stages: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+    def __post_init__(self):
+        self._cancel = threading.Event()
+
+    @property
+    def stage(self) -> str:
+        """Most recent pipeline stage reached"""
+        return self.stages[-1] if self.stages else ""
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation was requested"""
+        return self._cancel.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def cancel(self) -> None:
+        """Request cancellation at the next stage boundary"""
+        self._cancel.set()
+
+    def progress(self, stage: str) -> None:
+        """Record a stage; raises JobCancelled if cancellation was requested"""
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+        self.stages.append(stage)
+
+class IngestionJobQueue:
+    """Runs document ingestion on a bounded worker pool.
+
+    ``ingest`` raises on failure; its error message is kept on the job.
+    """
+
+    def __init__(self, ingest: Callable[..., None], max_workers: int = 2, history: int = 50):
+        self.ingest = ingest
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs: Dict[int, IngestionJob] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, source: str, source_type: str) -> IngestionJob:
+        """Queue a document for ingestion"""
+        job = IngestionJob(id=next(self._ids), source=source, source_type=source_type)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job"""
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel()
+        return True
+
+    def jobs(self) -> List[IngestionJob]:
+        """All tracked jobs, newest first"""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.id, reverse=True)
+
+    def shutdown(self) -> None:
+        for job in self.jobs():
+            job.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _run(self, job: IngestionJob) -> None:
+        if job.cancelled:
+            job.status = "cancelled"
+            job.finished = time.time()
+            return
+
+        job.status = "running"
+        start = time.perf_counter()
+        try:
+            self.ingest(job.source, job.source_type, on_progress=job.progress)
+            job.status = "cancelled" if job.cancelled else "succeeded"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+            default_tracer.observe("ingest.job", time.perf_counter() - start)
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond the history limit"""
+        finished = sorted((job for job in self._jobs.values() if job.done), key=lambda job: job.id)
+        for job in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job.id]
@@ -1,33 +1,72 @@
-from typing import List, Optional
+from typing import Callable, Iterator, List, Optional
 from pathlib import Path
 import os
 from langchain.docstore.document import Document
 from langchain_community.document_loaders import (
     PyPDFLoader,
-    YoutubeAudioLoader,
-    WebBaseLoader
+    YoutubeAudioLoader
 )
-from langchain_community.document_loaders.generic import GenericLoader
 from langchain.document_loaders.parsers import OpenAIWhisperParser
+from langchain_core.document_loaders import Blob
+from libs.telemetry import span
+from .transcription import LocalTranscriber, TranscriptCache, file_hash, youtube_video_id
 
 class RAGLoader:
     """Handles loading documents from various sources"""
     
-    def __init__(self, temp_dir: Path):
+    def __init__(self, temp_dir: Path, transcriber: str = "openai",
+                 whisper_model: str = "base", transcription_workers: int = 2,
+                 segment_seconds: float = 120.0,
+                 transcript_dir: Optional[Path] = None):
         self.temp_dir = temp_dir
         os.makedirs(temp_dir, exist_ok=True)
+        if transcriber not in ("openai", "local"):
+            raise ValueError(f"Unsupported transcriber: {transcriber}")
+        self.local_transcriber = LocalTranscriber(
+            whisper_model, workers=transcription_workers, segment_seconds=segment_seconds
+        ) if transcriber == "local" else None
+        self.transcripts = TranscriptCache(transcript_dir) if transcript_dir else None
+        
+    def shutdown(self) -> None:
+        """Stop any transcription worker processes"""
+        if self.local_transcriber:
+            self.local_transcriber.shutdown()
         
     def load_pdf(self, file_path: str) -> List[Document]:
         """Load PDF document"""
+        with span("ingest.load_pdf"):
+            loader = PyPDFLoader(file_path)
+            return loader.load()
+        
+    def iter_pdf(self, file_path: str) -> Iterator[Document]:
+        """Lazily load a PDF one page at a time"""
         loader = PyPDFLoader(file_path)
-        return loader.load()
+        return loader.lazy_load()
         
-    def load_youtube(self, url: str) -> List[Document]:
+    def load_youtube(self, url: str,
+                     on_progress: Optional[Callable[[str], None]] = None) -> List[Document]:
         """Load YouTube content"""
-        audio_loader = YoutubeAudioLoader([url], str(self.temp_dir))
-        whisper_parser = OpenAIWhisperParser()
-        loader = GenericLoader(audio_loader, whisper_parser)
-        documents = loader.load()
+        # A video that was transcribed before is neither downloaded nor transcribed again
+        key = f"youtube:{youtube_video_id(url) or url}"
+        documents = self._cached_transcript(key)
+        if documents is not None:
+            if on_progress:
+                on_progress("transcript cached")
+        else:
+            audio_loader = YoutubeAudioLoader([url], str(self.temp_dir))
+            
+            # Download and transcription are separate so progress can be reported
+            with span("ingest.download"):
+                blobs = list(audio_loader.yield_blobs())
+            if on_progress:
+                on_progress("downloaded")
+            documents = []
+            for blob in blobs:
+                documents.extend(self._transcribe(blob))
+            if on_progress:
+                on_progress("transcribed")
+            if self.transcripts:
+                self.transcripts.put(key, documents)
         
         for doc in documents:
             doc.metadata["source"] = url
@@ -35,13 +74,30 @@ class RAGLoader:
             
         return documents
         
-    def load_webpage(self, url: str) -> List[Document]:
-        """Load webpage content"""
-        loader = WebBaseLoader(url)
-        documents = loader.load()
-        
+    def load_audio(self, file_path: str,
+                   on_progress: Optional[Callable[[str], None]] = None) -> List[Document]:
+        """Load a local audio file by transcribing it"""
+        key = f"audio:{file_hash(file_path)}"
+        documents = self._cached_transcript(key)
+        if documents is None:
+            documents = self._transcribe(Blob.from_path(file_path))
+            if self.transcripts:
+                self.transcripts.put(key, documents)
+        if on_progress:
+            on_progress("transcribed")
+            
         for doc in documents:
-            doc.metadata["source"] = url
-            doc.metadata["source_type"] = "Web"
+            doc.metadata["source"] = file_path
+            doc.metadata["source_type"] = "Audio"
             
-        return documents 
\ No newline at end of file
+        return documents
+        
+    def _cached_transcript(self, key: str) -> Optional[List[Document]]:
+        return self.transcripts.get(key) if self.transcripts else None
+        
+    def _transcribe(self, blob: Blob) -> List[Document]:
+        """Transcribe audio locally or with the OpenAI Whisper API"""
+        with span("ingest.transcribe"):
+            if self.local_transcriber:
+                return self.local_transcriber.transcribe(str(blob.path))
+            return list(OpenAIWhisperParser().lazy_parse(blob))
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from langchain.memory import ConversationBufferMemory
+from langchain.memory.prompt import SUMMARY_PROMPT
+from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from libs.telemetry import span
+from .tokens import token_encoder
+
+def create_buffer_memory() -> ConversationBufferMemory:
+    """Create the default per-session conversation memory"""
+    return ConversationBufferMemory(
+        memory_key="chat_history",
+        input_key="question",
+        output_key="answer",
+        return_messages=True
+    )
+
+class SummaryBufferMemory:
+    """Conversation memory of recent turns within a token budget plus a rolling summary.
+
+    Turns that no longer fit in ``max_tokens`` leave the window and are
+    folded into the summary by a background task on ``executor``, so no
+    request waits for summarization. Until that task finishes, the turns
+    being summarized are in neither the window nor the summary; the prompt
+    stays bounded at the cost of briefly forgetting them. While summaries
+    fail, at most ``max_pending_tokens`` of turns wait, the oldest being
+    dropped. Summaries take an "llm" slot from ``limiter`` when given.
+
+    Exposes the parts of ``ConversationBufferMemory`` the chain and service
+    use: ``chat_memory``, ``load_memory_variables`` and ``save_context``.
+    """
+
+    def __init__(self, llm: Any, executor: Executor, max_tokens: int = 1000,
+                 max_summary_tokens: int = 256, encoding: str = "cl100k_base",
+                 max_pending_tokens: Optional[int] = None, limiter: Any = None):
+        self.llm = llm
+        self.executor = executor
+        self.max_tokens = max_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self.max_pending_tokens = max_pending_tokens or 4 * max_tokens
+        self.limiter = limiter
+        self.encoding = token_encoder(encoding)
+        self.chat_memory = ChatMessageHistory()
+        self.summary = ""
+        self._pending: List[BaseMessage] = []
+        self._summarizing = False
+        # Bumped by clear() so an in-flight summary of forgotten turns is discarded
+        self._generation = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, List[BaseMessage]]:
+        """The summary (if any) followed by the recent turns"""
+        with self._lock:
+            messages = list(self.chat_memory.messages)
+            if self.summary:
+                messages.insert(0, SystemMessage(content=f"Summary of earlier conversation: {self.summary}"))
+        return {"chat_history": messages}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        """Add a turn, moving the oldest turns out of the window if it is over budget"""
+        with self._lock:
+            self.chat_memory.add_messages([
+                HumanMessage(content=inputs["question"]),
+                AIMessage(content=outputs["answer"])
+            ])
+            messages = self.chat_memory.messages
+            # Always keep the latest turn, even if it alone exceeds the budget
+            while len(messages) > 2 and self._count(messages) > self.max_tokens:
+                self._pending.extend(messages[:2])
+                del messages[:2]
+            while len(self._pending) > 2 and self._count(self._pending) > self.max_pending_tokens:
+                del self._pending[:2]
+                self.dropped += 1
+            start = bool(self._pending) and not self._summarizing
+            self._summarizing = self._summarizing or start
+        if start:
+            self.executor.submit(self._summarize)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.chat_memory.clear()
+            self.summary = ""
+            self._pending.clear()
+            self._generation += 1
+
+    def _summarize(self) -> None:
+        """Fold pending turns into the summary until none are left"""
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+                summary = self.summary
+                generation = self._generation
+                if not pending:
+                    self._summarizing = False
+                    return
+            try:
+                slot = self.limiter.slot("llm") if self.limiter else nullcontext()
+                with slot, span("rag.summarize_memory"):
+                    new_summary = self.llm.invoke(SUMMARY_PROMPT.format(
+                        summary=summary,
+                        new_lines="\n".join(f"{m.type}: {m.content}" for m in pending)
+                    )).content.strip()
+                tokens = self.encoding.encode(new_summary)
+                if len(tokens) > self.max_summary_tokens:
+                    new_summary = self.encoding.decode(tokens[:self.max_summary_tokens])
+            except Exception as e:
+                print(f"Memory summary error: {e}")
+                with self._lock:
+                    self._summarizing = False
+                return
+            with self._lock:
+                if generation != self._generation:
+                    continue
+                self.summary = new_summary
+                # Turns may have been dropped or queued meanwhile, so remove exactly the summarized ones
+                summarized = {id(message) for message in pending}
+                self._pending[:] = [message for message in self._pending if id(message) not in summarized]
+
+    def _count(self, messages: List[BaseMessage]) -> int:
+        return sum(len(self.encoding.encode(message.content)) + 4 for message in messages)
+
+class SessionMemoryPool:
+    """Bounded pool of conversation memories keyed by session"""
+
+    def __init__(self, max_sessions: int = 100, idle_timeout: float = 1800.0,
+                 memory_factory: Callable[[], Any] = create_buffer_memory):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.memory_factory = memory_factory
+        self._sessions: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Any:
+        """Get the memory for a session, creating it if needed"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            if session_id in self._sessions:
+                memory, _ = self._sessions.pop(session_id)
+            else:
+                memory = self.memory_factory()
+            self._sessions[session_id] = (memory, now)
+
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return memory
+
+    def reset(self, session_id: str) -> None:
+        """Forget the history of a session"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict_idle(self, now: float) -> None:
+        """Drop sessions that have been idle too long"""
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used < self.idle_timeout:
+                break
+            del self._sessions[session_id]
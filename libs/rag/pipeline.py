@@ -0,0 +1,62 @@
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List
+from langchain.docstore.document import Document
+
+def batch_splits(documents: Iterable[Document],
+                 split: Callable[[List[Document]], List[Document]],
+                 batch_size: int) -> Iterator[tuple]:
+    """Split documents lazily, yielding ``(documents_consumed, chunks)`` batches.
+    
+    Each batch holds at least ``batch_size`` chunks (except the last) and
+    only whole input documents, so a batch boundary is always a safe point
+    to resume from.
+    """
+    consumed = 0
+    chunks: List[Document] = []
+    for document in documents:
+        chunks.extend(split([document]))
+        consumed += 1
+        if len(chunks) >= batch_size:
+            yield consumed, chunks
+            consumed, chunks = 0, []
+    if consumed:
+        yield consumed, chunks
+
+class IngestCheckpoint:
+    """Persists how many input documents of each source have been committed"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offsets: Dict[str, int] = {}
+        try:
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._offsets = json.load(f)
+        except Exception as e:
+            print(f"Checkpoint load error: {e}")
+
+    def get(self, source: str) -> int:
+        return self._offsets.get(source, 0)
+
+    def set(self, source: str, offset: int) -> None:
+        with self._lock:
+            self._offsets[source] = offset
+            self._save()
+
+    def clear(self, source: str) -> None:
+        with self._lock:
+            if self._offsets.pop(source, None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        if not self._offsets:
+            # Nothing left to resume
+            self.path.unlink(missing_ok=True)
+            return
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._offsets, f)
+        tmp_path.replace(self.path)
@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+class ChunkReferences:
+    """Which sources reference each stored chunk.
+
+    Chunks are content-addressed, so identical text from a PDF and a web
+    page is stored once. A chunk may only be deleted when no source
+    references it any more, and retrieval reports every source of a chunk.
+    """
+
+    def __init__(self, path: Path, read_only: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS refs ("
+            "chunk_id TEXT NOT NULL, source TEXT NOT NULL, "
+            "PRIMARY KEY (chunk_id, source)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    @property
+    def backfilled(self) -> bool:
+        """Whether references of chunks stored before this table existed were recorded"""
+        with self._lock:
+            return self._conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+
+    def mark_backfilled(self) -> None:
+        with self._lock:
+            self._conn.execute("PRAGMA user_version = 1")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add(self, source: str, ids: Iterable[str]) -> None:
+        """Record that ``source`` references chunks"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO refs (chunk_id, source) VALUES (?, ?)",
+                [(chunk_id, source) for chunk_id in ids]
+            )
+            self._conn.commit()
+
+    def release(self, source: str, ids: Iterable[str]) -> List[str]:
+        """Drop ``source``'s references, returning the chunks nothing references any more"""
+        ids = list(dict.fromkeys(ids))
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM refs WHERE chunk_id = ? AND source = ?",
+                [(chunk_id, source) for chunk_id in ids]
+            )
+            self._conn.commit()
+            return [
+                chunk_id for chunk_id in ids
+                if self._conn.execute(
+                    "SELECT 1 FROM refs WHERE chunk_id = ? LIMIT 1", (chunk_id,)
+                ).fetchone() is None
+            ]
+
+    def sources(self, ids: List[str]) -> Dict[str, List[str]]:
+        """Sources referencing each of the given chunks"""
+        result: Dict[str, List[str]] = {}
+        with self._lock:
+            # Stay under sqlite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT chunk_id, source FROM refs WHERE chunk_id IN ({','.join('?' * len(batch))}) "
+                    "ORDER BY source", batch
+                ).fetchall()
+                for chunk_id, source in rows:
+                    result.setdefault(chunk_id, []).append(source)
+        return result
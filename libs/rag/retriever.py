@@ -0,0 +1,60 @@
+from typing import Any, Dict, List
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from .embedding_cache import chunk_id
+
+class HybridRetriever(BaseRetriever):
+    """Merges BM25 and vector search results with reciprocal rank fusion"""
+
+    vectorstore: Any
+    index: Any
+    model: str
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        dense = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        sparse = self.index.search(query, k=self.fetch_k)
+
+        documents: Dict[str, Document] = {}
+        scores: Dict[str, float] = {}
+        for rank, document in enumerate(dense):
+            key = chunk_id(document.page_content, self.model)
+            documents.setdefault(key, document)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        for rank, (key, _) in enumerate(sparse):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[:self.k]
+        missing = [key for key in ranked if key not in documents]
+        documents.update(self.index.get_documents(missing))
+        return [documents[key] for key in ranked if key in documents]
+
+class SourceAnnotatingRetriever(BaseRetriever):
+    """Lists every source containing a retrieved chunk's text as ``sources`` metadata.
+
+    Identical text is stored once, with the metadata of the first source
+    that contained it; later sources are only recorded as references.
+    """
+
+    retriever: Any
+    references: Any
+    model: str
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = self.retriever.invoke(query)
+        keys = [chunk_id(document.page_content, self.model) for document in documents]
+        sources = self.references.sources(keys)
+        return [
+            Document(
+                page_content=document.page_content,
+                metadata={**document.metadata, "sources": sources.get(key) or [document.metadata.get("source", "")]}
+            )
+            for key, document in zip(keys, documents)
+        ]
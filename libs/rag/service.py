@@ -1,25 +1,163 @@
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from queue import Queue
+from typing import Callable, Dict, Any, Iterator, List, Optional
 from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
 from .loader import RAGLoader
 from .vectorstore import RAGVectorStore
 from .chain import RAGChain
+from .cache import AnswerCache
+from .memory import SessionMemoryPool, SummaryBufferMemory, create_buffer_memory
+from .jobs import IngestionJobQueue
+from .web_registry import WebSourceRegistry
+from .context import ContextAssembler, ContextAssemblingRetriever
+from .speculative import SpeculativeRetriever
+from .snapshot import checkout
+from .transcription import file_hash
+from .embeddings import create_embeddings
+from .concurrency import ConcurrencyLimiter, RequestCoalescer, normalize_question
+from libs.telemetry import span
 
 class RAGService:
     """Main service for RAG functionality"""
     
-    def __init__(self, source_dir: Path, temp_dir: Path, chroma_dir: Path):
+    # Seconds a replaced snapshot store stays open for requests still using it
+    RETIRE_AFTER = 60.0
+    
+    def __init__(self, source_dir: Path, temp_dir: Path, chroma_dir: Path,
+                 answer_cache_threshold: float = 0.95,
+                 answer_cache_size: int = 256,
+                 answer_cache_ttl: float = 86400.0,
+                 max_sessions: int = 100,
+                 session_idle_timeout: float = 1800.0,
+                 ingestion_workers: int = 2,
+                 ingest_batch_size: int = 64,
+                 embedding_backend: str = "openai",
+                 embedding_model: Optional[str] = None,
+                 embedding_dim: int = 512,
+                 embedding_batch_size: int = 64,
+                 embedding_threads: int = 4,
+                 retriever_mode: str = "hybrid",
+                 retriever_k: int = 4,
+                 retriever_fetch_k: int = 20,
+                 vector_backend: str = "chroma",
+                 dense_dtype: str = "float32",
+                 dense_ivf_lists: int = 0,
+                 dense_n_probe: int = 8,
+                 max_concurrent_llm: int = 4,
+                 max_concurrent_embeddings: int = 8,
+                 web_crawl_workers: int = 4,
+                 web_fetch_timeout: float = 30.0,
+                 transcriber: str = "openai",
+                 transcriber_model: str = "base",
+                 transcription_workers: int = 2,
+                 transcription_segment_seconds: float = 120.0,
+                 transcript_dir: Optional[Path] = None,
+                 context_max_tokens: int = 1500,
+                 context_max_chunks: int = 6,
+                 context_candidates: int = 12,
+                 mmr_lambda: float = 0.7,
+                 memory_max_tokens: int = 1000,
+                 memory_summary_tokens: int = 256,
+                 query_cache_size: int = 256,
+                 speculative_retrieval: bool = False,
+                 speculative_match: float = 0.85,
+                 read_only: bool = False,
+                 llm_model: str = "gpt-3.5-turbo",
+                 llm_base_url: Optional[str] = None,
+                 llm: Optional[BaseChatModel] = None,
+                 embeddings: Optional[Embeddings] = None):
         self.source_dir = source_dir
         self.temp_dir = temp_dir
-        self.chroma_dir = chroma_dir
+        self.read_only = read_only
+        self.vector_backend = vector_backend
+        self._checkouts = temp_dir / "snapshot_checkouts"
         
         # Create directories
         for dir_path in [source_dir, temp_dir, chroma_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
+        self.chroma_dir = chroma_dir = self._snapshot_directory(chroma_dir)
             
-        self.loader = RAGLoader(temp_dir)
-        self.vectorstore = RAGVectorStore(chroma_dir)
-        self.chain = RAGChain()
+        self.loader = RAGLoader(
+            temp_dir,
+            transcriber=transcriber,
+            whisper_model=transcriber_model,
+            transcription_workers=transcription_workers,
+            segment_seconds=transcription_segment_seconds,
+            transcript_dir=transcript_dir
+        )
+        self.limiter = ConcurrencyLimiter({
+            "llm": max_concurrent_llm,
+            "embedding": max_concurrent_embeddings
+        })
+        self.vectorstore = RAGVectorStore(
+            chroma_dir,
+            batch_size=ingest_batch_size,
+            embedding_backend=embedding_backend,
+            embeddings=embeddings or create_embeddings(
+                embedding_backend,
+                model=embedding_model,
+                dim=embedding_dim,
+                batch_size=embedding_batch_size,
+                threads=embedding_threads
+            ),
+            retriever_mode=retriever_mode,
+            retriever_k=retriever_k,
+            retriever_fetch_k=retriever_fetch_k,
+            vector_backend=vector_backend,
+            dense_dtype=dense_dtype,
+            dense_ivf_lists=dense_ivf_lists,
+            dense_n_probe=dense_n_probe,
+            query_cache_size=query_cache_size,
+            limiter=self.limiter,
+            read_only=read_only
+        )
+        self.context_max_tokens = context_max_tokens
+        self.context_max_chunks = context_max_chunks
+        self.context_candidates = context_candidates
+        self.mmr_lambda = mmr_lambda
+        self.speculative_match = speculative_match
+        self.speculative = None
+        self._speculation_executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="rag-speculate"
+        ) if speculative_retrieval else None
+        self.chain = RAGChain(model_name=llm_model, llm=llm, base_url=llm_base_url)
+        self.chain.create_conversational_chain(self._create_retriever())
+        self._summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-summary")
+        self.memory_pool = SessionMemoryPool(
+            max_sessions=max_sessions,
+            idle_timeout=session_idle_timeout,
+            memory_factory=partial(
+                SummaryBufferMemory,
+                self.chain.llm,
+                self._summary_executor,
+                max_tokens=memory_max_tokens,
+                max_summary_tokens=memory_summary_tokens,
+                limiter=self.limiter
+            ) if memory_max_tokens else create_buffer_memory
+        )
+        self.jobs = IngestionJobQueue(self.ingest, max_workers=ingestion_workers)
+        # Read-only workers share a snapshot, so each keeps its answer cache in memory
+        self.answer_cache = AnswerCache(
+            None if read_only else chroma_dir / "answer_cache.sqlite",
+            threshold=answer_cache_threshold,
+            max_entries=answer_cache_size,
+            ttl=answer_cache_ttl
+        )
+        self.web_sources = None if read_only else WebSourceRegistry(
+            chroma_dir / "web_sources.sqlite",
+            self.vectorstore,
+            max_workers=web_crawl_workers,
+            timeout=web_fetch_timeout,
+            on_change=self.answer_cache.clear
+        )
+        self.coalescer = RequestCoalescer()
         
     def initialize(self) -> bool:
         """Initialize the service"""
@@ -30,32 +168,295 @@ class RAGService:
             print(f"Initialization error: {e}")
             return False
             
-    def add_document(self, source: str, source_type: str) -> bool:
-        """Add a document to the system"""
-        try:
-            if source_type == "pdf":
-                docs = self.loader.load_pdf(source)
-            elif source_type == "youtube":
-                docs = self.loader.load_youtube(source)
-            elif source_type == "web":
-                docs = self.loader.load_webpage(source)
-            else:
-                raise ValueError(f"Unsupported source type: {source_type}")
+    def shutdown(self) -> None:
+        """Stop background jobs, worker threads and transcription processes"""
+        self.jobs.shutdown()
+        self.loader.shutdown()
+        for executor in (self._summary_executor, self._speculation_executor):
+            if executor:
+                executor.shutdown(wait=False)
+        self.answer_cache.close()
+        if self.read_only:
+            self._retire(self.vectorstore)
                 
-            self.vectorstore.add_documents(docs)
+    def load_snapshot(self, path: Path) -> bool:
+        """Serve from another index snapshot without interrupting requests.
+        
+        The new store is opened and initialized first; in-flight requests
+        finish on the retriever they already hold.
+        """
+        try:
+            directory = self._snapshot_directory(path)
+            vectorstore = self.vectorstore.reopen(directory, read_only=True)
+            if not vectorstore.initialize():
+                self._retire(vectorstore)
+                return False
+            retired = self.vectorstore
+            self.vectorstore = vectorstore
+            self.chroma_dir = directory
+            self.chain.chain.retriever = self._create_retriever()
+            self.answer_cache.clear()
+            
+            timer = threading.Timer(self.RETIRE_AFTER, self._retire, args=(retired,))
+            timer.daemon = True
+            timer.start()
+            return True
+        except Exception as e:
+            print(f"Snapshot load error: {e}")
+            return False
+            
+    def _snapshot_directory(self, path: Path) -> Path:
+        """Where to open a snapshot: in place, or a private copy for Chroma.
+        
+        Dense and SQLite files are opened read-only and can be shared by
+        worker processes; Chroma's files cannot, so each reader gets a copy.
+        """
+        if self.read_only and self.vector_backend == "chroma":
+            return checkout(path, self._checkouts)
+        return path
+        
+    def _retire(self, vectorstore: RAGVectorStore) -> None:
+        """Close a replaced store and delete its private copy, if any"""
+        vectorstore.close()
+        if vectorstore.persist_directory.parent == self._checkouts:
+            shutil.rmtree(vectorstore.persist_directory, ignore_errors=True)
+            
+    def _create_retriever(self):
+        """Retriever for the chain, optionally reusing speculative retrievals"""
+        retriever = self._create_context_retriever()
+        if self._speculation_executor:
+            # Rebuilt with the retriever, so drafts never outlive a snapshot swap
+            self.speculative = SpeculativeRetriever(
+                retriever=retriever,
+                executor=self._speculation_executor,
+                embed=self._embed_query,
+                min_ratio=self.speculative_match
+            )
+            return self.speculative
+        return retriever
+        
+    def _create_context_retriever(self):
+        """Retriever over the vector store, assembling a token-budgeted context"""
+        if not self.context_max_tokens:
+            return self.vectorstore.as_retriever()
+        search_kwargs = {"k": self.context_candidates}
+        if self.vectorstore.retriever_mode == "hybrid":
+            search_kwargs["fetch_k"] = max(self.vectorstore.retriever_fetch_k, self.context_candidates)
+        candidates = self.vectorstore.as_retriever(search_kwargs=search_kwargs)
+        return ContextAssemblingRetriever(
+            retriever=candidates,
+            assembler=ContextAssembler(
+                self.vectorstore.embeddings,
+                max_tokens=self.context_max_tokens,
+                max_chunks=self.context_max_chunks,
+                mmr_lambda=self.mmr_lambda
+            )
+        )
+        
+    def add_document(self, source: str, source_type: str,
+                     on_progress: Optional[Callable[[str], None]] = None) -> bool:
+        """Add a document to the system, returning whether it succeeded"""
+        try:
+            self.ingest(source, source_type, on_progress)
             return True
         except Exception as e:
             print(f"Error adding document: {e}")
             return False
             
-    def get_answer(self, question: str) -> Dict[str, Any]:
-        """Get answer for a question"""
+    def ingest(self, source: str, source_type: str,
+               on_progress: Optional[Callable[[str], None]] = None) -> None:
+        """Add a document to the system, raising if it fails.
+        
+        ``on_progress`` is called with the name of each pipeline stage as it
+        completes; raising from it aborts the ingestion.
+        """
+        if self.read_only:
+            raise RuntimeError("Ingestion is disabled on read-only workers")
+        if source_type in ("web", "sitemap"):
+            return self._add_web(source, source_type, on_progress)
+        if source_type == "pdf":
+            docs = self.loader.iter_pdf(source)
+        elif source_type == "youtube":
+            docs = self.loader.load_youtube(source, on_progress=on_progress)
+        elif source_type == "audio":
+            docs = self.loader.load_audio(source, on_progress=on_progress)
+        else:
+            raise ValueError(f"Unsupported source type: {source_type}")
+        if on_progress and source_type == "pdf":
+            on_progress("downloaded")
+            
         try:
-            chain = self.chain.create_conversational_chain(self.vectorstore.as_retriever())
-            return chain({"question": question})
+            self.vectorstore.write_documents(
+                docs, on_progress=on_progress, source=self._checkpoint_key(source, source_type)
+            )
+        finally:
+            # Even a partial ingestion changes the corpus, so cached answers may be stale
+            self.answer_cache.clear()
+            
+    def _add_web(self, source: str, source_type: str,
+                 on_progress: Optional[Callable[[str], None]] = None) -> None:
+        """Index web pages incrementally; unchanged pages are not re-embedded"""
+        urls = [source] if source_type == "web" else self.web_sources.sitemap_urls(source)
+        if on_progress:
+            on_progress(f"found {len(urls)} pages")
+        results = []
+        
+        def report(result):
+            results.append(result)
+            if on_progress:
+                on_progress(f"{len(results)}/{len(urls)} pages ({result.status})")
+                
+        self.web_sources.crawl(urls, on_result=report)
+        failed = [result for result in results if result.status == "failed"]
+        if failed:
+            raise RuntimeError(f"{len(failed)} of {len(urls)} pages failed, e.g. {failed[0].url}: {failed[0].error}")
+        
+    def refresh_web_sources(self) -> Dict[str, int]:
+        """Re-check every registered web page, counting outcomes by status"""
+        counts: Dict[str, int] = {}
+        if self.web_sources is None:
+            return counts
+        for result in self.web_sources.refresh_all():
+            counts[result.status] = counts.get(result.status, 0) + 1
+        return counts
+        
+    @staticmethod
+    def _checkpoint_key(source: str, source_type: str) -> str:
+        """Key for resuming an ingestion; files are keyed on their contents.
+        
+        A re-upload of the same file resumes, whatever its path or mtime,
+        while a changed file starts over.
+        """
+        if source_type in ("pdf", "audio"):
+            return f"{source_type}:{file_hash(source)}"
+        return source
+        
+    def prefetch(self, question: str, session_id: str = "default") -> None:
+        """Start retrieval and embedding for a draft of an upcoming question.
+        
+        A following standalone question that closely matches reuses the
+        retrieval, and one with the same words also the embedding, so neither
+        the answer cache lookup nor retrieval waits on the embedding API. Does nothing unless speculative retrieval is on, or once the
+        session has history, since follow-ups are retrieved with a condensed
+        question the draft would not match.
+        """
+        if self.speculative and not self.memory_pool.get(session_id).chat_memory.messages:
+            self.speculative.prefetch(question)
+            
+    def _embed_query(self, question: str) -> List[float]:
+        # The store's embeddings hold an embedding slot while calling the backend
+        with span("rag.embed_query"):
+            return self.vectorstore.embeddings.embed_query(question)
+            
+    def _question_embedding(self, question: str) -> List[float]:
+        """Embedding of the question for the answer cache, reusing a draft's only if it has the same words"""
+        embedding = self.speculative.embedding(question) if self.speculative else None
+        return embedding if embedding is not None else self._embed_query(question)
+            
+    def get_answer(self, question: str, session_id: str = "default") -> Dict[str, Any]:
+        """Get answer for a question within a session"""
+        with span("rag.answer"):
+            return self._get_answer(question, session_id)
+            
+    def _get_answer(self, question: str, session_id: str) -> Dict[str, Any]:
+        try:
+            memory = self.memory_pool.get(session_id)
+            if memory.chat_memory.messages:
+                with self.limiter.slot("llm"):
+                    return self.chain.ask(question, memory)
+                    
+            # Identical concurrent standalone questions share one computation; each caller gets its own copy
+            result = dict(self.coalescer.run(
+                normalize_question(question), self._answer_standalone, question
+            ))
+            memory.save_context({"question": question}, {"answer": result["answer"]})
+            return result
         except Exception as e:
             print(f"Error getting answer: {e}")
             return {
                 "answer": "Sorry, I encountered an error processing your question.",
                 "source_documents": []
-            } 
\ No newline at end of file
+            }
+            
+    def _answer_standalone(self, question: str) -> Dict[str, Any]:
+        """Answer a question without history, using the answer cache"""
+        embedding = self._question_embedding(question)
+        cached = self.answer_cache.lookup(embedding)
+        if cached:
+            return cached
+            
+        with self.limiter.slot("llm"):
+            result = self.chain.ask(question, create_buffer_memory())
+        self.answer_cache.store(question, embedding, result)
+        return result
+        
+    def stream_answer(self, question: str, session_id: str = "default") -> Iterator[str]:
+        """Stream the answer to a question token by token.
+        
+        The LLM call runs on its own thread, which holds an "llm" slot only
+        until generation finishes, however slowly the tokens are consumed.
+        Closing the returned generator cancels the call and frees the slot.
+        """
+        try:
+            memory = self.memory_pool.get(session_id)
+            standalone = not memory.chat_memory.messages
+            
+            embedding = None
+            if standalone:
+                embedding = self._question_embedding(question)
+                cached = self.answer_cache.lookup(embedding)
+                if cached:
+                    memory.save_context({"question": question}, {"answer": cached["answer"]})
+                    yield cached["answer"]
+                    return
+                    
+            result: Dict[str, Any] = {}
+            tokens: Queue = Queue()
+            stop = threading.Event()
+            threading.Thread(
+                target=self._generate, args=(question, memory, result, tokens, stop),
+                name="rag-stream", daemon=True
+            ).start()
+            try:
+                while True:
+                    token = tokens.get()
+                    if token is None:
+                        break
+                    if isinstance(token, Exception):
+                        raise token
+                    yield token
+            finally:
+                stop.set()
+            if embedding is not None and result:
+                self.answer_cache.store(question, embedding, result)
+        except Exception as e:
+            print(f"Error streaming answer: {e}")
+            yield "Sorry, I encountered an error processing your question."
+            
+    def _generate(self, question: str, memory, result: Dict[str, Any],
+                  tokens: Queue, stop: threading.Event) -> None:
+        """Stream an answer into a queue until it completes or ``stop`` is set; None marks the end"""
+        try:
+            with self.limiter.slot("llm"):
+                if stop.is_set():
+                    return
+                with closing(self.chain.stream(question, memory, result=result)) as stream:
+                    for token in stream:
+                        if stop.is_set():
+                            break
+                        tokens.put(token)
+        except Exception as e:
+            tokens.put(e)
+        finally:
+            tokens.put(None)
+            
+    def metrics(self) -> Dict[str, Any]:
+        """Concurrency, coalescing and cache metrics"""
+        return {
+            "limits": self.limiter.metrics(),
+            "in_flight": self.coalescer.in_flight(),
+            "coalesced": self.coalescer.coalesced,
+            "answer_cache": self.answer_cache.stats(),
+            "embedding_cache": self.vectorstore.embeddings.stats(),
+            "speculation": self.speculative.stats() if self.speculative else {}
+        }
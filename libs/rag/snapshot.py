@@ -0,0 +1,188 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Set
+
+POINTER = "CURRENT"
+LEASES = ".leases"
+# Writer-local state and SQLite side files, which the backup API makes redundant
+IGNORED = shutil.ignore_patterns(
+    "answer_cache.sqlite", "ingest_checkpoints.json", "*.tmp",
+    "*-journal", "*-wal", "*-shm"
+)
+
+def current_snapshot(root: Path) -> Optional[Path]:
+    """Directory of the published snapshot, or None before the first publish"""
+    try:
+        version = (root / POINTER).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return root / version if version else None
+
+def hold_lease(root: Path, snapshot: Path) -> None:
+    """Mark a snapshot as in use by this process; must be renewed within the lease TTL"""
+    path = root / LEASES / f"{snapshot.name}.{os.getpid()}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+
+def release_lease(root: Path, snapshot: Path) -> None:
+    (root / LEASES / f"{snapshot.name}.{os.getpid()}").unlink(missing_ok=True)
+
+def leased(root: Path, ttl: float) -> Set[str]:
+    """Names of snapshots with a live lease; expired lease files are removed"""
+    names = set()
+    now = time.time()
+    for path in (root / LEASES).glob("*.*"):
+        try:
+            if now - path.stat().st_mtime < ttl:
+                names.add(path.name.rsplit(".", 1)[0])
+            else:
+                path.unlink()
+        except FileNotFoundError:
+            continue
+    return names
+
+def checkout(snapshot: Path, directory: Path) -> Path:
+    """A private copy of a snapshot for stores whose files cannot be shared between processes.
+    
+    Copies left behind by processes that no longer exist are removed.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.iterdir():
+        pid = path.name.split("-", 1)[0]
+        if pid.isdigit() and int(pid) != os.getpid() and not _alive(int(pid)):
+            shutil.rmtree(path, ignore_errors=True)
+
+    target = directory / f"{os.getpid()}-{snapshot.name}"
+    if not target.exists():
+        staging = directory / f".{target.name}.staging"
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(snapshot, staging, copy_function=_copy_file)
+        staging.rename(target)
+    return target
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _copy_file(src: str, dst: str) -> None:
+    """Copy SQLite databases with the backup API so a copy is never torn"""
+    if src.endswith((".sqlite", ".sqlite3")):
+        source = sqlite3.connect(f"file:{src}?mode=ro", uri=True)
+        target = sqlite3.connect(dst)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    else:
+        shutil.copy2(src, dst)
+
+class SnapshotPublisher:
+    """Publishes copies of the index directory as versioned, read-only snapshots.
+
+    Each snapshot is copied into a staging directory, renamed into place and
+    only then made current by atomically replacing the ``CURRENT`` pointer,
+    so readers never see a partial snapshot. Beyond the newest ``keep``
+    snapshots, any snapshot a worker still holds a lease on (renewed within
+    ``lease_ttl`` seconds) is retained.
+    """
+
+    def __init__(self, index_dir: Path, root: Path, keep: int = 3, lease_ttl: float = 120.0):
+        self.index_dir = index_dir
+        self.root = root
+        self.keep = max(1, keep)
+        self.lease_ttl = lease_ttl
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def publish(self) -> Path:
+        """Copy the index into a new snapshot and make it current"""
+        # Versions sort chronologically by name
+        version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        staging = self.root / f".{version}.staging"
+        shutil.copytree(self.index_dir, staging, ignore=IGNORED, copy_function=_copy_file)
+        path = self.root / version
+        staging.rename(path)
+
+        tmp_pointer = self.root / f"{POINTER}.tmp"
+        tmp_pointer.write_text(version, encoding="utf-8")
+        os.replace(tmp_pointer, self.root / POINTER)
+        self.prune()
+        return path
+
+    def snapshots(self) -> List[Path]:
+        """Published snapshots, oldest first"""
+        return sorted(
+            path for path in self.root.iterdir()
+            if path.is_dir() and not path.name.startswith(".")
+        )
+
+    def prune(self) -> None:
+        """Delete old snapshots that are neither current nor leased"""
+        current = current_snapshot(self.root)
+        in_use = leased(self.root, self.lease_ttl)
+        for path in self.snapshots()[:-self.keep]:
+            if path != current and path.name not in in_use:
+                shutil.rmtree(path, ignore_errors=True)
+
+class SnapshotWatcher:
+    """Polls the ``CURRENT`` pointer and reports newly published snapshots.
+
+    A lease on the snapshot being served is renewed on every poll, so the
+    interval must stay well below the publisher's lease TTL. A replaced
+    snapshot's lease is left to expire, covering requests still reading it.
+    """
+
+    def __init__(self, root: Path, on_change: Callable[[Path], bool],
+                 interval: float = 5.0, current: Optional[Path] = None):
+        self.root = root
+        self.on_change = on_change
+        self.interval = interval
+        self.current = current
+        if current is not None:
+            hold_lease(root, current)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="snapshot-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.current is not None:
+            release_lease(self.root, self.current)
+
+    def check(self) -> bool:
+        """Switch to the published snapshot if it changed; True when switched"""
+        if self.current is not None:
+            hold_lease(self.root, self.current)
+        path = current_snapshot(self.root)
+        if path is None or path == self.current:
+            return False
+        # Held before loading so the publisher cannot prune it mid-load
+        hold_lease(self.root, path)
+        try:
+            if not self.on_change(path):
+                release_lease(self.root, path)
+                return False
+        except Exception as e:
+            print(f"Snapshot reload error: {e}")
+            release_lease(self.root, path)
+            return False
+        self.current = path
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,108 @@
+import threading
+import time
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.pydantic_v1 import Field
+from langchain_core.retrievers import BaseRetriever
+from libs.telemetry import span
+from .concurrency import normalize_question
+
+class SpeculativeRetriever(BaseRetriever):
+    """Reuses retrievals started early from a draft of the question.
+
+    ``prefetch`` retrieves for a draft, such as a fast transcript taken while
+    the full one is still running, in the background, and with ``embed``
+    also embeds it. A query whose normalized text is at least ``min_ratio``
+    similar to a pending draft takes its results, waiting for them if
+    needed. Other queries are retrieved normally. The draft's embedding is
+    only reused for the same normalized text, since callers key the answer
+    cache on the final question.
+    """
+
+    retriever: Any
+    executor: Any  # ThreadPoolExecutor
+    embed: Any = None  # Callable[[str], List[float]]
+    min_ratio: float = 0.85
+    max_pending: int = 4
+    ttl: float = 30.0
+    # State lives in containers so the shallow copy the chain keeps shares it
+    counts: Dict[str, int] = Field(
+        default_factory=lambda: {"prefetched": 0, "reused": 0, "missed": 0, "embeddings_reused": 0}
+    )
+    pending: List[Any] = Field(default_factory=list)
+    lock: Any = Field(default_factory=threading.Lock)
+
+    def prefetch(self, query: str) -> None:
+        """Start retrieving for a draft query"""
+        key = normalize_question(query)
+        if not key:
+            return
+        future = self.executor.submit(self._retrieve, query)
+        embedding = self.executor.submit(self.embed, query) if self.embed else None
+        with self.lock:
+            self.pending.append((key, future, time.monotonic(), embedding))
+            del self.pending[:-self.max_pending]
+            self.counts["prefetched"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counts)
+
+    def _retrieve(self, query: str) -> List[Document]:
+        with span("rag.speculative_retrieve"):
+            return self.retriever.invoke(query)
+
+    def embedding(self, query: str) -> Optional[List[float]]:
+        """Embedding of a pending draft with the same normalized text, leaving its retrieval to be taken"""
+        key = normalize_question(query)
+        now = time.monotonic()
+        with self.lock:
+            same = next((
+                entry for entry in self.pending
+                if entry[0] == key and entry[3] is not None and now - entry[2] < self.ttl
+            ), None)
+            if same is None:
+                return None
+            self.counts["embeddings_reused"] += 1
+        try:
+            return same[3].result()
+        except Exception as e:
+            print(f"Speculative embedding error: {e}")
+            return None
+
+    def _match(self, query: str) -> Optional[tuple]:
+        """Closest unexpired draft at least ``min_ratio`` similar; called with the lock held"""
+        key = normalize_question(query)
+        now = time.monotonic()
+        self.pending[:] = [entry for entry in self.pending if now - entry[2] < self.ttl]
+        best, best_ratio = None, self.min_ratio
+        for entry in self.pending:
+            ratio = SequenceMatcher(None, entry[0], key).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = entry, ratio
+        return best
+
+    def _take(self, query: str) -> Optional[List[Document]]:
+        """Results of the closest pending draft, if it is close enough"""
+        with self.lock:
+            best = self._match(query)
+            if best is None:
+                self.counts["missed"] += 1
+                return None
+            self.pending.remove(best)
+            self.counts["reused"] += 1
+        try:
+            return best[1].result()
+        except Exception as e:
+            print(f"Speculative retrieval error: {e}")
+            return None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = self._take(query)
+        if documents is None:
+            documents = self.retriever.invoke(query)
+        return documents
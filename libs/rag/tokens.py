@@ -0,0 +1,54 @@
+import threading
+from functools import lru_cache
+from typing import List, Union
+
+class TokenEncoder:
+    """A tiktoken encoding loaded on first use, approximated when unavailable.
+
+    tiktoken downloads encodings missing from its cache (``TIKTOKEN_CACHE_DIR``),
+    so loading waits until text is first counted. If it fails, e.g. offline,
+    text is split into pieces of ``chars_per_token`` characters instead, which
+    keeps budgets roughly right and truncation exact.
+    """
+
+    def __init__(self, name: str = "cl100k_base", chars_per_token: int = 4):
+        self.name = name
+        self.chars_per_token = chars_per_token
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> List[Union[int, str]]:
+        encoding = self._load()
+        if encoding is not None:
+            return encoding.encode(text)
+        step = self.chars_per_token
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    def decode(self, tokens: List[Union[int, str]]) -> str:
+        encoding = self._load()
+        if encoding is not None:
+            return encoding.decode(tokens)
+        return "".join(tokens)
+
+    def count(self, text: str) -> int:
+        return len(self.encode(text))
+
+    def _load(self):
+        if self._loaded:
+            return self._encoding
+        with self._lock:
+            if not self._loaded:
+                try:
+                    import tiktoken
+
+                    self._encoding = tiktoken.get_encoding(self.name)
+                except Exception as e:
+                    print(f"Token encoding {self.name} unavailable, approximating token counts: {e}")
+                self._loaded = True
+        return self._encoding
+
+@lru_cache(maxsize=None)
+def token_encoder(name: str = "cl100k_base") -> TokenEncoder:
+    """The process-wide encoder for an encoding name"""
+    return TokenEncoder(name)
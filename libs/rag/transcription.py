@@ -0,0 +1,173 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+from langchain.docstore.document import Document
+
+SAMPLE_RATE = 16000
+
+def youtube_video_id(url: str) -> Optional[str]:
+    """Extract the video id from the common YouTube URL forms"""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.endswith("youtu.be"):
+        return parsed.path.lstrip("/").split("/")[0] or None
+    if "youtube" in host:
+        if parsed.path == "/watch":
+            return parse_qs(parsed.query).get("v", [None])[0]
+        parts = parsed.path.strip("/").split("/")
+        if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v"):
+            return parts[1]
+    return None
+
+def file_hash(path: str) -> str:
+    """Hash of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def split_on_silence(audio: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                     target_seconds: float = 120.0, search_seconds: float = 30.0,
+                     frame_ms: int = 50) -> List[Tuple[int, int]]:
+    """Cut audio into ``(start, end)`` sample ranges of about ``target_seconds``.
+
+    Each cut is placed at the quietest frame within ``search_seconds`` before
+    the target length, so segments end in pauses rather than mid-word.
+    """
+    frame = sample_rate * frame_ms // 1000
+    count = len(audio) // frame
+    if len(audio) <= target_seconds * sample_rate or not count:
+        return [(0, len(audio))]
+    energy = np.sqrt(np.mean(np.square(audio[:count * frame].reshape(count, frame)), axis=1))
+
+    target = max(2, int(target_seconds * sample_rate) // frame)
+    search = max(1, int(search_seconds * sample_rate) // frame)
+    bounds, start = [], 0
+    while count - start > target:
+        # Always advance, even when the search window spans the whole segment
+        low = max(start + 1, start + target - search)
+        # The latest of equally quiet frames, so long silences give full-length segments
+        window = energy[low:start + target][::-1]
+        cut = start + target - 1 - int(np.argmin(window))
+        bounds.append((start * frame, cut * frame))
+        start = cut
+    bounds.append((start * frame, len(audio)))
+    return bounds
+
+class TranscriptCache:
+    """Transcripts stored as JSON files keyed by video id or audio hash"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, key: str) -> Optional[List[Document]]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)["documents"]
+            return [Document(page_content=e["page_content"], metadata=e["metadata"]) for e in entries]
+        except Exception as e:
+            print(f"Transcript cache read error: {e}")
+            return None
+
+    def put(self, key: str, documents: List[Document]) -> None:
+        path = self._path(key)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "key": key,
+                "documents": [{"page_content": d.page_content, "metadata": d.metadata} for d in documents]
+            }, f)
+        tmp_path.replace(path)
+
+def _init_worker(threads: int) -> None:
+    """Keep each worker process from oversubscribing the CPU"""
+    import torch
+    torch.set_num_threads(threads)
+
+def _transcribe_segment(model_name: str, audio: np.ndarray, language: Optional[str]) -> str:
+    """Transcribe one segment with the process's shared Whisper model.
+    
+    Decodes hold the model's lock, so in-process transcription never runs
+    concurrently with voice on the same model.
+    """
+    from libs.models import LazyWhisperModel
+    result = LazyWhisperModel(model_name).transcribe(audio, language=language, fp16=False)
+    return result["text"].strip()
+
+class LocalTranscriber:
+    """Transcribes long audio with local Whisper, segments in parallel processes.
+
+    Audio is decoded once, cut at silences and the segments are transcribed
+    across a pool of worker processes that each hold their own model. With
+    one worker, segments are transcribed in this process using the Whisper
+    model shared with voice.
+    """
+
+    def __init__(self, model_name: str = "base", workers: int = 2,
+                 segment_seconds: float = 120.0, language: Optional[str] = "english"):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.segment_seconds = segment_seconds
+        self.language = language
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio_path: str) -> List[Document]:
+        """Transcribe an audio file into one document per segment"""
+        import whisper
+
+        audio = whisper.load_audio(audio_path, sr=SAMPLE_RATE)
+        bounds = split_on_silence(audio, SAMPLE_RATE, self.segment_seconds)
+        segments = [audio[start:end] for start, end in bounds]
+
+        if self.workers == 1 or len(segments) == 1:
+            texts = [_transcribe_segment(self.model_name, segment, self.language) for segment in segments]
+        else:
+            pool = self._get_pool()
+            texts = list(pool.map(
+                _transcribe_segment,
+                [self.model_name] * len(segments), segments, [self.language] * len(segments)
+            ))
+
+        return [
+            Document(page_content=text, metadata={
+                "start": start / SAMPLE_RATE,
+                "end": end / SAMPLE_RATE,
+                "chunk": index
+            })
+            for index, ((start, end), text) in enumerate(zip(bounds, texts))
+            if text
+        ]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned workers avoid forking a process that holds torch threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(max(1, (os.cpu_count() or 1) // self.workers),)
+                )
+            return self._pool
@@ -1,48 +1,282 @@
+import threading
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Iterable, List, Optional
 from langchain.docstore.document import Document
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores.chroma import Chroma
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from .embedding_cache import CachedEmbeddings, chunk_id
+from .concurrency import ConcurrencyLimiter, LimitedEmbeddings
+from .pipeline import IngestCheckpoint, batch_splits
+from .embeddings import collection_name, create_embeddings
+from .bm25 import BM25Index
+from .references import ChunkReferences
+from .retriever import HybridRetriever, SourceAnnotatingRetriever
+from .dense_index import DenseVectorStore
+from libs.telemetry import span
 
 class RAGVectorStore:
     """Manages the vector store for document embeddings"""
     
-    def __init__(self, persist_directory: Path):
+    def __init__(self, persist_directory: Path, batch_size: int = 64,
+                 embedding_backend: str = "openai",
+                 embeddings: Optional[Embeddings] = None,
+                 retriever_mode: str = "hybrid",
+                 retriever_k: int = 4,
+                 retriever_fetch_k: int = 20,
+                 vector_backend: str = "chroma",
+                 dense_dtype: str = "float32",
+                 dense_ivf_lists: int = 0,
+                 dense_n_probe: int = 8,
+                 query_cache_size: int = 256,
+                 limiter: Optional[ConcurrencyLimiter] = None,
+                 read_only: bool = False):
         self.persist_directory = persist_directory
-        self.embeddings = OpenAIEmbeddings()
+        self.batch_size = batch_size
+        self.retriever_mode = retriever_mode
+        self.retriever_k = retriever_k
+        self.retriever_fetch_k = retriever_fetch_k
+        self.vector_backend = vector_backend
+        self.dense_dtype = dense_dtype
+        self.dense_ivf_lists = dense_ivf_lists
+        self.dense_n_probe = dense_n_probe
+        self.query_cache_size = query_cache_size
+        self.limiter = limiter
+        self.read_only = read_only
+        self.embedding_backend = embedding_backend
+        self.checkpoints = IngestCheckpoint(persist_directory / "ingest_checkpoints.json")
+        self.base_embeddings = embeddings or create_embeddings(embedding_backend)
+        # Capped below the cache: query embeddings of retrieval take a slot only when computed
+        self.embeddings = CachedEmbeddings(
+            LimitedEmbeddings(self.base_embeddings, limiter) if limiter else self.base_embeddings,
+            persist_directory / "embeddings.sqlite",
+            model=self.base_embeddings.model,
+            query_cache_size=query_cache_size,
+            read_only=read_only
+        )
+        self.collection_name = collection_name(embedding_backend, self.base_embeddings.model)
+        self.keyword_index = BM25Index(
+            persist_directory / f"bm25_{self.collection_name}.sqlite",
+            read_only=read_only
+        )
+        # Snapshots published before reference counting have no references to read
+        references_path = persist_directory / "chunk_sources.sqlite"
+        self.references = ChunkReferences(references_path, read_only=read_only) \
+            if not read_only or references_path.exists() else None
+        self._write_lock = threading.Lock()
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=150
         )
-        self.vectorstore = Chroma(
-            persist_directory=str(self.persist_directory),
-            embedding_function=self.embeddings
-        )
+        self.vectorstore = self._create_store()
+        
+    def _create_store(self):
+        """Create the configured vector backend"""
+        if self.vector_backend == "dense":
+            return DenseVectorStore(
+                self.persist_directory / f"dense_{self.collection_name}",
+                self.embeddings,
+                dtype=self.dense_dtype,
+                n_probe=self.dense_n_probe,
+                read_only=self.read_only
+            )
+        if self.vector_backend == "chroma":
+            return Chroma(
+                collection_name=self.collection_name,
+                persist_directory=str(self.persist_directory),
+                embedding_function=self.embeddings
+            )
+        raise ValueError(f"Unsupported vector backend: {self.vector_backend}")
         
     def initialize(self) -> bool:
         """Initialize or load the vector store"""
         try:
             if not self.vectorstore:
-                self.vectorstore = Chroma(
-                    persist_directory=str(self.persist_directory),
-                    embedding_function=self.embeddings
-                )
+                self.vectorstore = self._create_store()
+            if self.read_only:
+                return True
+            if (isinstance(self.vectorstore, DenseVectorStore) and self.dense_ivf_lists
+                    and (not (self.vectorstore.directory / "ivf.npz").exists()
+                         or self.vectorstore.partitions_outgrown())):
+                self.vectorstore.build_partitions(self.dense_ivf_lists)
+            if not len(self.keyword_index):
+                self._backfill_keyword_index()
+            if not self.references.backfilled:
+                self._backfill_references()
             return True
         except Exception as e:
             print(f"Vector store initialization error: {e}")
             return False
             
-    def add_documents(self, documents: List[Document]) -> bool:
-        """Add documents to the vector store"""
+    def reopen(self, persist_directory: Path, read_only: bool = True) -> "RAGVectorStore":
+        """A store with the same configuration over another directory, e.g. a snapshot"""
+        return RAGVectorStore(
+            persist_directory,
+            batch_size=self.batch_size,
+            embedding_backend=self.embedding_backend,
+            embeddings=self.base_embeddings,
+            retriever_mode=self.retriever_mode,
+            retriever_k=self.retriever_k,
+            retriever_fetch_k=self.retriever_fetch_k,
+            vector_backend=self.vector_backend,
+            dense_dtype=self.dense_dtype,
+            dense_ivf_lists=self.dense_ivf_lists,
+            dense_n_probe=self.dense_n_probe,
+            query_cache_size=self.query_cache_size,
+            limiter=self.limiter,
+            read_only=read_only
+        )
+        
+    def close(self) -> None:
+        """Release the store's database connections and Chroma client"""
         try:
-            splits = self.text_splitter.split_documents(documents)
-            self.vectorstore.add_documents(splits)
+            self.embeddings.close()
+            self.keyword_index.close()
+            if self.references:
+                self.references.close()
+            if isinstance(self.vectorstore, DenseVectorStore):
+                self.vectorstore.close()
+            elif self.vectorstore is not None:
+                # Chroma caches one shared system per path; stop ours and drop it from the cache
+                client = getattr(self.vectorstore, "_client", None)
+                system = getattr(client, "_system", None)
+                if system is not None:
+                    system.stop()
+                    systems = getattr(type(client), "_identifer_to_system", None)
+                    if isinstance(systems, dict):
+                        systems.pop(str(self.persist_directory), None)
+        except Exception as e:
+            print(f"Vector store close error: {e}")
+            
+    def add_documents(self, documents: Iterable[Document],
+                      on_progress: Optional[Callable[[str], None]] = None,
+                      source: Optional[str] = None) -> bool:
+        """Add documents to the vector store, returning whether it succeeded"""
+        try:
+            self.write_documents(documents, on_progress=on_progress, source=source)
             return True
         except Exception as e:
             print(f"Error adding documents: {e}")
             return False
             
+    def write_documents(self, documents: Iterable[Document],
+                        on_progress: Optional[Callable[[str], None]] = None,
+                        source: Optional[str] = None) -> None:
+        """Add documents to the vector store in bounded batches, raising on failure.
+        
+        Documents are consumed lazily and each batch is split, embedded and
+        written before the next is read. When ``source`` is given, committed
+        batches are checkpointed so a failed ingestion resumes where it stopped.
+        """
+        offset = self.checkpoints.get(source) if source else 0
+        documents = islice(documents, offset, None)
+        
+        for consumed, splits in batch_splits(
+            documents, self.split_documents, self.batch_size
+        ):
+            if on_progress:
+                on_progress(f"split {offset + consumed}")
+            with span("ingest.embed"):
+                self._write_batch(splits)
+            offset += consumed
+            if source:
+                self.checkpoints.set(source, offset)
+            if on_progress:
+                on_progress(f"embedded {offset}")
+                
+        if source:
+            self.checkpoints.clear(source)
+            
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Split documents into chunks"""
+        with span("ingest.split"):
+            return self.text_splitter.split_documents(documents)
+            
+    def add_chunks(self, splits: List[Document]) -> List[str]:
+        """Store already split chunks, returning their ids"""
+        return self._write_batch(splits)
+        
+    def delete(self, ids: List[str]) -> None:
+        """Remove chunks from the vector store and the keyword index"""
+        if ids:
+            self.vectorstore.delete(ids=ids)
+            self.keyword_index.delete(ids)
+            
+    def release(self, source: str, ids: Iterable[str]) -> List[str]:
+        """Drop a source's references to chunks and delete those no source references"""
+        with self._write_lock:
+            orphaned = self.references.release(source, ids)
+            self.delete(orphaned)
+        return orphaned
+            
+    def _write_batch(self, splits: List[Document]) -> List[str]:
+        """Embed and store chunks that are not already in the store"""
+        # Chunks are content-addressed: known text is not re-embedded, only its new source is recorded
+        unique = {}
+        references = {}
+        for split in splits:
+            id_ = chunk_id(split.page_content, self.embeddings.model)
+            unique.setdefault(id_, split)
+            references.setdefault(split.metadata.get("source", ""), []).append(id_)
+        if not unique:
+            return []
+        with self._write_lock:
+            existing = set(self.vectorstore.get(ids=list(unique))["ids"])
+            new_ids = [id_ for id_ in unique if id_ not in existing]
+            
+            if new_ids:
+                self.vectorstore.add_documents([unique[id_] for id_ in new_ids], ids=new_ids)
+            self.keyword_index.add(list(unique), list(unique.values()))
+            for source, ids in references.items():
+                self.references.add(source, ids)
+        return list(unique)
+        
+    def _backfill_keyword_index(self) -> None:
+        """Index chunks stored before the keyword index existed"""
+        stored = self.vectorstore.get(include=["documents", "metadatas"])
+        documents = [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(stored["documents"], stored["metadatas"])
+        ]
+        if documents:
+            self.keyword_index.add(
+                [chunk_id(doc.page_content, self.embeddings.model) for doc in documents],
+                documents
+            )
+            
+    def _backfill_references(self) -> None:
+        """Reference chunks stored before reference counting from their metadata source.
+        
+        Legacy collections store chunks under random ids, so references are
+        recorded under the content address, as the keyword index is.
+        """
+        stored = self.vectorstore.get(include=["documents", "metadatas"])
+        references = {}
+        for text, metadata in zip(stored["documents"], stored["metadatas"]):
+            references.setdefault((metadata or {}).get("source", ""), []).append(
+                chunk_id(text, self.embeddings.model)
+            )
+        for source, ids in references.items():
+            self.references.add(source, ids)
+        self.references.mark_backfilled()
+            
     def as_retriever(self, **kwargs):
-        """Get the retriever interface"""
-        return self.vectorstore.as_retriever(**kwargs) 
\ No newline at end of file
+        """Get the retriever interface; documents list all their sources"""
+        if self.retriever_mode == "hybrid":
+            search_kwargs = kwargs.get("search_kwargs", {})
+            retriever = HybridRetriever(
+                vectorstore=self.vectorstore,
+                index=self.keyword_index,
+                model=self.embeddings.model,
+                k=search_kwargs.get("k", self.retriever_k),
+                fetch_k=search_kwargs.get("fetch_k", self.retriever_fetch_k)
+            )
+        else:
+            kwargs.setdefault("search_kwargs", {"k": self.retriever_k})
+            retriever = self.vectorstore.as_retriever(**kwargs)
+        if self.references is None:
+            return retriever
+        return SourceAnnotatingRetriever(
+            retriever=retriever, references=self.references, model=self.embeddings.model
+        )
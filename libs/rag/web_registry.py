@@ -0,0 +1,196 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+import requests
+from bs4 import BeautifulSoup
+from langchain.docstore.document import Document
+from libs.telemetry import span
+from .embedding_cache import chunk_id
+
+@dataclass
+class RefreshResult:
+    """Outcome of refreshing one URL"""
+
+    url: str
+    status: str  # new, updated, unchanged, not_modified or failed
+    added: int = 0
+    removed: int = 0
+    error: Optional[str] = None
+
+class WebSourceRegistry:
+    """Tracks indexed web pages so refreshes only re-embed what changed.
+
+    Each URL's ETag, Last-Modified and content hash are kept with the ids of
+    the chunks it produced. Refreshes send conditional GETs, skip pages whose
+    text is unchanged, and for changed pages embed only the new chunks and
+    release the ones no longer present; the vector store only deletes a
+    chunk once no page or other source references it.
+    """
+
+    def __init__(self, path: Path, vectorstore, max_workers: int = 4, timeout: float = 30.0,
+                 on_change: Optional[Callable[[], None]] = None):
+        self.vectorstore = vectorstore
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.on_change = on_change
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = "Mozilla/5.0 (compatible; rag-web-registry)"
+        # Fetches run concurrently; index updates are applied one page at a time
+        self._write_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "content_hash TEXT, chunk_ids TEXT NOT NULL, fetched REAL)"
+        )
+        self._conn.commit()
+        self._migrate_references()
+
+    def urls(self) -> List[str]:
+        """All registered URLs"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT url FROM pages ORDER BY url")]
+
+    def refresh(self, url: str) -> RefreshResult:
+        """Fetch a URL and bring its chunks in the index up to date"""
+        try:
+            page = self._get_page(url)
+            response = self._fetch(url, page)
+            if response.status_code == 304:
+                self._touch(url)
+                return RefreshResult(url, "not_modified")
+            response.raise_for_status()
+
+            document = self._parse(url, response)
+            content_hash = hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+            if page and page["content_hash"] == content_hash:
+                self._save(url, response, content_hash, page["chunk_ids"])
+                return RefreshResult(url, "unchanged")
+
+            return self._apply(url, document, response, content_hash, page)
+        except Exception as e:
+            print(f"Web refresh error for {url}: {e}")
+            return RefreshResult(url, "failed", error=str(e))
+
+    def crawl(self, urls: Iterable[str],
+              on_result: Optional[Callable[[RefreshResult], None]] = None) -> List[RefreshResult]:
+        """Refresh many URLs with at most ``max_workers`` fetches in flight"""
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="web-crawl") as executor:
+            for result in executor.map(self.refresh, urls):
+                results.append(result)
+                if on_result:
+                    on_result(result)
+        return results
+
+    def refresh_all(self, on_result: Optional[Callable[[RefreshResult], None]] = None) -> List[RefreshResult]:
+        """Re-check every registered URL"""
+        return self.crawl(self.urls(), on_result=on_result)
+
+    def sitemap_urls(self, sitemap_url: str) -> List[str]:
+        """Page URLs listed in a sitemap, following nested sitemap indexes"""
+        response = self._session.get(sitemap_url, timeout=self.timeout)
+        response.raise_for_status()
+        root = ET.fromstring(response.content)
+        namespace = root.tag.split("}")[0] + "}" if root.tag.startswith("{") else ""
+        locations = [loc.text.strip() for loc in root.iter(f"{namespace}loc") if loc.text]
+        if root.tag == f"{namespace}sitemapindex":
+            return [url for location in locations for url in self.sitemap_urls(location)]
+        return locations
+
+    def remove(self, url: str) -> int:
+        """Forget a URL and delete the chunks only it referenced"""
+        with self._write_lock:
+            page = self._get_page(url)
+            if not page:
+                return 0
+            with self._lock:
+                self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._conn.commit()
+            orphaned = self.vectorstore.release(url, page["chunk_ids"])
+        if orphaned and self.on_change:
+            self.on_change()
+        return len(orphaned)
+
+    def _fetch(self, url: str, page: Optional[Dict]) -> requests.Response:
+        """Conditional GET using the validators from the last fetch"""
+        headers = {}
+        if page and page["etag"]:
+            headers["If-None-Match"] = page["etag"]
+        if page and page["last_modified"]:
+            headers["If-Modified-Since"] = page["last_modified"]
+        with span("ingest.fetch"):
+            return self._session.get(url, headers=headers, timeout=self.timeout)
+
+    @staticmethod
+    def _parse(url: str, response: requests.Response) -> Document:
+        """Extract page text the way ``WebBaseLoader`` does"""
+        soup = BeautifulSoup(response.content, "html.parser")
+        metadata = {"source": url, "source_type": "Web"}
+        if soup.title and soup.title.string:
+            metadata["title"] = soup.title.string.strip()
+        return Document(page_content=soup.get_text(), metadata=metadata)
+
+    def _apply(self, url: str, document: Document, response: requests.Response,
+               content_hash: str, page: Optional[Dict]) -> RefreshResult:
+        """Embed new chunks and drop stale ones for a changed page"""
+        splits = self.vectorstore.split_documents([document])
+        with self._write_lock:
+            old_ids = set(page["chunk_ids"]) if page else set()
+            # Unchanged chunks keep their content-addressed ids and are not re-embedded
+            fresh = [split for split in splits if self._chunk_id(split) not in old_ids]
+            new_ids = [self._chunk_id(split) for split in splits]
+            with span("ingest.embed"):
+                self.vectorstore.add_chunks(fresh)
+
+            self._save(url, response, content_hash, list(dict.fromkeys(new_ids)))
+            orphaned = self.vectorstore.release(url, old_ids - set(new_ids))
+
+        if (fresh or orphaned) and self.on_change:
+            self.on_change()
+        return RefreshResult(url, "updated" if page else "new", added=len(fresh), removed=len(orphaned))
+
+    def _chunk_id(self, split: Document) -> str:
+        return chunk_id(split.page_content, self.vectorstore.embeddings.model)
+
+    def _migrate_references(self) -> None:
+        """Record the chunks of pages indexed before the vector store counted references"""
+        with self._lock:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+                return
+            for url, chunk_ids in self._conn.execute("SELECT url, chunk_ids FROM pages").fetchall():
+                self.vectorstore.references.add(url, json.loads(chunk_ids))
+            self._conn.execute("PRAGMA user_version = 1")
+            self._conn.commit()
+
+    def _get_page(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, chunk_ids FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "content_hash": row[2], "chunk_ids": json.loads(row[3])}
+
+    def _save(self, url: str, response: requests.Response, content_hash: str, chunk_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_hash, chunk_ids, fetched) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 content_hash, json.dumps(chunk_ids), time.time())
+            )
+            self._conn.commit()
+
+    def _touch(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
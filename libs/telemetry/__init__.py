@@ -0,0 +1,4 @@
+from .tracer import Tracer, Trace, default_tracer, span
+from .workers import WorkerMetricsWriter, collect_worker_metrics
+
+__all__ = ['Tracer', 'Trace', 'default_tracer', 'span', 'WorkerMetricsWriter', 'collect_worker_metrics']
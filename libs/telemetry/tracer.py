@@ -0,0 +1,131 @@
+from collections import deque
+from contextlib import contextmanager
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+import numpy as np
+
+class Histogram:
+    """Rolling window of observations with cumulative count and sum"""
+    
+    def __init__(self, window: int = 1000):
+        self.values: deque = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        
+    def observe(self, value: float) -> None:
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+        
+    def summary(self) -> Dict[str, float]:
+        values = np.asarray(self.values or [0.0])
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99)
+        }
+
+class Tracer:
+    """Collects per-stage latencies and exports them as Prometheus text"""
+    
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._histograms: Dict[str, Histogram] = {}
+        self._gauges: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record one latency observation for a stage"""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.window)
+            histogram.observe(seconds)
+            
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one observation of ``stage``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+            
+    def register_gauges(self, prefix: str, collect: Callable[[], Dict[str, Any]]) -> None:
+        """Register a callable returning (possibly nested) numeric gauges"""
+        self._gauges[prefix] = collect
+        
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Latency summaries per stage"""
+        with self._lock:
+            return {stage: histogram.summary() for stage, histogram in sorted(self._histograms.items())}
+            
+    def gauges(self) -> Dict[str, float]:
+        """Current gauge values, flattened to metric names"""
+        values: Dict[str, float] = {}
+        for prefix, collect in list(self._gauges.items()):
+            try:
+                _flatten(prefix, collect(), values)
+            except Exception as e:
+                print(f"Gauge collection error for {prefix}: {e}")
+        return values
+        
+    def prometheus_text(self, namespace: str = "assistant", labels: Optional[Dict[str, str]] = None) -> str:
+        """Render latencies as a summary metric and gauges in Prometheus text format.
+        
+        ``labels``, e.g. ``{"worker": "0"}``, are added to every sample.
+        """
+        extra = "".join(f',{key}="{value}"' for key, value in sorted((labels or {}).items()))
+        metric = f"{namespace}_stage_latency_seconds"
+        lines = [
+            f"# HELP {metric} Latency of each pipeline stage.",
+            f"# TYPE {metric} summary"
+        ]
+        for stage, summary in self.snapshot().items():
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                lines.append(f'{metric}{{stage="{stage}",quantile="{quantile}"{extra}}} {summary[key]:.6f}')
+            lines.append(f'{metric}_sum{{stage="{stage}"{extra}}} {summary["sum"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"{extra}}} {summary["count"]}')
+            
+        for name, value in sorted(self.gauges().items()):
+            name = f"{namespace}_{name}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{{{extra[1:]}}} {value}" if extra else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+class Trace:
+    """Marks the progress of one request relative to when it started.
+    
+    Each mark is recorded as a latency of ``<kind>.<name>`` measured from the
+    request's start, e.g. end of speech to playback start for voice.
+    """
+    
+    def __init__(self, kind: str, start: Optional[float] = None, tracer: Optional[Tracer] = None):
+        self.kind = kind
+        self.start = time.perf_counter() if start is None else start
+        self.tracer = tracer or default_tracer
+        self.marks: Dict[str, float] = {}
+        
+    def mark(self, name: str) -> None:
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.start
+            self.tracer.observe(f"{self.kind}.{name}", self.marks[name])
+
+def _flatten(prefix: str, value: Any, out: Dict[str, float]) -> None:
+    name = re.sub(r"[^a-zA-Z0-9_]", "_", prefix)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{name}_{key}", item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[name] = float(value)
+
+default_tracer = Tracer()
+
+def span(stage: str):
+    """Time a block with the process-wide tracer"""
+    return default_tracer.span(stage)
@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from .tracer import Tracer
+
+class WorkerMetricsWriter:
+    """Periodically writes one worker process's metrics to a directory shared by all workers.
+
+    Every sample carries a ``worker`` label so the merged output of
+    ``collect_worker_metrics`` keeps the workers apart.
+    """
+
+    def __init__(self, tracer: Tracer, directory: Path, worker: str, interval: float = 5.0):
+        self.tracer = tracer
+        self.directory = directory
+        self.worker = worker
+        self.interval = interval
+        self.path = directory / f"worker-{worker}.prom"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.write()
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.path.unlink(missing_ok=True)
+
+    def write(self) -> None:
+        """Replace this worker's file atomically so readers never see a partial one"""
+        text = self.tracer.prometheus_text(labels={"worker": self.worker})
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                print(f"Metrics write error: {e}")
+
+def collect_worker_metrics(directory: Path, ttl: float = 30.0) -> str:
+    """Merge the files of all live workers into one Prometheus exposition.
+
+    Files not rewritten within ``ttl`` seconds belong to workers that have
+    exited and are skipped. Each metric family's HELP and TYPE lines are
+    emitted once, followed by the samples of every worker.
+    """
+    comments: Dict[str, List[str]] = {}
+    samples: Dict[str, List[str]] = {}
+    now = time.time()
+    for path in sorted(directory.glob("worker-*.prom")):
+        try:
+            if now - path.stat().st_mtime > ttl:
+                continue
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            continue
+        family = ""
+        for line in text.splitlines():
+            if line.startswith("# "):
+                parts = line.split(" ", 3)
+                if len(parts) >= 3 and parts[1] in ("HELP", "TYPE"):
+                    family = parts[2]
+                    lines = comments.setdefault(family, [])
+                    if line not in lines:
+                        lines.append(line)
+                    samples.setdefault(family, [])
+            elif line:
+                samples.setdefault(family, []).append(line)
+
+    lines = []
+    for family, family_samples in samples.items():
+        lines.extend(comments.get(family, []))
+        lines.extend(family_samples)
+    return "\n".join(lines) + "\n" if lines else ""
@@ -2,5 +2,6 @@ from .recorder import AudioRecorder
 from .transcriber import Transcriber
 from .responder import Responder
 from .service import VoiceService
+from .queues import BoundedQueue
 
-__all__ = ['AudioRecorder', 'Transcriber', 'Responder', 'VoiceService'] 
\ No newline at end of file
+__all__ = ['AudioRecorder', 'Transcriber', 'Responder', 'VoiceService', 'BoundedQueue'] 
\ No newline at end of file
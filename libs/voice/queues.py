@@ -0,0 +1,144 @@
+from collections import deque
+from queue import Empty
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+import numpy as np
+
+def merge_items(older: Any, newer: Any) -> Any:
+    """Join two adjacent queue items: audio is concatenated, text joined.
+    
+    ``(item, trace)`` pairs are merged on the item and keep the older trace.
+    """
+    if isinstance(older, tuple):
+        return (merge_items(older[0], newer[0]),) + older[1:]
+    if isinstance(older, np.ndarray):
+        return np.concatenate([older, newer])
+    return f"{older} {newer}"
+
+class BoundedQueue:
+    """Bounded queue with an overflow policy and staleness tracking.
+
+    Overflow policies when the queue is full:
+
+    - ``drop_oldest``: discard the oldest item to make room
+    - ``coalesce``: merge the new item into the newest queued item
+    - ``reject``: discard the new item
+
+    Overflow never raises, so producers are never blocked. Items older than
+    ``max_age`` seconds are discarded when dequeued. It is a drop-in for
+    ``queue.Queue`` as used by the voice threads.
+    """
+
+    POLICIES = ("drop_oldest", "coalesce", "reject")
+
+    def __init__(self, maxsize: int = 8, policy: str = "drop_oldest",
+                 max_age: Optional[float] = None,
+                 merge: Callable[[Any, Any], Any] = merge_items, window: int = 500):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unsupported overflow policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.max_age = max_age
+        self.merge = merge
+        self._items: deque = deque()
+        self._ages: deque = deque(maxlen=window)
+        self._not_empty = threading.Condition()
+        self.counts = {"put": 0, "dropped": 0, "coalesced": 0, "rejected": 0, "stale": 0}
+        self.max_depth = 0
+
+    def put_nowait(self, item: Any) -> None:
+        """Enqueue an item, applying the overflow policy when full"""
+        with self._not_empty:
+            self.counts["put"] += 1
+            if len(self._items) >= self.maxsize:
+                if self.policy == "reject":
+                    self.counts["rejected"] += 1
+                    return
+                if self.policy == "coalesce":
+                    # Keep the older timestamp so the merged item's age stays honest
+                    enqueued, newest = self._items[-1]
+                    self._items[-1] = (enqueued, self.merge(newest, item))
+                    self.counts["coalesced"] += 1
+                    return
+                self._items.popleft()
+                self.counts["dropped"] += 1
+            self._items.append((time.monotonic(), item))
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._not_empty.notify()
+
+    put = put_nowait
+
+    def get_with_age(self, block: bool = True, timeout: Optional[float] = None) -> Tuple[Any, float]:
+        """Dequeue the next fresh item along with how long it waited"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._not_empty:
+            while True:
+                while not self._items:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if not block or (remaining is not None and remaining <= 0):
+                        raise Empty
+                    self._not_empty.wait(remaining)
+
+                enqueued, item = self._items.popleft()
+                age = time.monotonic() - enqueued
+                if self.max_age is not None and age > self.max_age:
+                    self.counts["stale"] += 1
+                    continue
+                self._ages.append(age)
+                return item, age
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        return self.get_with_age(block, timeout)[0]
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def stats(self) -> Dict[str, float]:
+        """Depth, overflow counts and dequeue-age percentiles"""
+        with self._not_empty:
+            ages = np.asarray(self._ages or [0.0])
+            oldest = time.monotonic() - self._items[0][0] if self._items else 0.0
+            return {
+                "depth": len(self._items),
+                "max_depth": self.max_depth,
+                "oldest_age": oldest,
+                "age_p50": float(np.percentile(ages, 50)),
+                "age_p95": float(np.percentile(ages, 95)),
+                **self.counts
+            }
+
+class Resequencer:
+    """Releases results in the order their inputs were taken.
+
+    Parallel workers take a ticket with each input and complete it with a
+    result, or ``None`` when the input produced nothing. Results are emitted
+    only once every earlier ticket has completed.
+    """
+
+    def __init__(self):
+        self._issued = 0
+        self._released = 0
+        self._done: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def ticket(self) -> int:
+        with self._lock:
+            self._issued += 1
+            return self._issued - 1
+
+    def complete(self, ticket: int, result: Any, emit: Callable[[Any], None]) -> None:
+        """Record a ticket's result and emit every result that is now in order"""
+        with self._lock:
+            self._done[ticket] = result
+            while self._released in self._done:
+                result = self._done.pop(self._released)
+                self._released += 1
+                if result is not None:
+                    emit(result)
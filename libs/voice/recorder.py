@@ -4,6 +4,8 @@ from queue import Queue
 import numpy as np
 import io
 import wave
+from .stream import FrameVAD, RingBuffer
+from libs.telemetry import span
 
 @dataclass
 class AudioRecorder:
@@ -13,6 +15,11 @@ class AudioRecorder:
     pause: float
     dynamic_energy: bool
     sample_rate: int = 16000
+    streaming: bool = False
+    frame_ms: int = 30
+    ring_seconds: float = 120.0
+    max_segment_seconds: float = 30.0
+    pre_roll_ms: int = 200
     
     def __post_init__(self):
         self.recognizer = sr.Recognizer()
@@ -22,6 +29,10 @@ class AudioRecorder:
         
     def record(self, audio_queue: Queue) -> None:
         """Record audio and add to queue"""
+        if self.streaming:
+            self.record_stream(audio_queue)
+            return
+            
         with sr.Microphone(sample_rate=self.sample_rate) as source:
             self.recognizer.adjust_for_ambient_noise(source, duration=1)
             
@@ -30,16 +41,94 @@ class AudioRecorder:
                     audio = self.recognizer.listen(source)
                     if hasattr(audio, 'get_wav_data'):
                         # Convert wav data to numpy array
-                        wav_data = io.BytesIO(audio.get_wav_data())
-                        with wave.open(wav_data, 'rb') as wav_file:
-                            audio_data = np.frombuffer(
-                                wav_file.readframes(wav_file.getnframes()), 
-                                dtype=np.int16
-                            )
-                            audio_data = audio_data.astype(np.float32) / 32768.0
+                        with span("voice.wav_decode"):
+                            wav_data = io.BytesIO(audio.get_wav_data())
+                            with wave.open(wav_data, 'rb') as wav_file:
+                                audio_data = np.frombuffer(
+                                    wav_file.readframes(wav_file.getnframes()), 
+                                    dtype=np.int16
+                                )
+                                audio_data = audio_data.astype(np.float32) / 32768.0
                         audio_queue.put_nowait(audio_data)
                     else:
                         print("Warning: Audio data format not supported")
                 except Exception as e:
                     print(f"Recording error: {e}")
-                    continue 
\ No newline at end of file
+                    continue
+                    
+    def record_stream(self, audio_queue: Queue) -> None:
+        """Capture into a ring buffer and emit speech segments as float32 views.
+        
+        The PyAudio callback converts samples straight into a preallocated
+        ring buffer; this thread runs VAD over each new block of frames and
+        queues a segment as soon as ``pause`` seconds of silence follow speech.
+        Segments are views into the ring buffer, so ``ring_seconds`` should
+        comfortably exceed how far the transcriber can fall behind.
+        """
+        import pyaudio
+        
+        ring = RingBuffer(int(self.ring_seconds * self.sample_rate))
+        vad = FrameVAD(
+            sample_rate=self.sample_rate,
+            frame_ms=self.frame_ms,
+            min_energy=self.energy / 32768.0,
+            adaptive=self.dynamic_energy
+        )
+        frame = vad.frame_length
+        hangover = max(1, int(self.pause * 1000 / self.frame_ms))
+        pre_roll = self.pre_roll_ms * self.sample_rate // 1000
+        max_segment = int(self.max_segment_seconds * self.sample_rate)
+        
+        def callback(in_data, frame_count, time_info, status):
+            ring.write_int16(np.frombuffer(in_data, dtype=np.int16))
+            return None, pyaudio.paContinue
+            
+        audio = pyaudio.PyAudio()
+        stream = audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=frame,
+            stream_callback=callback
+        )
+        
+        processed = 0
+        segment_start = None
+        silence = 0
+        try:
+            stream.start_stream()
+            while True:
+                try:
+                    written = ring.wait(processed)
+                    count = (written - processed) // frame
+                    if not count:
+                        continue
+                    with span("voice.vad"):
+                        flags = vad.classify(ring.read(processed, processed + count * frame))
+                    
+                    for index, is_speech in enumerate(flags):
+                        frame_end = processed + (index + 1) * frame
+                        if is_speech:
+                            if segment_start is None:
+                                segment_start = max(0, frame_end - frame - pre_roll)
+                            silence = 0
+                        elif segment_start is not None:
+                            silence += 1
+                            
+                        if segment_start is None:
+                            continue
+                        if silence >= hangover or frame_end - segment_start >= max_segment:
+                            end = frame_end - (silence - 1) * frame if silence else frame_end
+                            audio_queue.put_nowait(ring.read(segment_start, end))
+                            segment_start = None
+                            silence = 0
+                            
+                    processed += count * frame
+                except Exception as e:
+                    print(f"Recording error: {e}")
+                    continue
+        finally:
+            stream.stop_stream()
+            stream.close()
+            audio.terminate()
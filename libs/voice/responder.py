@@ -1,10 +1,40 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from queue import Queue
-import os
+import re
+from typing import Iterable, List, Optional
 from openai import OpenAI
 from pydub import AudioSegment
 from pydub.playback import play
+from libs.telemetry import Trace
+from .tts_cache import TTSCache
+
+# OpenAI TTS "pcm" output: 24 kHz, 16-bit signed little-endian, mono
+PCM_SAMPLE_RATE = 24000
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+class PcmPlayer:
+    """Plays raw PCM chunks back to back on one output stream"""
+    
+    def __init__(self, sample_rate: int = PCM_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._audio = None
+        self._stream = None
+        
+    def play(self, pcm: bytes) -> None:
+        """Play PCM bytes, blocking until they have been written"""
+        if self._stream is None:
+            import pyaudio
+            self._audio = pyaudio.PyAudio()
+            self._stream = self._audio.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.sample_rate,
+                output=True
+            )
+        self._stream.write(pcm)
 
 @dataclass
 class Responder:
@@ -14,28 +44,45 @@ class Responder:
     temp_dir: Path
     voice: str = "alloy"
     model: str = "tts-1"
+    pipelined: bool = False
+    prefetch: int = 2
+    cache: Optional[TTSCache] = None
     
     def __post_init__(self):
         self.client = OpenAI(api_key=self.api_key)
         self.temp_dir.mkdir(parents=True, exist_ok=True)
         self.on_respond = lambda _: None  # Callback for response updates
+        self.player = PcmPlayer()
         
     def process_responses(self, result_queue: Queue) -> None:
         """Process responses from queue"""
         while True:
-            text = result_queue.get()
+            item = result_queue.get()
+            # Transcribers queue (answer, trace) pairs to time the voice pipeline
+            text, trace = item if isinstance(item, tuple) else (item, None)
             try:
                 # Notify UI of new response
                 self.on_respond(text)
                 # Convert to speech and play
-                self.speak(text)
+                if self.pipelined:
+                    self.speak_pipelined(text, trace)
+                else:
+                    self.speak(text, trace)
             except Exception as e:
                 print(f"Response error: {e}")
                 continue
                 
-    def speak(self, text: str) -> None:
+    def speak(self, text: str, trace: Optional[Trace] = None) -> None:
         """Convert text to speech and play it"""
-        audio_file = self.temp_dir / f"response_{hash(text)}.mp3"
+        key = TTSCache.key(text, self.voice, self.model)
+        if self.cache:
+            pcm = self.cache.get(key)
+            if pcm is not None:
+                self._mark(trace, "tts_first_byte", "playback_start")
+                self.player.play(pcm)
+                return
+                
+        audio_file = self.temp_dir / f"response_{key}.mp3"
         
         try:
             # Generate speech
@@ -47,11 +94,102 @@ class Responder:
             
             # Save and play audio
             response.stream_to_file(str(audio_file))
+            self._mark(trace, "tts_first_byte")
             audio = AudioSegment.from_mp3(str(audio_file))
+            if self.cache:
+                self.cache.put(key, self._to_pcm(audio))
+            self._mark(trace, "playback_start")
             play(audio)
             
         except Exception as e:
             print(f"Speech generation error: {e}")
             raise
         finally:
-            audio_file.unlink(missing_ok=True) 
\ No newline at end of file
+            audio_file.unlink(missing_ok=True)
+            
+    def speak_pipelined(self, text: str, trace: Optional[Trace] = None) -> None:
+        """Speak sentence by sentence, synthesizing ahead while playing.
+        
+        Up to ``prefetch`` sentences are requested from the TTS API as raw
+        PCM while the current one plays, so playback starts after the first
+        sentence is ready and nothing touches the disk.
+        """
+        sentences = iter(self.split_sentences(text))
+        # At least the sentence being played is always requested
+        depth = max(1, self.prefetch)
+        with ThreadPoolExecutor(max_workers=depth) as executor:
+            pending = deque(
+                executor.submit(self._synthesize_pcm, sentence)
+                for _, sentence in zip(range(depth), sentences)
+            )
+            while pending:
+                pcm = pending.popleft().result()
+                self._mark(trace, "tts_first_byte", "playback_start")
+                following = next(sentences, None)
+                if following is not None:
+                    pending.append(executor.submit(self._synthesize_pcm, following))
+                self.player.play(pcm)
+                
+    def presynthesize(self, texts: Iterable[str]) -> int:
+        """Synthesize and cache audio for known answers ahead of time.
+        
+        Texts are cached in the units ``speak``/``speak_pipelined`` look up,
+        i.e. per sentence in pipelined mode. Returns the number synthesized.
+        """
+        if not self.cache:
+            raise RuntimeError("Pre-synthesis requires a TTS cache")
+            
+        count = 0
+        for text in texts:
+            units = self.split_sentences(text) if self.pipelined else [text]
+            for unit in units:
+                key = TTSCache.key(unit, self.voice, self.model)
+                if self.cache.get(key) is None:
+                    self.cache.put(key, self._request_pcm(unit))
+                    count += 1
+        return count
+        
+    def _synthesize_pcm(self, sentence: str) -> bytes:
+        """Get raw PCM audio for a sentence, from the cache when possible"""
+        key = TTSCache.key(sentence, self.voice, self.model)
+        if self.cache:
+            pcm = self.cache.get(key)
+            if pcm is not None:
+                return pcm
+                
+        pcm = self._request_pcm(sentence)
+        if self.cache:
+            self.cache.put(key, pcm)
+        return pcm
+        
+    def _request_pcm(self, text: str) -> bytes:
+        """Request raw PCM audio from the TTS API"""
+        response = self.client.audio.speech.create(
+            model=self.model,
+            voice=self.voice,
+            input=text,
+            response_format="pcm"
+        )
+        return response.content
+        
+    @staticmethod
+    def _mark(trace: Optional[Trace], *names: str) -> None:
+        if trace is not None:
+            for name in names:
+                trace.mark(name)
+                
+    @staticmethod
+    def _to_pcm(audio: AudioSegment) -> bytes:
+        """Convert decoded audio to the cache's PCM format"""
+        return audio.set_frame_rate(PCM_SAMPLE_RATE).set_channels(1).set_sample_width(2).raw_data
+        
+    @staticmethod
+    def split_sentences(text: str, min_length: int = 20) -> List[str]:
+        """Split text into sentences, merging fragments shorter than ``min_length``"""
+        sentences = []
+        for sentence in SENTENCE_PATTERN.split(text.strip()):
+            if sentences and len(sentences[-1]) < min_length:
+                sentences[-1] = f"{sentences[-1]} {sentence}"
+            elif sentence:
+                sentences.append(sentence)
+        return sentences
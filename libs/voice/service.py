@@ -1,9 +1,13 @@
 from dataclasses import dataclass
 from pathlib import Path
-import whisper
+import threading
+import time
 from .recorder import AudioRecorder
 from .transcriber import Transcriber
 from .responder import Responder
+from .wakeword import WakeWordGate
+from libs.models import LazyWhisperModel
+from .tts_cache import TTSCache
 from typing import Optional
 
 @dataclass
@@ -21,28 +25,76 @@ class VoiceService:
     tts_model: str
     verbose: bool
     rag_service: Optional['RAGService'] = None
+    wake_gate: bool = True
+    wake_gate_model: str = "tiny"
+    wake_gate_window: float = 1.5
+    wake_gate_threshold: float = 0.6
+    mic_streaming: bool = False
+    tts_pipelined: bool = True
+    tts_prefetch: int = 2
+    tts_cache_dir: Optional[Path] = None
+    tts_cache_max_mb: int = 200
+    speculative_retrieval: bool = False
     
     def __post_init__(self):
-        # Initialize whisper model
-        self.whisper_model = whisper.load_model(self.model)
+        # Whisper models are loaded on first use (or by warm_up)
+        self.whisper_model = LazyWhisperModel(self.model)
+        
+        # Small model used only to screen utterances for the wake word
+        self.gate = None
+        if self.wake_gate:
+            self.gate = WakeWordGate(
+                model=LazyWhisperModel(self.wake_gate_model),
+                wake_word=self.wake_word,
+                english=self.english,
+                window=self.wake_gate_window,
+                threshold=self.wake_gate_threshold
+            )
         
         # Initialize components
         self.recorder = AudioRecorder(
             energy=self.energy,
             pause=self.pause,
-            dynamic_energy=self.dynamic_energy
+            dynamic_energy=self.dynamic_energy,
+            streaming=self.mic_streaming
         )
         
         self.transcriber = Transcriber(
             model=self.whisper_model,
             wake_word=self.wake_word,
             english=self.english,
-            rag_service=self.rag_service
+            rag_service=self.rag_service,
+            gate=self.gate,
+            speculate=self.speculative_retrieval
         )
         
         self.responder = Responder(
             api_key=self.api_key,
             temp_dir=Path("temp"),
             voice=self.tts_voice,
-            model=self.tts_model
-        ) 
\ No newline at end of file
+            model=self.tts_model,
+            pipelined=self.tts_pipelined,
+            prefetch=self.tts_prefetch,
+            cache=TTSCache(
+                self.tts_cache_dir,
+                max_bytes=self.tts_cache_max_mb * 1024 * 1024
+            ) if self.tts_cache_dir else None
+        )
+        
+    def warm_up(self, background: bool = True) -> None:
+        """Load the Whisper models and run a dummy inference ahead of first use"""
+        def run():
+            try:
+                models = [self.whisper_model] + ([self.gate.model] if self.gate else [])
+                for model in models:
+                    start = time.perf_counter()
+                    model.warm_up()
+                    if self.verbose:
+                        print(f"[startup] whisper '{model.name}' warm-up: {time.perf_counter() - start:.2f}s")
+            except Exception as e:
+                print(f"Whisper warm-up error: {e}")
+                
+        if background:
+            threading.Thread(target=run, daemon=True, name="whisper-warmup").start()
+        else:
+            run()
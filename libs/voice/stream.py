@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+import threading
+from typing import Optional
+import numpy as np
+
+class RingBuffer:
+    """Preallocated float32 ring buffer filled by the audio callback.
+
+    Positions are absolute sample counts, so readers can address any sample
+    still held in the buffer without tracking wrap-around themselves.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.written = 0
+        self._ready = threading.Condition()
+
+    def write_int16(self, samples: np.ndarray) -> None:
+        """Convert int16 samples straight into the buffer"""
+        n = len(samples)
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        np.multiply(samples[:first], 1.0 / 32768.0,
+                    out=self.buffer[start:start + first], casting="unsafe")
+        if first < n:
+            np.multiply(samples[first:], 1.0 / 32768.0,
+                        out=self.buffer[:n - first], casting="unsafe")
+        with self._ready:
+            self.written += n
+            self._ready.notify_all()
+
+    def wait(self, position: int, timeout: float = 1.0) -> int:
+        """Block until more than ``position`` samples have been written"""
+        with self._ready:
+            self._ready.wait_for(lambda: self.written > position, timeout=timeout)
+            return self.written
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Samples in ``[start, end)``; a view unless the range wraps.
+
+        Views alias the buffer, so the buffer must be sized to outlive the
+        consumer's backlog.
+        """
+        start = max(start, self.written - self.capacity)
+        length = end - start
+        first = start % self.capacity
+        if first + length <= self.capacity:
+            return self.buffer[first:first + length]
+        return np.concatenate([self.buffer[first:], self.buffer[:length - (self.capacity - first)]])
+
+@dataclass
+class FrameVAD:
+    """Frame-wise voice activity detection using energy and zero-crossing rate"""
+
+    sample_rate: int = 16000
+    frame_ms: int = 30
+    min_energy: float = 0.01
+    energy_ratio: float = 3.0
+    max_zcr: float = 0.35
+    adaptive: bool = True
+    noise_alpha: float = 0.95
+
+    def __post_init__(self):
+        self.frame_length = self.sample_rate * self.frame_ms // 1000
+        self.noise_floor: Optional[float] = None
+
+    def classify(self, samples: np.ndarray) -> np.ndarray:
+        """Return one speech/non-speech flag per complete frame"""
+        count = len(samples) // self.frame_length
+        if not count:
+            return np.zeros(0, dtype=bool)
+        frames = samples[:count * self.frame_length].reshape(count, self.frame_length)
+
+        energy = np.sqrt(np.mean(np.square(frames), axis=1))
+        zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+
+        threshold = self.min_energy
+        if self.adaptive and self.noise_floor is not None:
+            threshold = max(threshold, self.noise_floor * self.energy_ratio)
+        speech = (energy > threshold) & (zcr < self.max_zcr)
+
+        # Track the noise floor from the non-speech frames of this block
+        if self.adaptive and not speech.all():
+            quiet = float(np.mean(energy[~speech]))
+            if self.noise_floor is None:
+                self.noise_floor = quiet
+            else:
+                weight = self.noise_alpha ** int((~speech).sum())
+                self.noise_floor = weight * self.noise_floor + (1 - weight) * quiet
+        return speech
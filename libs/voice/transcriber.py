@@ -1,54 +1,204 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from queue import Queue
-import whisper
+from queue import Empty, Queue
 import re
-from typing import Optional
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+import numpy as np
+from libs.telemetry import Trace, span
+from .queues import Resequencer
+from .wakeword import WakeWordGate
 
 @dataclass
 class Transcriber:
     """Handles speech-to-text conversion"""
     
-    model: whisper.Whisper
+    model: Any  # Whisper model or LazyWhisperModel
     wake_word: str
     english: bool
     rag_service: Optional['RAGService'] = None
+    gate: Optional[WakeWordGate] = None
+    sample_rate: int = 16000
+    speculate: bool = False  # prefetch retrieval from the gate model's draft transcript
     
     def __post_init__(self):
         self.on_transcribe = lambda _: None  # Callback for transcript updates
+        # Workers share one model, so decodes are serialized on its lock
+        self._decode_lock = getattr(self.model, "lock", None) or threading.RLock()
+        # Answers are released in utterance order whichever worker finishes first
+        self._sequencer = Resequencer()
+        self._dequeue_lock = threading.Lock()
+        self._drafts = None
+        if self.speculate and self.gate and self.rag_service:
+            self._drafts = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-draft")
     
     def transcribe(self, audio_queue: Queue, result_queue: Queue) -> None:
         """Transcribe audio from queue"""
         while True:
-            audio_data = audio_queue.get()
+            audio_data, trace, ticket = self._next(audio_queue)
+            reply = None
             
             try:
-                result = self.model.transcribe(
-                    audio_data,
-                    language='english' if self.english else None,
-                    fp16=False
-                )
-                
-                text = result["text"].strip()
-                if self._contains_wake_word(text):
-                    question = self._clean_text(text)
+                # Only utterances that pass the cheap gate get the full model
+                if self.gate:
+                    with span("voice.wake_gate"):
+                        passed = self.gate.check(audio_data)
+                    if not passed:
+                        continue
+                self._speculate(audio_data)
                     
-                    # Notify UI of new transcript
-                    self.on_transcribe(question)
+                start = time.process_time()
+                with span("voice.transcribe"), self._decode_lock:
+                    result = self.model.transcribe(
+                        audio_data,
+                        language='english' if self.english else None,
+                        fp16=False
+                    )
+                if self.gate:
+                    self.gate.record_full(
+                        len(audio_data) / self.sample_rate,
+                        time.process_time() - start
+                    )
                     
-                    # Get answer from RAG if available
-                    if self.rag_service:
-                        rag_response = self.rag_service.get_answer(question)
-                        answer = rag_response.get('answer', 
-                            'Sorry, I could not generate an answer.')
-                    else:
-                        answer = question  # Fallback to echo if no RAG
-                        
-                    result_queue.put_nowait(answer)
+                trace.mark("transcribed")
+                reply = self._handle_text(result["text"], trace)
+            except Exception as e:
+                print(f"Transcription error: {e}")
+                continue
+            finally:
+                self._sequencer.complete(ticket, reply, result_queue.put_nowait)
+                
+    def transcribe_batched(self, audio_queue: Queue, result_queue: Queue,
+                           batch_size: int = 4) -> None:
+        """Transcribe queued segments in padded batches.
+        
+        Waits for one segment, then drains up to ``batch_size`` segments that
+        are already queued and decodes the ones that fit Whisper's 30 s window
+        in a single forward pass. Longer segments fall back to ``transcribe``.
+        """
+        import whisper
+        
+        window = whisper.audio.N_SAMPLES
+        while True:
+            taken = [self._next(audio_queue)]
+            while len(taken) < batch_size:
+                try:
+                    taken.append(self._next(audio_queue, block=False))
+                except Empty:
+                    break
                     
+            replies = {}
+            try:
+                batch = taken
+                if self.gate:
+                    with span("voice.wake_gate"):
+                        batch = [item for item in batch if self.gate.check(item[0])]
+                for audio, _, _ in batch:
+                    self._speculate(audio)
+                short = [index for index, (audio, _, _) in enumerate(batch) if len(audio) <= window]
+                with span("voice.transcribe"):
+                    decoded = dict(zip(short, self._decode_batch([batch[i][0] for i in short]))) if short else {}
+                
+                for index, (audio, trace, ticket) in enumerate(batch):
+                    text = decoded.get(index)
+                    if text is None:
+                        with span("voice.transcribe"), self._decode_lock:
+                            text = self.model.transcribe(
+                                audio,
+                                language='english' if self.english else None,
+                                fp16=False
+                            )["text"]
+                    trace.mark("transcribed")
+                    replies[ticket] = self._handle_text(text, trace)
             except Exception as e:
                 print(f"Transcription error: {e}")
                 continue
+            finally:
+                for _, _, ticket in taken:
+                    self._sequencer.complete(ticket, replies.get(ticket), result_queue.put_nowait)
                 
+    def _speculate(self, audio_data: np.ndarray) -> None:
+        """Start retrieval from a small-model draft while the full model runs"""
+        if self._drafts is None:
+            return
+            
+        def run():
+            try:
+                with span("voice.draft"):
+                    text = self.gate.draft(audio_data)
+                question = self._clean_text(text)
+                if question:
+                    self.rag_service.prefetch(question, session_id="voice")
+            except Exception as e:
+                print(f"Speculative retrieval error: {e}")
+                
+        self._drafts.submit(run)
+        
+    def _next(self, audio_queue: Queue, block: bool = True) -> Tuple[np.ndarray, Trace, int]:
+        """Dequeue a segment with a voice trace starting at its end of speech.
+        
+        The segment's ticket fixes where its answer falls in the output order.
+        """
+        with self._dequeue_lock:
+            if hasattr(audio_queue, "get_with_age"):
+                audio, age = audio_queue.get_with_age(block)
+            else:
+                audio, age = audio_queue.get(block), 0.0
+            ticket = self._sequencer.ticket()
+        return audio, Trace("voice", start=time.perf_counter() - age), ticket
+        
+    def _decode_batch(self, segments: List[np.ndarray]) -> List[str]:
+        """Decode padded segments with one batched Whisper forward pass"""
+        import torch
+        import whisper
+        
+        model = self.model.get() if hasattr(self.model, "get") else self.model
+        start = time.process_time()
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(segment.astype(np.float32)),
+                n_mels=model.dims.n_mels
+            )
+            for segment in segments
+        ]).to(model.device)
+        options = whisper.DecodingOptions(
+            language='en' if self.english else None,
+            without_timestamps=True,
+            fp16=False
+        )
+        with self._decode_lock:
+            results = whisper.decode(model, mels, options)
+        if self.gate:
+            self.gate.record_full(
+                sum(len(segment) for segment in segments) / self.sample_rate,
+                time.process_time() - start
+            )
+        return [result.text for result in results]
+        
+    def _handle_text(self, text: str, trace: Optional[Trace] = None) -> Optional[Any]:
+        """Answer a transcript that starts with the wake word; None otherwise"""
+        text = text.strip()
+        if not self._contains_wake_word(text):
+            return None
+        question = self._clean_text(text)
+        
+        # Notify UI of new transcript
+        self.on_transcribe(question)
+        
+        # Get answer from RAG if available
+        if self.rag_service:
+            rag_response = self.rag_service.get_answer(question, session_id="voice")
+            answer = rag_response.get('answer', 
+                'Sorry, I could not generate an answer.')
+        else:
+            answer = question  # Fallback to echo if no RAG
+            
+        if trace is None:
+            return answer
+        trace.mark("answered")
+        return (answer, trace)
+        
     def _contains_wake_word(self, text: str) -> bool:
         """Check if text contains wake word"""
         return text.lower().startswith(self.wake_word.lower())
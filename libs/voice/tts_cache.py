@@ -0,0 +1,64 @@
+import hashlib
+import os
+from pathlib import Path
+import threading
+from typing import Dict, Optional
+
+class TTSCache:
+    """Disk-backed, size-bounded LRU cache of decoded PCM audio.
+    
+    Entries are raw PCM files named by a stable hash of (text, voice, model);
+    file modification time doubles as the LRU clock.
+    """
+    
+    def __init__(self, directory: Path, max_bytes: int = 200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._size = sum(path.stat().st_size for path in self.directory.glob("*.pcm"))
+        
+    @staticmethod
+    def key(text: str, voice: str, model: str) -> str:
+        """Stable cache key, unlike the per-process randomized ``hash``"""
+        return hashlib.sha256(f"{model}\x00{voice}\x00{text}".encode("utf-8")).hexdigest()
+        
+    def get(self, key: str) -> Optional[bytes]:
+        """Get cached PCM, marking it as recently used"""
+        path = self.directory / f"{key}.pcm"
+        try:
+            pcm = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return pcm
+        
+    def put(self, key: str, pcm: bytes) -> None:
+        """Store PCM and evict least recently used entries beyond the size limit"""
+        path = self.directory / f"{key}.pcm"
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(pcm)
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            tmp_path.replace(path)
+            self._size += len(pcm) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+                
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._size}
+        
+    def _evict(self) -> None:
+        entries = sorted(self.directory.glob("*.pcm"), key=lambda path: path.stat().st_mtime)
+        for path in entries:
+            if self._size <= self.max_bytes:
+                break
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            self._size -= size
@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+import re
+import threading
+import time
+from typing import Any, Dict
+import numpy as np
+
+@dataclass
+class WakeWordGate:
+    """Cheap wake-word check run before full transcription"""
+
+    model: Any  # LazyWhisperModel
+    wake_word: str
+    english: bool
+    window: float = 1.5
+    threshold: float = 0.6
+    min_rms: float = 0.01
+    sample_rate: int = 16000
+
+    def __post_init__(self):
+        self.passed = 0
+        self.rejected = 0
+        self.gate_cpu = 0.0
+        self.rejected_audio = 0.0
+        self.full_cpu = 0.0
+        self.full_audio = 0.0
+        self._lock = threading.Lock()
+
+    def check(self, audio_data: np.ndarray) -> bool:
+        """Return whether the utterance likely starts with the wake word"""
+        start = time.process_time()
+        head = audio_data[:int(self.window * self.sample_rate)]
+
+        # Stage 1: skip near-silent audio without running any model
+        passed = bool(head.size) and float(np.sqrt(np.mean(head ** 2))) >= self.min_rms
+        # Stage 2: decode only the first window with the small model
+        if passed:
+            passed = self._matches(self._decode_head(head))
+
+        with self._lock:
+            self.gate_cpu += time.process_time() - start
+            if passed:
+                self.passed += 1
+            else:
+                self.rejected += 1
+                self.rejected_audio += len(audio_data) / self.sample_rate
+        return passed
+
+    def draft(self, audio_data: np.ndarray) -> str:
+        """Fast, rough transcript of a whole utterance with the small model"""
+        result = self.model.transcribe(
+            audio_data.astype(np.float32),
+            language='english' if self.english else None,
+            temperature=0.0,
+            condition_on_previous_text=False,
+            fp16=False
+        )
+        return result["text"].strip()
+
+    def record_full(self, audio_seconds: float, cpu_seconds: float) -> None:
+        """Record the cost of a full transcription to estimate savings"""
+        with self._lock:
+            self.full_audio += audio_seconds
+            self.full_cpu += cpu_seconds
+
+    def stats(self) -> Dict[str, float]:
+        """Gate hit/miss rates and estimated CPU time saved"""
+        with self._lock:
+            total = self.passed + self.rejected
+            cpu_per_second = self.full_cpu / self.full_audio if self.full_audio else 0.0
+            return {
+                "passed": self.passed,
+                "rejected": self.rejected,
+                "hit_rate": self.passed / total if total else 0.0,
+                "miss_rate": self.rejected / total if total else 0.0,
+                "gate_cpu_seconds": self.gate_cpu,
+                "cpu_seconds_saved": max(0.0, self.rejected_audio * cpu_per_second - self.gate_cpu)
+            }
+
+    def _decode_head(self, head: np.ndarray) -> str:
+        """Decode a short window, biased towards the wake word"""
+        import whisper
+        
+        model = self.model.get()
+        audio = whisper.pad_or_trim(head.astype(np.float32))
+        mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels).to(model.device)
+        options = whisper.DecodingOptions(
+            language='en' if self.english else None,
+            without_timestamps=True,
+            fp16=False,
+            prompt=self.wake_word,
+            sample_len=len(self.wake_word.split()) * 4 + 4
+        )
+        # Shares the model's lock with any other user of the same model
+        with self.model.lock:
+            return whisper.decode(model, mel, options).text
+
+    def _matches(self, text: str) -> bool:
+        """Fuzzy-match the start of the decoded text against the wake word"""
+        wake = self._normalize(self.wake_word)
+        heard = self._normalize(text)[:len(wake) + 2]
+        return SequenceMatcher(None, wake, heard).ratio() >= self.threshold
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(re.sub(r'[^\w\s]', '', text.lower()).split())
@@ -0,0 +1,42 @@
+import click
+from src.config import Settings
+
+@click.command()
+@click.argument("faq_file", type=click.Path(exists=True, dir_okay=False), required=False)
+@click.option("--from-answer-cache", is_flag=True,
+              help="Also pre-synthesize every answer in the RAG answer cache.")
+def main(faq_file, from_answer_cache):
+    """Pre-synthesize TTS audio for known FAQ answers.
+    
+    FAQ_FILE holds one answer per paragraph (separated by blank lines).
+    """
+    settings = Settings.load_from_env()
+    if not settings.tts_cache_dir:
+        raise click.UsageError("tts_cache_dir is not configured")
+        
+    from libs.voice.responder import Responder
+    from libs.voice.tts_cache import TTSCache
+    
+    texts = []
+    if faq_file:
+        with open(faq_file, 'r', encoding='utf-8') as f:
+            texts.extend(block.strip() for block in f.read().split("\n\n") if block.strip())
+    if from_answer_cache:
+        from libs.rag.cache import AnswerCache
+        texts.extend(AnswerCache(settings.chroma_dir / "answer_cache.sqlite").answers())
+    if not texts:
+        raise click.UsageError("Nothing to synthesize; pass FAQ_FILE or --from-answer-cache")
+        
+    responder = Responder(
+        api_key=settings.api_key,
+        temp_dir=settings.temp_dir,
+        voice=settings.tts_voice,
+        model=settings.tts_model,
+        pipelined=settings.tts_pipelined,
+        cache=TTSCache(settings.tts_cache_dir, max_bytes=settings.tts_cache_max_mb * 1024 * 1024)
+    )
+    count = responder.presynthesize(texts)
+    click.echo(f"Synthesized {count} new clips for {len(texts)} answers")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import click
+from src.config import Settings
+
+@click.command()
+@click.argument("urls", nargs=-1)
+@click.option("--sitemap", multiple=True, help="Also index every page listed in this sitemap.")
+def main(urls, sitemap):
+    """Incrementally re-index web sources.
+    
+    Every registered page is re-checked with a conditional GET and only
+    changed chunks are re-embedded. URLS and sitemap pages are added first.
+    """
+    settings = Settings.load_from_env()
+    
+    from src.app import create_rag_service
+    
+    rag_service = create_rag_service(settings)
+    click.get_current_context().call_on_close(rag_service.shutdown)
+    if not rag_service.initialize():
+        raise click.ClickException("Failed to initialize RAG service")
+        
+    registry = rag_service.web_sources
+    new_urls = [url for source in sitemap for url in registry.sitemap_urls(source)] + list(urls)
+    targets = list(dict.fromkeys(registry.urls() + new_urls))
+    
+    counts = {}
+    for result in registry.crawl(targets):
+        counts[result.status] = counts.get(result.status, 0) + 1
+        if result.status in ("new", "updated"):
+            click.echo(f"{result.status}: {result.url} (+{result.added} -{result.removed} chunks)")
+        elif result.status == "failed":
+            click.echo(f"failed: {result.url} ({result.error})")
+    click.echo(", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "No web sources")
+
+if __name__ == "__main__":
+    main()
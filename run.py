@@ -1,19 +1,78 @@
+import atexit
+import os
+import threading
+from dataclasses import replace
+from pathlib import Path
+import click
 import panel as pn
+from tornado.process import task_id
+from libs.rag import current_snapshot
+from libs.telemetry import WorkerMetricsWriter, default_tracer
 from src.config import Settings
 from src.app import MultiModalChatApp
+from src.ui import MetricsHandler
 
-def main():
-    # Load settings
-    settings = Settings.load_from_env()
-    
-    # Create application
+def create_app(settings: Settings) -> MultiModalChatApp:
+    """Create and initialize the application"""
     app = MultiModalChatApp(settings)
     if not app.initialize():
         raise RuntimeError("Failed to initialize application")
+    # Also runs in each forked worker, so no transcription process outlives its server
+    atexit.register(app.shutdown)
+    return app
+
+class WorkerDashboard:
+    """Builds the application lazily, once in each forked worker process"""
+    
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._app = None
+        self._lock = threading.Lock()
+        
+    def __call__(self) -> pn.Column:
+        with self._lock:
+            if self._app is None:
+                # Resolved here rather than before forking so late starters get the newest snapshot
+                snapshot = current_snapshot(self.settings.snapshot_dir)
+                self._app = create_app(replace(self.settings, chroma_dir=snapshot))
+                # Tornado restarts a crashed worker under the same task id, so its file is reused
+                worker = task_id()
+                writer = WorkerMetricsWriter(
+                    default_tracer, metrics_dir(self.settings),
+                    str(worker if worker is not None else os.getpid())
+                )
+                writer.start()
+                atexit.register(writer.stop)
+        return self._app.create_dashboard()
+
+def metrics_dir(settings: Settings) -> Path:
+    """Directory where worker processes publish their metrics for ``/metrics``"""
+    return settings.temp_dir / "worker_metrics"
+
+@click.command()
+@click.option("--workers", default=1, show_default=True,
+              help="Worker processes sharing the port; more than one serves read-only index snapshots.")
+@click.option("--port", default=5006, show_default=True)
+def main(workers, port):
+    # Load settings
+    settings = Settings.load_from_env()
+    # Prometheus scrapes per-stage latencies from /metrics
+    extra_patterns = [(r"/metrics", MetricsHandler)]
+    
+    if workers <= 1:
+        # Serve a dashboard built for each session
+        pn.serve(create_app(settings).create_dashboard, port=port, extra_patterns=extra_patterns)
+        return
         
-    # Create and serve dashboard
-    dashboard = app.create_dashboard()
-    pn.serve(dashboard, port=5006)
+    if current_snapshot(settings.snapshot_dir) is None:
+        raise click.ClickException(
+            f"No index snapshot in {settings.snapshot_dir}; publish one with `python3 ingest.py`"
+        )
+    # Workers only answer questions: the microphone and ingestion stay with single-process deployments
+    settings = replace(settings, read_only=True, voice_enabled=False)
+    # Any worker may answer a scrape, so /metrics merges every worker's metrics, labelled by worker
+    extra_patterns = [(r"/metrics", MetricsHandler, {"worker_dir": metrics_dir(settings)})]
+    pn.serve(WorkerDashboard(settings), port=port, num_procs=workers, extra_patterns=extra_patterns)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,13 +1,62 @@
 import panel as pn
 import param
+from contextlib import contextmanager
 from typing import Optional
-from queue import Queue
 import threading
+import time
 
-from libs.rag import RAGService
-from libs.voice import VoiceService
+from libs.rag import RAGService, SnapshotWatcher
+from libs.telemetry import default_tracer
 from src.config import Settings
-from src.ui import ChatTab, VoiceTab, SourcesTab
+from src.ui import ChatTab, VoiceTab, SourcesTab, MetricsTab
+
+def create_rag_service(settings: Settings) -> RAGService:
+    """Create the RAG service from settings"""
+    return RAGService(
+        source_dir=settings.source_dir,
+        temp_dir=settings.temp_dir,
+        chroma_dir=settings.chroma_dir,
+        answer_cache_threshold=settings.answer_cache_threshold,
+        answer_cache_size=settings.answer_cache_size,
+        answer_cache_ttl=settings.answer_cache_ttl,
+        max_sessions=settings.max_sessions,
+        session_idle_timeout=settings.session_idle_timeout,
+        ingestion_workers=settings.ingestion_workers,
+        ingest_batch_size=settings.ingest_batch_size,
+        embedding_backend=settings.embedding_backend,
+        embedding_model=settings.embedding_model,
+        embedding_dim=settings.embedding_dim,
+        embedding_batch_size=settings.embedding_batch_size,
+        embedding_threads=settings.embedding_threads,
+        retriever_mode=settings.retriever_mode,
+        retriever_k=settings.retriever_k,
+        retriever_fetch_k=settings.retriever_fetch_k,
+        vector_backend=settings.vector_backend,
+        dense_dtype=settings.dense_dtype,
+        dense_ivf_lists=settings.dense_ivf_lists,
+        dense_n_probe=settings.dense_n_probe,
+        max_concurrent_llm=settings.max_concurrent_llm,
+        max_concurrent_embeddings=settings.max_concurrent_embeddings,
+        web_crawl_workers=settings.web_crawl_workers,
+        web_fetch_timeout=settings.web_fetch_timeout,
+        transcriber=settings.youtube_transcriber,
+        transcriber_model=settings.transcriber_model,
+        transcription_workers=settings.transcription_workers,
+        transcription_segment_seconds=settings.transcription_segment_seconds,
+        transcript_dir=settings.transcript_dir,
+        context_max_tokens=settings.context_max_tokens,
+        context_max_chunks=settings.context_max_chunks,
+        context_candidates=settings.context_candidates,
+        mmr_lambda=settings.mmr_lambda,
+        memory_max_tokens=settings.memory_max_tokens,
+        memory_summary_tokens=settings.memory_summary_tokens,
+        query_cache_size=settings.query_cache_size,
+        speculative_retrieval=settings.speculative_retrieval and settings.voice_enabled,
+        speculative_match=settings.speculative_match,
+        read_only=settings.read_only,
+        llm_model=settings.llm_model,
+        llm_base_url=settings.llm_base_url
+    )
 
 class MultiModalChatApp(param.Parameterized):
     """Combined RAG and Voice Chat Application"""
@@ -17,13 +66,74 @@ class MultiModalChatApp(param.Parameterized):
         
         # Initialize services
         self.settings = settings
-        self.rag_service = RAGService(
-            source_dir=settings.source_dir,
-            temp_dir=settings.temp_dir,
-            chroma_dir=settings.chroma_dir
-        )
+        with self._timed("rag service"):
+            self.rag_service = create_rag_service(settings)
+            
+        # Voice is optional so text-only deployments never import whisper, torch or pyaudio
+        self.voice_service = None
+        self.voice_tab = None
+        if settings.voice_enabled:
+            with self._timed("voice service"):
+                self.voice_service = self._create_voice_service(settings)
+            self.voice_tab = VoiceTab(self.voice_service)
+            
+        # Initialize UI components; chat tabs are created per session in create_dashboard
+        self.sources_tab = SourcesTab(self.rag_service)
+        self.metrics_tab = MetricsTab(default_tracer)
+        
+        # Create bounded queues for voice processing so backlogs cannot grow without limit
+        self.audio_queue = None
+        self.result_queue = None
+        if self.voice_service:
+            from libs.voice import BoundedQueue
+            
+            self.audio_queue = BoundedQueue(
+                maxsize=settings.audio_queue_size,
+                policy=settings.audio_queue_policy,
+                max_age=settings.audio_max_age
+            )
+            self.result_queue = BoundedQueue(
+                maxsize=settings.result_queue_size,
+                policy=settings.result_queue_policy,
+                max_age=settings.result_max_age
+            )
+            
+        # Read-only workers switch to newly published index snapshots as they appear
+        self.snapshot_watcher = None
+        if settings.read_only:
+            self.snapshot_watcher = SnapshotWatcher(
+                settings.snapshot_dir,
+                self.rag_service.load_snapshot,
+                interval=settings.snapshot_poll_interval,
+                current=settings.chroma_dir
+            )
+            
+        self._register_gauges()
+        
+    def _register_gauges(self):
+        """Expose queue depths, cache and gate statistics alongside latencies"""
+        default_tracer.register_gauges("rag", self.rag_service.metrics)
+        if self.voice_service:
+            default_tracer.register_gauges("audio_queue", self.audio_queue.stats)
+            default_tracer.register_gauges("result_queue", self.result_queue.stats)
+            if self.voice_service.gate:
+                default_tracer.register_gauges("wake_gate", self.voice_service.gate.stats)
+            if self.voice_service.responder.cache:
+                default_tracer.register_gauges("tts_cache", self.voice_service.responder.cache.stats)
+        
+    @contextmanager
+    def _timed(self, phase: str):
+        """Log how long a startup phase takes"""
+        start = time.perf_counter()
+        yield
+        if self.settings.verbose:
+            print(f"[startup] {phase}: {time.perf_counter() - start:.2f}s")
+            
+    def _create_voice_service(self, settings: Settings):
+        """Create the voice service; imported here to keep chat-only startup light"""
+        from libs.voice import VoiceService
         
-        self.voice_service = VoiceService(
+        return VoiceService(
             api_key=settings.api_key,
             model=settings.whisper_model,
             wake_word=settings.wake_word,
@@ -34,38 +144,60 @@ class MultiModalChatApp(param.Parameterized):
             tts_voice=settings.tts_voice,
             tts_model=settings.tts_model,
             verbose=settings.verbose,
-            rag_service=self.rag_service
+            rag_service=self.rag_service,
+            wake_gate=settings.wake_gate,
+            wake_gate_model=settings.wake_gate_model,
+            wake_gate_window=settings.wake_gate_window,
+            wake_gate_threshold=settings.wake_gate_threshold,
+            mic_streaming=settings.mic_streaming,
+            tts_pipelined=settings.tts_pipelined,
+            tts_prefetch=settings.tts_prefetch,
+            tts_cache_dir=settings.tts_cache_dir,
+            tts_cache_max_mb=settings.tts_cache_max_mb,
+            speculative_retrieval=settings.speculative_retrieval
         )
         
-        # Initialize UI components
-        self.chat_tab = ChatTab(self.rag_service)
-        self.voice_tab = VoiceTab(self.voice_service)
-        self.sources_tab = SourcesTab(self.rag_service)
-        
-        # Create queues for voice processing
-        self.audio_queue = Queue()
-        self.result_queue = Queue()
-        
     def initialize(self) -> bool:
         """Initialize all services"""
         try:
             # Initialize RAG
-            if not self.rag_service.initialize():
-                raise RuntimeError("Failed to initialize RAG service")
-                
+            with self._timed("rag initialize"):
+                if not self.rag_service.initialize():
+                    raise RuntimeError("Failed to initialize RAG service")
+            if self.snapshot_watcher:
+                self.snapshot_watcher.start()
+                    
             # Initialize voice processing threads
-            self._start_voice_threads()
+            if self.voice_service:
+                with self._timed("voice threads"):
+                    self._start_voice_threads()
+                if self.settings.voice_warmup:
+                    self.voice_service.warm_up(background=True)
+                    
             
             return True
         except Exception as e:
             print(f"Initialization error: {e}")
             return False
             
+    def shutdown(self):
+        """Release the services' worker threads and processes"""
+        if self.snapshot_watcher:
+            self.snapshot_watcher.stop()
+        self.rag_service.shutdown()
+        
     def _start_voice_threads(self):
         """Start voice processing threads"""
+        transcriber = self.voice_service.transcriber
+        if self.settings.transcribe_batch_size > 1:
+            transcribe = (transcriber.transcribe_batched,
+                          (self.audio_queue, self.result_queue, self.settings.transcribe_batch_size))
+        else:
+            transcribe = (transcriber.transcribe, (self.audio_queue, self.result_queue))
+            
         threads = [
             (self.voice_service.recorder.record, (self.audio_queue,)),
-            (self.voice_service.transcriber.transcribe, (self.audio_queue, self.result_queue)),
+            *[transcribe] * max(1, self.settings.transcriber_workers),
             (self.voice_service.responder.process_responses, (self.result_queue,))
         ]
         
@@ -73,12 +205,15 @@ class MultiModalChatApp(param.Parameterized):
             threading.Thread(target=target, args=args, daemon=True).start()
             
     def create_dashboard(self) -> pn.Column:
-        """Create the main dashboard"""
+        """Create the main dashboard for one browser session"""
+        # Each session gets its own chat input, buttons and stop state
+        tabs = [('Chat', ChatTab(self.rag_service).create())]
+        if self.voice_tab:
+            tabs.append(('Voice', self.voice_tab.create()))
+        tabs.append(('Sources', self.sources_tab.create()))
+        tabs.append(('Metrics', self.metrics_tab.create()))
+        
         return pn.Column(
             pn.Row(pn.pane.Markdown('# AI Assistant')),
-            pn.Tabs(
-                ('Chat', self.chat_tab.create()),
-                ('Voice', self.voice_tab.create()),
-                ('Sources', self.sources_tab.create())
-            )
+            pn.Tabs(*tabs)
         ) 
\ No newline at end of file
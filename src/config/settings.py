@@ -8,15 +8,61 @@ import os
 class Settings:
     """Combined application settings"""
     
-    # OpenAI Settings
-    api_key: str
+    # OpenAI Settings; the key is optional when embeddings and the LLM run locally and voice is off
+    api_key: Optional[str] = None
+    llm_model: str = "gpt-3.5-turbo"
+    llm_base_url: Optional[str] = None  # OpenAI-compatible server, e.g. a local llama.cpp or Ollama
     
     # RAG Settings
     source_dir: Path = Path("data/sources")
     temp_dir: Path = Path("data/temp")
     chroma_dir: Path = Path("data/chroma")
+    answer_cache_threshold: float = 0.95
+    answer_cache_size: int = 256
+    answer_cache_ttl: float = 86400.0
+    max_sessions: int = 100
+    session_idle_timeout: float = 1800.0
+    ingestion_workers: int = 2
+    ingest_batch_size: int = 64
+    embedding_backend: str = "openai"  # openai, hashing or sentence-transformers
+    embedding_model: Optional[str] = None
+    embedding_dim: int = 512
+    embedding_batch_size: int = 64
+    embedding_threads: int = 4
+    retriever_mode: str = "hybrid"  # hybrid or vector
+    retriever_k: int = 4
+    retriever_fetch_k: int = 20
+    vector_backend: str = "chroma"  # chroma or dense
+    dense_dtype: str = "float32"
+    dense_ivf_lists: int = 0  # 0 searches the whole matrix exactly
+    dense_n_probe: int = 8
+    max_concurrent_llm: int = 4
+    max_concurrent_embeddings: int = 8
+    web_crawl_workers: int = 4
+    web_fetch_timeout: float = 30.0
+    youtube_transcriber: str = "openai"  # openai or local
+    transcriber_model: str = "base"
+    transcription_workers: int = 2
+    transcription_segment_seconds: float = 120.0
+    transcript_dir: Optional[Path] = Path("data/transcripts")
+    context_max_tokens: int = 1500  # 0 sends retrieved chunks to the prompt unchanged
+    context_max_chunks: int = 6
+    context_candidates: int = 12
+    mmr_lambda: float = 0.7
+    memory_max_tokens: int = 1000  # 0 keeps every turn verbatim
+    memory_summary_tokens: int = 256
+    query_cache_size: int = 256
+    speculative_retrieval: bool = False  # retrieve from the wake gate's draft transcript
+    speculative_match: float = 0.85
+    read_only: bool = False  # serve a published snapshot; set by run.py --workers
+    snapshot_dir: Path = Path("data/snapshots")
+    snapshot_keep: int = 3
+    snapshot_lease_ttl: float = 120.0  # must exceed the poll interval and RAGService.RETIRE_AFTER
+    snapshot_poll_interval: float = 5.0
     
     # Voice Settings
+    voice_enabled: bool = True
+    voice_warmup: bool = True
     wake_word: str = "hey abc"
     whisper_model: str = "base"
     english_only: bool = True
@@ -25,7 +71,24 @@ class Settings:
     dynamic_energy: bool = False
     tts_voice: str = "alloy"
     tts_model: str = "tts-1"
+    tts_pipelined: bool = True
+    tts_prefetch: int = 2
+    tts_cache_dir: Optional[Path] = Path("data/tts_cache")
+    tts_cache_max_mb: int = 200
     verbose: bool = True
+    wake_gate: bool = True
+    wake_gate_model: str = "tiny"
+    wake_gate_window: float = 1.5
+    wake_gate_threshold: float = 0.6
+    mic_streaming: bool = False
+    audio_queue_size: int = 8
+    audio_queue_policy: str = "drop_oldest"  # drop_oldest, coalesce or reject
+    audio_max_age: float = 30.0
+    result_queue_size: int = 4
+    result_queue_policy: str = "drop_oldest"
+    result_max_age: float = 60.0
+    transcriber_workers: int = 1  # decodes share one model lock; answers are released in order
+    transcribe_batch_size: int = 1
     
     @classmethod
     def load_from_env(cls) -> 'Settings':
@@ -33,7 +96,24 @@ class Settings:
         load_dotenv()
         
         api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment")
+        embedding_backend = os.getenv("EMBEDDING_BACKEND", "openai")
+        llm_base_url = os.getenv("LLM_BASE_URL")
+        voice_enabled = os.getenv("VOICE_ENABLED", "true").lower() not in ("0", "false", "no")
+        if not api_key and (embedding_backend == "openai" or not llm_base_url or voice_enabled):
+            raise ValueError(
+                "OPENAI_API_KEY not found in environment; it is only optional with a local "
+                "EMBEDDING_BACKEND, an LLM_BASE_URL and VOICE_ENABLED=false"
+            )
             
-        return cls(api_key=api_key) 
\ No newline at end of file
+        return cls(
+            api_key=api_key,
+            llm_model=os.getenv("LLM_MODEL", "gpt-3.5-turbo"),
+            llm_base_url=llm_base_url,
+            embedding_backend=embedding_backend,
+            vector_backend=os.getenv("VECTOR_BACKEND", "chroma"),
+            youtube_transcriber=os.getenv("YOUTUBE_TRANSCRIBER", "openai"),
+            voice_enabled=voice_enabled,
+            query_cache_size=int(os.getenv("QUERY_CACHE_SIZE", "256")),
+            speculative_retrieval=os.getenv("SPECULATIVE_RETRIEVAL", "false").lower() in ("1", "true", "yes"),
+            speculative_match=float(os.getenv("SPECULATIVE_MATCH", "0.85"))
+        ) 
\ No newline at end of file
@@ -1,5 +1,7 @@
 from .chat_tab import ChatTab
 from .voice_tab import VoiceTab
 from .sources_tab import SourcesTab
+from .metrics_tab import MetricsTab, MetricsHandler
+from .transcript import Transcript
 
-__all__ = ['ChatTab', 'VoiceTab', 'SourcesTab'] 
\ No newline at end of file
+__all__ = ['ChatTab', 'VoiceTab', 'SourcesTab', 'MetricsTab', 'MetricsHandler', 'Transcript'] 
\ No newline at end of file
@@ -1,9 +1,12 @@
+import asyncio
 import panel as pn
 import param
 from libs.rag import RAGService
+from libs.telemetry import Trace
+from .transcript import Transcript
 
 class ChatTab(param.Parameterized):
-    """Chat interface tab"""
+    """Chat interface tab; one is created per browser session"""
     
     def __init__(self, rag_service: RAGService):
         super().__init__()
@@ -11,40 +14,98 @@ class ChatTab(param.Parameterized):
         self.chat_history = []
         self.input = pn.widgets.TextInput(placeholder="Type your message...")
         self.send_button = pn.widgets.Button(name="Send", button_type="primary")
-        self.chat_display = pn.Column()
+        self.stop_button = pn.widgets.Button(name="Stop", button_type="warning", disabled=True)
+        self.chat_display = Transcript()
+        self._stop_requested = False
+        self._stop_event = None
         
         self.send_button.on_click(self._handle_send)
+        self.stop_button.on_click(self._handle_stop)
         
     def create(self) -> pn.Column:
         """Create chat interface"""
         return pn.Column(
             pn.Row(pn.pane.Markdown("## Chat")),
-            self.chat_display,
+            self.chat_display.create(),
             pn.Row(
                 self.input,
-                self.send_button
+                self.send_button,
+                self.stop_button
             )
         )
         
-    def _handle_send(self, event):
-        """Handle send button click"""
+    async def _handle_send(self, event):
+        """Handle send button click, streaming the answer as it is generated"""
         question = self.input.value
         if not question:
             return
             
         # Add user message to display
-        self.chat_display.append(
-            pn.Row(pn.pane.Markdown(f"**You:** {question}"))
-        )
+        self.chat_display.post("You", question)
         
-        # Get answer from RAG
-        result = self.rag_service.get_answer(question)
-        answer = result.get('answer', 'Sorry, I could not generate an answer.')
+        # Clear input
+        self.input.value = ""
         
-        # Add assistant response to display
-        self.chat_display.append(
-            pn.Row(pn.pane.Markdown(f"**Assistant:** {answer}"))
-        )
+        # Add assistant response to display and fill it in as tokens arrive;
+        # the transcript renders accumulated tokens in periodic batches
+        reply = self.chat_display.post("Assistant", "...")
         
-        # Clear input
-        self.input.value = "" 
\ No newline at end of file
+        self._stop_requested = False
+        self._stop_event = stop = asyncio.Event()
+        self.send_button.disabled = True
+        self.stop_button.disabled = False
+        trace = Trace("chat")
+        tokens = self.rag_service.stream_answer(question, session_id=self._session_id())
+        answer = ""
+        pending = None
+        stopped = asyncio.ensure_future(stop.wait())
+        try:
+            while True:
+                # Pull each token off the event loop so other sessions stay responsive
+                pending = asyncio.ensure_future(asyncio.to_thread(next, tokens, None))
+                await asyncio.wait({pending, stopped}, return_when=asyncio.FIRST_COMPLETED)
+                if not pending.done():
+                    break
+                token, pending = pending.result(), None
+                if token is None:
+                    break
+                trace.mark("first_token")
+                answer += token
+                self.chat_display.update(reply, answer)
+        finally:
+            stopped.cancel()
+            # Closing the stream also closes the LLM request and frees its slot
+            asyncio.ensure_future(self._close_stream(tokens, pending))
+            trace.mark("complete")
+            self._stop_event = None
+            self.send_button.disabled = False
+            self.stop_button.disabled = True
+            
+        if not answer:
+            self.chat_display.update(reply, "Sorry, I could not generate an answer.")
+        elif self._stop_requested:
+            self.chat_display.update(reply, f"{answer} _(stopped)_")
+            
+    def _handle_stop(self, event):
+        """Handle stop button click, interrupting the stream even while it waits for a token"""
+        self._stop_requested = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+            
+    @staticmethod
+    async def _close_stream(tokens, pending):
+        """Close a token stream, first letting a token being produced finish.
+        
+        A generator cannot be closed while it is running, so a stop during a
+        slow token closes the stream as soon as that token arrives.
+        """
+        if pending is not None:
+            await asyncio.wait({pending})
+        await asyncio.to_thread(tokens.close)
+        
+    def _session_id(self) -> str:
+        """Identify the current Panel session for per-session memory"""
+        doc = pn.state.curdoc
+        if doc is not None and doc.session_context is not None:
+            return doc.session_context.id
+        return "default"
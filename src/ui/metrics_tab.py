@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import Optional
+import panel as pn
+import param
+from tornado.web import RequestHandler
+from libs.telemetry import Tracer, collect_worker_metrics, default_tracer
+from .session import add_session_callback
+
+class MetricsHandler(RequestHandler):
+    """Serves the tracer in Prometheus text format at ``/metrics``.
+
+    With a ``worker_dir``, the metrics every worker process writes there are
+    merged instead, so any worker answering the scrape reports all of them.
+    """
+
+    def initialize(self, tracer: Tracer = default_tracer, worker_dir: Optional[Path] = None):
+        self.tracer = tracer
+        self.worker_dir = worker_dir
+
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        if self.worker_dir is not None:
+            self.write(collect_worker_metrics(self.worker_dir))
+        else:
+            self.write(self.tracer.prometheus_text())
+
+class MetricsTab(param.Parameterized):
+    """Pipeline latency and resource metrics tab"""
+
+    def __init__(self, tracer: Tracer = default_tracer):
+        super().__init__()
+        self.tracer = tracer
+        self.latency_display = pn.pane.Markdown("")
+        self.gauge_display = pn.pane.Markdown("")
+
+    def create(self) -> pn.Column:
+        """Create metrics interface"""
+        # One callback per session; the tab itself is shared by all of them
+        add_session_callback(self._refresh, period=2000)
+        self._refresh()
+        return pn.Column(
+            pn.Row(pn.pane.Markdown("## Metrics")),
+            pn.pane.Markdown("Also served in Prometheus format at `/metrics`."),
+            pn.Row(pn.pane.Markdown("### Stage Latency")),
+            self.latency_display,
+            pn.layout.Divider(),
+            pn.Row(pn.pane.Markdown("### Gauges")),
+            self.gauge_display
+        )
+
+    def _refresh(self):
+        """Render the current latency percentiles and gauges"""
+        snapshot = self.tracer.snapshot()
+        rows = ["| Stage | Count | p50 (ms) | p95 (ms) | p99 (ms) |", "|---|---|---|---|---|"]
+        for stage, summary in snapshot.items():
+            rows.append(
+                f"| {stage} | {summary['count']} | {summary['p50'] * 1000:.1f} "
+                f"| {summary['p95'] * 1000:.1f} | {summary['p99'] * 1000:.1f} |"
+            )
+        self.latency_display.object = "\n".join(rows) if snapshot else "_No requests traced yet_"
+
+        gauges = self.tracer.gauges()
+        rows = ["| Gauge | Value |", "|---|---|"]
+        rows.extend(f"| {name} | {value:g} |" for name, value in sorted(gauges.items()))
+        self.gauge_display.object = "\n".join(rows) if gauges else "_No gauges registered_"
@@ -0,0 +1,11 @@
+import panel as pn
+
+def add_session_callback(callback, period: int):
+    """Run ``callback`` every ``period`` ms for the current session until it is destroyed.
+    
+    Tabs shared by all sessions register one callback per session, so
+    updates keep flowing after any single session closes.
+    """
+    periodic = pn.state.add_periodic_callback(callback, period=period)
+    pn.state.on_session_destroyed(lambda session_context: periodic.stop())
+    return periodic
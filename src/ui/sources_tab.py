@@ -2,6 +2,7 @@ import panel as pn
 import param
 from pathlib import Path
 from libs.rag import RAGService
+from .session import add_session_callback
 
 class SourcesTab(param.Parameterized):
     """Document sources management tab"""
@@ -24,7 +25,7 @@ class SourcesTab(param.Parameterized):
         
         # Source type selector
         self.source_type = pn.widgets.Select(
-            options=['pdf', 'youtube', 'web'],
+            options=['pdf', 'audio', 'youtube', 'web', 'sitemap'],
             name='Source Type',
             value='pdf'
         )
@@ -35,12 +36,31 @@ class SourcesTab(param.Parameterized):
         )
         self.status = pn.pane.Markdown("")
         
+        # Ingestion job list and controls
+        self.jobs_display = pn.pane.Markdown("")
+        self.job_select = pn.widgets.Select(name='Job', options={})
+        self.cancel_button = pn.widgets.Button(
+            name="Cancel Job",
+            button_type="warning"
+        )
+        
         # Bind events
         self.source_type.param.watch(self._handle_type_change, 'value')
         self.add_button.on_click(self._handle_add)
+        self.cancel_button.on_click(self._handle_cancel)
         
     def create(self) -> pn.Column:
         """Create sources interface"""
+        if self.rag_service.read_only:
+            return pn.Column(
+                pn.Row(pn.pane.Markdown("## Document Sources")),
+                pn.pane.Markdown(
+                    "This worker serves a read-only index snapshot. "
+                    "Add sources with `ingest.py`, which publishes a new snapshot."
+                )
+            )
+        # One callback per session; the tab itself is shared by all of them
+        add_session_callback(self._refresh_jobs, period=1000)
         return pn.Column(
             pn.Row(pn.pane.Markdown("## Document Sources")),
             pn.Row(
@@ -51,38 +71,48 @@ class SourcesTab(param.Parameterized):
                 ),
                 self.add_button
             ),
-            self.status
+            self.status,
+            pn.layout.Divider(),
+            pn.Row(pn.pane.Markdown("### Ingestion Jobs")),
+            pn.Row(self.job_select, self.cancel_button),
+            self.jobs_display
         )
         
     def _handle_type_change(self, event):
         """Handle source type change"""
-        if event.new == 'pdf':
+        if event.new in ('pdf', 'audio'):
             self.url_input.visible = False
             self.file_upload.visible = True
+            self.file_upload.accept = '.pdf' if event.new == 'pdf' else '.mp3,.m4a,.wav,.ogg,.flac,.webm'
             self.url_input.placeholder = "Enter YouTube URL or webpage URL..."
         else:
             self.url_input.visible = True
             self.file_upload.visible = False
-            placeholder = "Enter YouTube URL..." if event.new == 'youtube' else "Enter webpage URL..."
-            self.url_input.placeholder = placeholder
+            placeholders = {
+                'youtube': "Enter YouTube URL...",
+                'web': "Enter webpage URL...",
+                'sitemap': "Enter sitemap URL..."
+            }
+            self.url_input.placeholder = placeholders[event.new]
             
     def _handle_add(self, event):
         """Handle add source button click"""
         source_type = self.source_type.value
         
         try:
-            if source_type == 'pdf':
+            if source_type in ('pdf', 'audio'):
                 if not self.file_upload.value:
-                    self.status.object = "⚠️ Please select a PDF file"
+                    kind = "a PDF" if source_type == 'pdf' else "an audio"
+                    self.status.object = f"⚠️ Please select {kind} file"
                     return
                     
                 # Save uploaded file
-                pdf_path = Path(self.rag_service.source_dir) / self.file_upload.filename
-                with open(pdf_path, 'wb') as f:
+                file_path = Path(self.rag_service.source_dir) / self.file_upload.filename
+                with open(file_path, 'wb') as f:
                     f.write(self.file_upload.value)
-                source = str(pdf_path)
+                source = str(file_path)
                 
-            else:  # youtube or web
+            else:  # youtube, web or sitemap
                 source = self.url_input.value
                 if not source:
                     self.status.object = "⚠️ Please enter a URL"
@@ -93,15 +123,49 @@ class SourcesTab(param.Parameterized):
                     self.status.object = "⚠️ Please enter a valid URL"
                     return
             
-            if self.rag_service.add_document(source, source_type):
-                self.status.object = f"✅ Successfully added {source_type} source"
-                # Clear inputs
-                if source_type == 'pdf':
-                    self.file_upload.value = None
-                else:
-                    self.url_input.value = ""
+            # Ingest in the background so the server thread stays responsive
+            job = self.rag_service.jobs.submit(source, source_type)
+            self.status.object = f"⏳ Queued {source_type} source as job #{job.id}"
+            # Clear inputs
+            if source_type in ('pdf', 'audio'):
+                self.file_upload.value = None
             else:
-                self.status.object = "❌ Failed to add source"
+                self.url_input.value = ""
+            self._refresh_jobs()
                 
         except Exception as e:
-            self.status.object = f"❌ Error: {str(e)}" 
\ No newline at end of file
+            self.status.object = f"❌ Error: {str(e)}"
+            
+    def _handle_cancel(self, event):
+        """Handle cancel job button click"""
+        job_id = self.job_select.value
+        if job_id is None:
+            return
+        if self.rag_service.jobs.cancel(job_id):
+            self.status.object = f"🛑 Cancelling job #{job_id}"
+        else:
+            self.status.object = f"⚠️ Job #{job_id} has already finished"
+        self._refresh_jobs()
+        
+    def _refresh_jobs(self):
+        """Render the current ingestion jobs"""
+        jobs = self.rag_service.jobs.jobs()
+        icons = {
+            "queued": "⏳", "running": "🔄", "succeeded": "✅",
+            "failed": "❌", "cancelled": "🛑"
+        }
+        
+        rows = ["| Job | Type | Source | Status | Stage |", "|---|---|---|---|---|"]
+        for job in jobs:
+            status = f"{icons.get(job.status, '')} {job.status}"
+            if job.error:
+                status += f" ({job.error})"
+            rows.append(
+                f"| #{job.id} | {job.source_type} | {Path(job.source).name or job.source} "
+                f"| {status} | {job.stage} |"
+            )
+        self.jobs_display.object = "\n".join(rows) if jobs else "_No ingestion jobs yet_"
+        
+        active = {f"#{job.id} {job.source_type}": job.id for job in jobs if not job.done}
+        if active != self.job_select.options:
+            self.job_select.options = active 
\ No newline at end of file
@@ -0,0 +1,89 @@
+import threading
+from collections import deque
+from dataclasses import dataclass
+import panel as pn
+import param
+
+@dataclass
+class Message:
+    """One transcript entry; ``text`` may be updated while an answer streams"""
+
+    speaker: str
+    text: str
+
+class Transcript(param.Parameterized):
+    """Chat transcript with bounded history and batched rendering.
+
+    Messages can be posted and updated from any thread. Changes only mark
+    the transcript dirty; a periodic callback renders them in one update
+    per ``period`` under the session's document lock. Every session showing
+    the transcript registers its own callback, so rendering continues while
+    any of them is open. A single page of
+    ``page_size`` messages is rendered, and at most ``max_messages`` are
+    kept, older ones being browsable a page at a time.
+    """
+
+    def __init__(self, page_size: int = 20, max_messages: int = 500, period: int = 200):
+        super().__init__()
+        self.page_size = page_size
+        self.period = period
+        self.page = 0  # 0 is the newest page
+        self._messages: "deque[Message]" = deque(maxlen=max_messages)
+        self._version = 0
+        self._rendered = 0
+        self._lock = threading.Lock()
+
+        self.display = pn.pane.Markdown("")
+        self.page_label = pn.pane.Markdown("")
+        self.older_button = pn.widgets.Button(name="◀ Older", disabled=True)
+        self.newer_button = pn.widgets.Button(name="Newer ▶", disabled=True)
+        self.older_button.on_click(lambda event: self._turn(1))
+        self.newer_button.on_click(lambda event: self._turn(-1))
+
+    def create(self) -> pn.Column:
+        """Create transcript interface for the current session"""
+        # Bound to the current session's document and stopped when that session closes
+        pn.state.add_periodic_callback(self.flush, period=self.period)
+        return pn.Column(
+            self.display,
+            pn.Row(self.older_button, self.page_label, self.newer_button)
+        )
+
+    def post(self, speaker: str, text: str) -> Message:
+        """Add a message; safe to call from background threads"""
+        message = Message(speaker, text)
+        with self._lock:
+            self._messages.append(message)
+            self._version += 1
+        return message
+
+    def update(self, message: Message, text: str) -> None:
+        """Replace a posted message's text, e.g. as tokens stream in"""
+        with self._lock:
+            message.text = text
+            self._version += 1
+
+    def flush(self) -> None:
+        """Render pending changes in a single update"""
+        with self._lock:
+            if self._version == self._rendered:
+                return
+            self._rendered = self._version
+            total = len(self._messages)
+            pages = max(1, -(-total // self.page_size))
+            self.page = min(self.page, pages - 1)
+            end = total - self.page * self.page_size
+            start = max(0, end - self.page_size)
+            visible = [self._messages[index] for index in range(start, end)]
+
+        self.display.object = "\n\n".join(f"**{m.speaker}:** {m.text}" for m in visible)
+        self.page_label.object = f"{start + 1}–{end} of {total}" if total > self.page_size else ""
+        self.older_button.disabled = start == 0
+        self.newer_button.disabled = self.page == 0
+
+    def _turn(self, step: int) -> None:
+        """Move between pages of history and render immediately"""
+        with self._lock:
+            self.page = max(0, self.page + step)
+            self._version += 1
+        self.flush()
@@ -1,14 +1,18 @@
 import panel as pn
 import param
-from libs.voice import VoiceService
+from typing import TYPE_CHECKING
+from .transcript import Transcript
+
+if TYPE_CHECKING:
+    from libs.voice import VoiceService
 
 class VoiceTab(param.Parameterized):
     """Voice interface tab"""
     
-    def __init__(self, voice_service: VoiceService):
+    def __init__(self, voice_service: 'VoiceService'):
         super().__init__()
         self.voice_service = voice_service
-        self.chat_display = pn.Column()  # Chat-like display for transcripts
+        self.chat_display = Transcript()  # Chat-like display for transcripts
         
         # Start transcript update callback
         self._setup_transcript_callback()
@@ -29,21 +33,19 @@ class VoiceTab(param.Parameterized):
             pn.Row(pn.pane.Markdown("## Voice Interface")),
             controls,
             pn.layout.Divider(),
-            self.chat_display
+            self.chat_display.create()
         )
         
     def _setup_transcript_callback(self):
         """Setup callbacks for updating transcripts"""
         def update_transcript(text: str, is_user: bool = True):
-            """Add new transcript to display"""
+            """Queue a new transcript; voice threads never touch the document directly"""
             if not text:
                 return
                 
             # Format message based on speaker
             speaker = "You" if is_user else "Assistant"
-            self.chat_display.append(
-                pn.Row(pn.pane.Markdown(f"**{speaker}:** {text}"))
-            )
+            self.chat_display.post(speaker, text)
             
         # Register callbacks with voice service
         self.voice_service.transcriber.on_transcribe = lambda text: update_transcript(text, True)
@@ -0,0 +1,63 @@
+import numpy as np
+from langchain.docstore.document import Document
+from libs.rag.cache import AnswerCache
+
+def result(answer):
+    return {"answer": answer, "source_documents": [Document(page_content=answer, metadata={"source": "faq.pdf"})]}
+
+def vector(*values):
+    return list(values)
+
+def test_lookup_returns_the_most_similar_answer_above_the_threshold():
+    cache = AnswerCache(None, threshold=0.9)
+    cache.store("When is tuition due?", vector(1, 0, 0), result("On the first day of term."))
+    cache.store("Where is room 101?", vector(0, 1, 0), result("In the main building."))
+
+    hit = cache.lookup(vector(0.99, 0.05, 0))
+    assert hit["question"] == "When is tuition due?"
+    assert hit["answer"] == "On the first day of term."
+    assert hit["source_documents"][0].metadata == {"source": "faq.pdf"}
+    assert cache.lookup(vector(0, 0, 1)) is None
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 1}
+
+def test_hits_keep_the_matrix_and_evict_least_recently_used():
+    cache = AnswerCache(None, threshold=0.9, max_entries=2)
+    cache.store("a", vector(1, 0, 0), result("A"))
+    cache.store("b", vector(0, 1, 0), result("B"))
+    matrix = cache._matrix
+
+    assert cache.lookup(vector(1, 0, 0))["answer"] == "A"
+    assert cache._matrix is matrix
+    cache.store("c", vector(0, 0, 1), result("C"))
+
+    assert cache.answers() == ["A", "C"]
+    assert cache.lookup(vector(0, 1, 0)) is None
+    assert cache.lookup(vector(0, 0, 1))["answer"] == "C"
+    assert cache._matrix is matrix
+
+def test_expired_entries_are_not_returned():
+    cache = AnswerCache(None, threshold=0.9, ttl=60)
+    cache.store("a", vector(1, 0), result("A"))
+    cache.store("b", vector(0, 1), result("B"))
+    cache._entries["a"]["created"] -= 120
+
+    assert cache.lookup(vector(1, 0)) is None
+    assert cache.lookup(vector(0, 1))["answer"] == "B"
+    assert cache.stats()["entries"] == 1
+
+def test_entries_are_persisted_in_the_background(tmp_path):
+    path = tmp_path / "answer_cache.sqlite"
+    cache = AnswerCache(path, threshold=0.9, flush_interval=0)
+    cache.store("a", vector(1, 0), result("A"))
+    cache.store("b", vector(0, 1), result("B"))
+    cache.lookup(vector(1, 0))
+    cache.close()
+
+    reloaded = AnswerCache(path, threshold=0.9)
+    assert reloaded.answers() == ["B", "A"]
+    assert reloaded.lookup(vector(0, 1))["source_documents"][0].page_content == "B"
+    np.testing.assert_allclose(reloaded._matrix[reloaded._rows["a"]], [1, 0])
+
+    reloaded.clear()
+    reloaded.close()
+    assert AnswerCache(path).answers() == []
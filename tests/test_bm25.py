@@ -0,0 +1,47 @@
+import pytest
+from langchain.docstore.document import Document
+from libs.rag.bm25 import BM25Index, tokenize
+
+DOCUMENTS = {
+    "cs101": "CS-101 Introduction to Programming meets in room 12.",
+    "visa": "Students on an F-1/I-20 visa must register full time.",
+    "parking": "Parking permits are sold at the front desk.",
+    "fees": "Course fees are due at registration; late fees apply after the deadline.",
+}
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(tmp_path / "bm25.sqlite")
+    index.add(list(DOCUMENTS), [Document(page_content=text, metadata={"source": id_}) for id_, text in DOCUMENTS.items()])
+    yield index
+    index.close()
+
+def test_tokenize_keeps_codes_and_their_parts():
+    assert tokenize("CS-101 and F-1/I-20!") == ["cs-101", "cs", "101", "and", "f-1/i-20", "f", "1", "i", "20"]
+
+def test_search_ranks_exact_codes_first(index):
+    assert index.search("cs-101")[0][0] == "cs101"
+    assert index.search("What does F-1/I-20 require?")[0][0] == "visa"
+    assert index.search("quantum chromodynamics") == []
+
+def test_documents_matching_more_query_terms_rank_higher(index):
+    results = index.search("fees")
+    assert [doc_id for doc_id, _ in results] == ["fees"]
+    assert results[0][1] > 0
+    ids = [doc_id for doc_id, _ in index.search("parking permits front desk fees", k=2)]
+    assert ids == ["parking", "fees"]
+
+def test_add_is_idempotent_and_delete_removes_postings(index, tmp_path):
+    index.add(["parking"], [Document(page_content="Parking is free.")])
+    assert len(index) == 4
+    assert index.get_documents(["parking"])["parking"].page_content == DOCUMENTS["parking"]
+
+    index.delete(["parking"])
+    assert len(index) == 3
+    assert index.search("parking") == []
+    assert index.get_documents(["parking", "visa"]).keys() == {"visa"}
+
+    reader = BM25Index(tmp_path / "bm25.sqlite", read_only=True)
+    assert len(reader) == 3
+    assert reader.search("cs-101")[0][0] == "cs101"
+    reader.close()
@@ -0,0 +1,70 @@
+from typing import Dict, List
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from libs.rag.context import ContextAssembler
+
+class FixedEmbeddings(Embeddings):
+    """Embeddings looked up from a table by text"""
+
+    def __init__(self, vectors: Dict[str, List[float]]):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+class UncachedEmbeddings(FixedEmbeddings):
+    def cached_documents(self, texts):
+        return None
+
+def docs(*texts):
+    return [Document(page_content=text, metadata={"source": f"doc{i}"}) for i, text in enumerate(texts)]
+
+def contents(documents):
+    return [doc.page_content for doc in documents]
+
+TUITION = "Tuition is due on the first day of term and can be paid online or at the bursar."
+PARKING = "Parking permits are sold at the front desk of the main building on weekdays."
+LIBRARY = "The library opens at eight in the morning and closes at ten in the evening."
+
+def test_overlap_with_a_selected_chunk_is_cut():
+    first = "Students register for courses in the first week. " + TUITION
+    second = TUITION + " Late payments incur a fee of fifty dollars."
+    assembled = ContextAssembler(max_tokens=1000).assemble(docs(first, second))
+    assert contents(assembled) == [first, "Late payments incur a fee of fifty dollars."]
+    assert assembled[1].metadata == {"source": "doc1"}
+
+def test_near_duplicates_are_dropped():
+    duplicate = TUITION.replace("bursar.", "bursar's office.")
+    assembled = ContextAssembler(max_tokens=1000).assemble(docs(TUITION, duplicate, PARKING))
+    assert contents(assembled) == [TUITION, PARKING]
+
+def test_context_never_exceeds_the_token_budget():
+    assembler = ContextAssembler(max_tokens=30, min_chunk_tokens=4)
+    budget_left = 30 - assembler.encoding.count(TUITION)
+    assembled = assembler.assemble(docs(TUITION, PARKING, LIBRARY))
+
+    assert len(assembled) == 2
+    assert assembled[0].page_content == TUITION
+    assert assembler.encoding.count(assembled[1].page_content) <= budget_left
+    assert PARKING.startswith(assembled[1].page_content)
+    assert sum(assembler.encoding.count(doc.page_content) for doc in assembled) <= 30
+
+def test_small_leftover_budget_is_not_filled_and_chunk_count_is_capped():
+    assembler = ContextAssembler(max_tokens=1000, max_chunks=2)
+    assert contents(assembler.assemble(docs(TUITION, PARKING, LIBRARY))) == [TUITION, PARKING]
+
+    assembler = ContextAssembler(max_tokens=assembler.encoding.count(TUITION) + 2, min_chunk_tokens=8)
+    assert contents(assembler.assemble(docs(TUITION, PARKING))) == [TUITION]
+
+def test_mmr_moves_redundant_chunks_down():
+    vectors = {TUITION: [1.0, 0.0], PARKING: [1.0, 0.05], LIBRARY: [0.0, 1.0]}
+    assembler = ContextAssembler(FixedEmbeddings(vectors), max_tokens=1000, mmr_lambda=0.5)
+    assert contents(assembler.assemble(docs(TUITION, PARKING, LIBRARY))) == [TUITION, LIBRARY, PARKING]
+
+def test_retrieval_order_is_kept_without_cached_embeddings():
+    vectors = {TUITION: [1.0, 0.0], PARKING: [1.0, 0.05], LIBRARY: [0.0, 1.0]}
+    assembler = ContextAssembler(UncachedEmbeddings(vectors), max_tokens=1000, mmr_lambda=0.5)
+    assert contents(assembler.assemble(docs(TUITION, PARKING, LIBRARY))) == [TUITION, PARKING, LIBRARY]
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from libs.rag.dense_index import DenseVectorStore
+from libs.rag.embeddings import HashingEmbeddings
+
+TEXTS = [
+    "Tuition is due on the first day of term.",
+    "The library opens at eight in the morning.",
+    "Parking permits are sold at the front desk.",
+    "Office hours are Monday to Friday in room 101.",
+    "Exams are held in the main hall.",
+    "Lunch is served in the cafeteria from noon.",
+]
+
+@pytest.fixture
+def embeddings():
+    return HashingEmbeddings(dim=64)
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_exact_search_ranks_the_matching_text_first(tmp_path, embeddings, dtype, monkeypatch):
+    monkeypatch.setattr(DenseVectorStore, "BLOCK_ROWS", 4)
+    store = DenseVectorStore(tmp_path, embeddings, dtype=dtype)
+    store.add_texts(TEXTS, ids=[str(i) for i in range(len(TEXTS))])
+
+    results = store.similarity_search_with_score("When are office hours in room 101?", k=3)
+    assert results[0][0].page_content == TEXTS[3]
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+    assert store.similarity_search("exams main hall", k=1)[0].page_content == TEXTS[4]
+
+def test_deleted_rows_are_skipped_and_revived_on_re_add(tmp_path, embeddings):
+    store = DenseVectorStore(tmp_path, embeddings)
+    store.add_texts(TEXTS, ids=[str(i) for i in range(len(TEXTS))])
+    store.delete(ids=["3"])
+    assert TEXTS[3] not in [doc.page_content for doc in store.similarity_search("office hours room 101", k=6)]
+    assert "3" not in store.get()["ids"]
+
+    store.add_texts([TEXTS[3]], ids=["3"])
+    assert store.similarity_search("office hours room 101", k=1)[0].page_content == TEXTS[3]
+    assert store._count == len(TEXTS)
+
+def test_rows_written_by_another_process_are_picked_up_on_refresh(tmp_path, embeddings):
+    writer = DenseVectorStore(tmp_path, embeddings)
+    writer.add_texts(TEXTS[:2], ids=["0", "1"])
+    reader = DenseVectorStore(tmp_path, embeddings, read_only=True)
+    writer.add_texts(TEXTS[2:], ids=[str(i) for i in range(2, len(TEXTS))])
+
+    assert len(reader.similarity_search("front desk", k=6)) == 2
+    reader.refresh()
+    assert reader.similarity_search("parking permits front desk", k=1)[0].page_content == TEXTS[2]
+    with pytest.raises(RuntimeError):
+        reader.add_texts(["read only"])
+
+def test_partitions_are_rebuilt_once_the_index_has_grown(tmp_path, embeddings):
+    store = DenseVectorStore(tmp_path, embeddings, n_probe=2, ivf_growth=0.5)
+    store.add_texts(TEXTS[:4], ids=["0", "1", "2", "3"])
+    store.build_partitions(2)
+    assert store._ivf_rows == 4
+
+    store.add_texts([TEXTS[4]], ids=["4"])
+    assert store._ivf_rows == 4 and len(store._assignments) == 5
+    store.add_texts([TEXTS[5]], ids=["5"])
+    assert store._ivf_rows == 6 and len(store._assignments) == 6
+    assert not store.partitions_outgrown()
+
+    results = store.similarity_search("lunch cafeteria noon", k=1)
+    assert results[0].page_content == TEXTS[5]
+    np.testing.assert_allclose(np.linalg.norm(store._centroids, axis=1), 1, rtol=1e-5)
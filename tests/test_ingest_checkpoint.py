@@ -0,0 +1,54 @@
+import pytest
+from langchain.docstore.document import Document
+from libs.rag.pipeline import IngestCheckpoint, batch_splits
+from libs.rag.service import RAGService
+from libs.rag.vectorstore import RAGVectorStore
+
+def pages(count):
+    return [Document(page_content=f"Page {i} of the handbook.", metadata={"source": "handbook.pdf"}) for i in range(count)]
+
+def test_offsets_persist_until_cleared(tmp_path):
+    path = tmp_path / "ingest_checkpoints.json"
+    checkpoint = IngestCheckpoint(path)
+    assert checkpoint.get("pdf:abc") == 0
+    checkpoint.set("pdf:abc", 3)
+    assert IngestCheckpoint(path).get("pdf:abc") == 3
+
+    checkpoint.clear("pdf:abc")
+    assert IngestCheckpoint(path).get("pdf:abc") == 0
+    assert not path.exists()
+
+def test_batches_hold_whole_documents():
+    split = lambda documents: [chunk for doc in documents for chunk in (doc, doc)]
+    batches = list(batch_splits(pages(5), split, batch_size=3))
+    assert [(consumed, len(chunks)) for consumed, chunks in batches] == [(2, 4), (2, 4), (1, 2)]
+
+def test_failed_ingestion_resumes_and_completion_deletes_the_checkpoint(tmp_path):
+    store = RAGVectorStore(tmp_path, embedding_backend="hashing", vector_backend="dense", batch_size=1)
+    assert store.initialize()
+
+    def failing():
+        yield from pages(2)
+        raise IOError("upload interrupted")
+
+    with pytest.raises(IOError):
+        store.write_documents(failing(), source="pdf:abc")
+    assert store.checkpoints.get("pdf:abc") == 2
+
+    progress = []
+    store.write_documents(pages(4), on_progress=progress.append, source="pdf:abc")
+    assert progress == ["split 3", "embedded 3", "split 4", "embedded 4"]
+    assert len(store.vectorstore.get()["ids"]) == 4
+    assert not store.checkpoints.path.exists()
+    store.close()
+
+def test_files_are_keyed_on_their_contents(tmp_path):
+    first, second = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    first.write_bytes(b"%PDF handbook")
+    second.write_bytes(b"%PDF handbook")
+    key = RAGService._checkpoint_key(str(first), "pdf")
+    assert key == RAGService._checkpoint_key(str(second), "pdf")
+
+    second.write_bytes(b"%PDF revised handbook")
+    assert key != RAGService._checkpoint_key(str(second), "pdf")
+    assert RAGService._checkpoint_key("https://youtu.be/abc", "youtube") == "https://youtu.be/abc"
@@ -0,0 +1,58 @@
+import os
+import sqlite3
+import time
+from libs.rag.snapshot import POINTER, SnapshotPublisher, current_snapshot, hold_lease, leased
+
+def make_snapshots(root, *names):
+    for name in names:
+        (root / name).mkdir(parents=True)
+
+def names(publisher):
+    return [path.name for path in publisher.snapshots()]
+
+def test_publish_copies_the_index_and_moves_the_pointer(tmp_path):
+    index_dir = tmp_path / "index"
+    index_dir.mkdir()
+    conn = sqlite3.connect(index_dir / "meta.sqlite")
+    conn.execute("CREATE TABLE rows (id TEXT)")
+    conn.execute("INSERT INTO rows VALUES ('chunk')")
+    conn.commit()
+    (index_dir / "vectors.float32").write_bytes(b"\0" * 16)
+    (index_dir / "answer_cache.sqlite").write_bytes(b"writer only")
+    (index_dir / "ingest_checkpoints.json").write_text("{}")
+
+    publisher = SnapshotPublisher(index_dir, tmp_path / "snapshots")
+    path = publisher.publish()
+    conn.close()
+
+    assert current_snapshot(publisher.root) == path
+    assert sorted(p.name for p in path.iterdir()) == ["meta.sqlite", "vectors.float32"]
+    with sqlite3.connect(path / "meta.sqlite") as copy:
+        assert copy.execute("SELECT id FROM rows").fetchall() == [("chunk",)]
+    assert not list(publisher.root.glob(".*.staging"))
+
+def test_prune_keeps_the_newest_current_and_leased_snapshots(tmp_path):
+    root = tmp_path / "snapshots"
+    publisher = SnapshotPublisher(tmp_path / "index", root, keep=2, lease_ttl=60)
+    make_snapshots(root, "v1", "v2", "v3", "v4", "v5", ".v6.staging")
+    (root / POINTER).write_text("v1", encoding="utf-8")
+    hold_lease(root, root / "v2")
+
+    publisher.prune()
+    assert names(publisher) == ["v1", "v2", "v4", "v5"]
+    assert (root / ".v6.staging").exists()
+
+def test_expired_leases_no_longer_protect_a_snapshot(tmp_path):
+    root = tmp_path / "snapshots"
+    publisher = SnapshotPublisher(tmp_path / "index", root, keep=1, lease_ttl=60)
+    make_snapshots(root, "v1", "v2", "v3")
+    (root / POINTER).write_text("v3", encoding="utf-8")
+    hold_lease(root, root / "v1")
+    lease = root / ".leases" / f"v1.{os.getpid()}"
+    stale = time.time() - 120
+    os.utime(lease, (stale, stale))
+
+    assert leased(root, 60) == set()
+    assert not lease.exists()
+    publisher.prune()
+    assert names(publisher) == ["v3"]
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from langchain.docstore.document import Document
+from langchain_core.retrievers import BaseRetriever
+from libs.rag.speculative import SpeculativeRetriever
+
+class Recorder(BaseRetriever):
+    """Retriever returning one document naming the query it was called with"""
+
+    queries: List[str] = []
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        self.queries.append(query)
+        return [Document(page_content=query)]
+
+def speculative():
+    return SpeculativeRetriever(
+        retriever=Recorder(queries=[]),
+        executor=ThreadPoolExecutor(max_workers=2),
+        embed=lambda text: [float(len(text))]
+    )
+
+def test_close_draft_reuses_retrieval_but_not_its_embedding():
+    retriever = speculative()
+    retriever.prefetch("When is tuition due")
+
+    assert retriever.embedding("When is the tuition due?") is None
+    assert retriever.invoke("When is the tuition due?")[0].page_content == "When is tuition due"
+    assert retriever.stats()["reused"] == 1
+    assert retriever.stats()["embeddings_reused"] == 0
+
+def test_draft_with_the_same_words_reuses_its_embedding():
+    retriever = speculative()
+    retriever.prefetch("When is tuition due")
+    assert retriever.embedding("when is tuition due?") == [19.0]
+    assert retriever.stats()["embeddings_reused"] == 1
+
+def test_unrelated_question_is_retrieved_normally():
+    retriever = speculative()
+    retriever.prefetch("When is tuition due")
+    assert retriever.invoke("Where can I park?")[0].page_content == "Where can I park?"
+    assert retriever.stats()["missed"] == 1
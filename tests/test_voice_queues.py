@@ -0,0 +1,71 @@
+import threading
+from queue import Empty
+import numpy as np
+import pytest
+
+# The voice package imports its audio dependencies on import
+pytest.importorskip("libs.voice")
+from libs.voice.queues import BoundedQueue, Resequencer, merge_items
+
+def drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+def test_drop_oldest_keeps_the_newest_items():
+    queue = BoundedQueue(maxsize=2, policy="drop_oldest")
+    for item in ("a", "b", "c"):
+        queue.put_nowait(item)
+    assert drain(queue) == ["b", "c"]
+    assert queue.stats()["dropped"] == 1
+
+def test_reject_keeps_the_oldest_items():
+    queue = BoundedQueue(maxsize=2, policy="reject")
+    for item in ("a", "b", "c"):
+        queue.put(item)
+    assert drain(queue) == ["a", "b"]
+    assert queue.stats()["rejected"] == 1
+
+def test_coalesce_merges_into_the_newest_item():
+    queue = BoundedQueue(maxsize=2, policy="coalesce")
+    queue.put(("a", "trace-a"))
+    queue.put((np.array([1, 2]), "trace-b"))
+    queue.put((np.array([3]), "trace-c"))
+    first, (audio, trace) = drain(queue)
+    assert first == ("a", "trace-a")
+    np.testing.assert_array_equal(audio, [1, 2, 3])
+    assert trace == "trace-b"
+    assert queue.stats()["coalesced"] == 1
+    assert merge_items("when is", "tuition due") == "when is tuition due"
+
+def test_stale_items_are_discarded_on_dequeue():
+    queue = BoundedQueue(maxsize=4, max_age=0.0)
+    queue.put("stale")
+    with pytest.raises(Empty):
+        queue.get(timeout=0.01)
+    assert queue.stats()["stale"] == 1
+
+def test_get_waits_for_a_producer_and_reports_the_age():
+    queue = BoundedQueue(maxsize=4)
+    timer = threading.Timer(0.05, queue.put, args=("late",))
+    timer.start()
+    item, age = queue.get_with_age(timeout=2)
+    assert item == "late" and age >= 0
+    with pytest.raises(Empty):
+        queue.get_nowait()
+    with pytest.raises(ValueError):
+        BoundedQueue(policy="block")
+
+def test_resequencer_emits_in_ticket_order_and_skips_empty_results():
+    resequencer = Resequencer()
+    emitted = []
+    tickets = [resequencer.ticket() for _ in range(4)]
+
+    resequencer.complete(tickets[2], "third", emitted.append)
+    resequencer.complete(tickets[1], None, emitted.append)
+    assert emitted == []
+    resequencer.complete(tickets[0], "first", emitted.append)
+    assert emitted == ["first", "third"]
+    resequencer.complete(tickets[3], "fourth", emitted.append)
+    assert emitted == ["first", "third", "fourth"]
@@ -0,0 +1,135 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from langchain.docstore.document import Document
+from libs.rag.embedding_cache import chunk_id
+from libs.rag.vectorstore import RAGVectorStore
+from libs.rag.web_registry import WebSourceRegistry
+
+SHARED = "Office hours are Monday to Friday from nine to five in room 101."
+
+class Site:
+    """Pages served by the local test server, with request counts per path"""
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = {}
+
+    def set(self, path, title, *paragraphs):
+        body = "\n\n".join(f"<p>{text}</p>" for text in paragraphs)
+        self.pages[path] = f"<html><head><title>{title}</title></head>\n\n<body>{body}</body></html>"
+
+@pytest.fixture
+def site():
+    site = Site()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            site.requests[self.path] = site.requests.get(self.path, 0) + 1
+            html = site.pages.get(self.path)
+            if html is None:
+                self.send_error(404)
+                return
+            etag = f'"{hash(html) & 0xffffffff:x}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            content = html.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(content)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    site.url = f"http://127.0.0.1:{server.server_port}"
+    yield site
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def store(tmp_path):
+    store = RAGVectorStore(tmp_path, embedding_backend="hashing", vector_backend="dense", batch_size=8)
+    # Small chunks so every paragraph of a test page becomes its own chunk
+    store.text_splitter._chunk_size = 80
+    store.text_splitter._chunk_overlap = 0
+    assert store.initialize()
+    yield store
+    store.close()
+
+def stored_ids(store):
+    return set(store.vectorstore.get()["ids"])
+
+def test_refresh_skips_unchanged_pages_and_replaces_changed_chunks(site, store, tmp_path):
+    registry = WebSourceRegistry(tmp_path / "web_sources.sqlite", store)
+    url = f"{site.url}/faq"
+    site.set("/faq", "FAQ", "Tuition is due on the first day of term.", SHARED)
+
+    result = registry.refresh(url)
+    assert result.status == "new" and result.added == 2
+    document = store.vectorstore.get()["metadatas"][0]
+    assert document["source"] == url
+    assert document["source_type"] == "Web"
+    assert document["title"] == "FAQ"
+
+    assert registry.refresh(url).status == "not_modified"
+
+    site.set("/faq", "FAQ", "Tuition is due two weeks after the start of term.", SHARED)
+    result = registry.refresh(url)
+    assert (result.status, result.added, result.removed) == ("updated", 1, 1)
+    assert chunk_id(SHARED, store.embeddings.model) in stored_ids(store)
+    assert len(stored_ids(store)) == 2
+    assert site.requests["/faq"] == 3
+
+def test_remove_keeps_chunks_other_sources_reference(site, store, tmp_path):
+    registry = WebSourceRegistry(tmp_path / "web_sources.sqlite", store)
+    site.set("/a", "A", "Parking permits are sold at the front desk.", SHARED)
+    site.set("/b", "B", "Library cards are issued to enrolled students.", SHARED)
+    store.add_documents([Document(page_content=SHARED, metadata={"source": "handbook.pdf"})])
+    for path in ("/a", "/b"):
+        assert registry.refresh(f"{site.url}{path}").status == "new"
+    shared = chunk_id(SHARED, store.embeddings.model)
+
+    assert registry.remove(f"{site.url}/a") == 1
+    assert shared in stored_ids(store)
+    assert registry.remove(f"{site.url}/b") == 1
+    assert shared in stored_ids(store)
+    assert stored_ids(store) == {shared}
+    assert store.references.sources([shared]) == {shared: ["handbook.pdf"]}
+
+def test_failed_fetch_leaves_index_unchanged(site, store, tmp_path):
+    registry = WebSourceRegistry(tmp_path / "web_sources.sqlite", store)
+    result = registry.refresh(f"{site.url}/missing")
+    assert result.status == "failed"
+    assert not stored_ids(store)
+
+def test_retrieval_lists_every_source_of_shared_text(site, store, tmp_path):
+    registry = WebSourceRegistry(tmp_path / "web_sources.sqlite", store)
+    store.add_documents([Document(page_content=SHARED, metadata={"source": "handbook.pdf"})])
+    site.set("/hours", "Opening hours of the student services office", SHARED)
+    url = f"{site.url}/hours"
+    assert registry.refresh(url).status == "new"
+
+    document, = [doc for doc in store.as_retriever().invoke("office hours room 101") if doc.page_content == SHARED]
+    assert document.metadata["source"] == "handbook.pdf"
+    assert document.metadata["sources"] == sorted(["handbook.pdf", url])
+
+def test_backfill_references_chunks_stored_under_random_ids(tmp_path):
+    store = RAGVectorStore(tmp_path, embedding_backend="hashing", vector_backend="dense")
+    store.vectorstore.add_texts([SHARED], metadatas=[{"source": "handbook.pdf"}])
+    store.references.close()
+    (tmp_path / "chunk_sources.sqlite").unlink()
+    store.close()
+
+    store = RAGVectorStore(tmp_path, embedding_backend="hashing", vector_backend="dense")
+    assert store.initialize()
+    shared = chunk_id(SHARED, store.embeddings.model)
+    assert store.references.sources([shared]) == {shared: ["handbook.pdf"]}
+    store.close()